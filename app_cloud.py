@@ -53,7 +53,7 @@ with st.sidebar:
                 st.error(f"執行錯誤: {e}")
 
 # --- 主畫面：顯示報告 ---
-tab1, tab2 = st.tabs(["📊 投資建議 (v800)", "📜 詳細歷史紀錄"])
+tab1, tab2, tab3 = st.tabs(["📊 投資建議 (v800)", "📜 詳細歷史紀錄", "🆚 對戰查詢"])
 
 def load_report(filename):
     if os.path.exists(filename):
@@ -88,4 +88,25 @@ with tab2:
     if df_history is not None:
         st.dataframe(df_history, use_container_width=True)
     else:
-        st.info("尚無結算後的歷史紀錄。")
\ No newline at end of file
+        st.info("尚無結算後的歷史紀錄。")
+
+with tab3:
+    # matchup_matrix 階段預先算好的 30x29 對戰主勝率，直接查表
+    df_matrix = load_report("matchup_matrix_v900.csv")
+    master_file = "FINAL_MASTER_DATASET_v109_FIXED.csv"
+    current_date = pd.read_csv(master_file, usecols=['date'])['date'].max() if os.path.exists(master_file) else None
+    if df_matrix is not None and df_matrix['Data_Date'].iloc[0] != current_date:
+        # 矩陣是用舊的資料庫算的 (更新流程中途失敗等)，不顯示過期的勝率
+        st.warning(f"對戰矩陣已過期：資料日期 {df_matrix['Data_Date'].iloc[0]}，目前資料庫為 {current_date}。"
+                   "請點擊左側更新按鈕重新計算。")
+    elif df_matrix is not None:
+        st.subheader(f"📅 比賽日：{df_matrix['Date'].iloc[0]} (含傷病影響)")
+        st.caption(f"資料日期：{df_matrix['Data_Date'].iloc[0]}")
+        teams = list(df_matrix['Home'])
+        col1, col2 = st.columns(2)
+        home = col1.selectbox("主隊", teams)
+        away = col2.selectbox("客隊", [t for t in teams if t != home])
+        prob = df_matrix[away].iloc[teams.index(home)]
+        st.metric(f"{home} 主場勝率", f"{prob:.1%}", help=f"{away} 勝率 {1 - prob:.1%}")
+    else:
+        st.info("尚無對戰矩陣，請點擊左側更新按鈕。")
@@ -0,0 +1,227 @@
+"""
+【v900 - Box Score 解析效能測試】
+比較 v300 原始的 BeautifulSoup 版 (保留在本檔作為對照組) 與 box_score_parser 的 lxml XPath 版：
+1. 逐頁確認兩者輸出 (game_data, player_gmsc_list) 完全相同
+2. 列出每頁平均解析時間
+
+用法:
+  python bench_box_score_parser.py                 # 使用 fixtures/box_scores/ 中保存的 Box Score 頁面
+  python bench_box_score_parser.py fixtures_dir    # 使用其他資料夾中的 *.html (檔名需為 BBR 格式，例如 202511010BOS.html)
+  python bench_box_score_parser.py --http-cache    # 使用 .http_cache/ 中已下載的 Box Score 頁面
+"""
+import glob
+import json
+import os
+import re
+import sys
+import time
+from bs4 import BeautifulSoup, Comment
+import scrape_client
+from box_score_parser import parse_box_score_html
+
+FIXTURE_DIR = os.path.join("fixtures", "box_scores")
+REPEAT = 5
+
+
+def parse_box_score_soup(content, final_url):
+    """
+    BeautifulSoup 版解析 (v300 原始實作，已由 box_score_parser 取代)。
+    只保留在這裡作為對照組，逐頁比對兩者輸出。
+    """
+    # --- 1. 獲取基本資訊 ---
+    game_date = None; home_team_abbr = None; away_team_abbr = None
+    match = re.search(r'/boxscores/(\d{8})0(\w{3})\.html', final_url)
+    if match:
+        game_date = match.group(1) 
+        home_team_abbr = match.group(2) 
+    else:
+        return None, None
+
+    soup = BeautifulSoup(content, 'lxml')
+    
+    away_team_link = soup.select_one(f'div.scorebox strong a[href*="/teams/"]')
+    if away_team_link:
+        away_team_match = re.search(r'/teams/(\w{3})/', away_team_link['href'])
+        if away_team_match:
+            away_team_abbr = away_team_match.group(1)
+    
+    if not away_team_abbr: return None, None
+
+    game_id = f"{game_date}_{away_team_abbr}_at_{home_team_abbr}"
+    
+    # === PART A: 球隊數據 ===
+    game_data = {'game_id': game_id, 'date': int(game_date), 'home_team': home_team_abbr, 'away_team': away_team_abbr}
+    
+    # 1. 抓取 DNP
+    home_dnp_names = []
+    away_dnp_names = []
+    
+    # (A) 2025 新邏輯 (公開 HTML)
+    inactive_div = soup.find('div', string=re.compile(r'Inactive:'))
+    if inactive_div:
+        home_span = inactive_div.find('span', string=re.compile(home_team_abbr))
+        if home_span:
+            for sibling in home_span.find_next_siblings():
+                if sibling.name == 'span': break
+                if sibling.name == 'a': home_dnp_names.append(sibling.text.strip())
+        away_span = inactive_div.find('span', string=re.compile(away_team_abbr))
+        if away_span:
+            for sibling in away_span.find_next_siblings():
+                if sibling.name == 'span': break
+                if sibling.name == 'a': away_dnp_names.append(sibling.text.strip())
+    
+    # (B) 2024 舊邏輯 (註解) - 如果沒找到
+    if not home_dnp_names and not away_dnp_names:
+        comments = soup.find_all(string=lambda text: isinstance(text, Comment))
+        for comment in comments:
+            comment_soup = BeautifulSoup(comment, 'lxml')
+            home_dnp_table = comment_soup.find('table', {'id': f'box-{home_team_abbr}-game-basic'})
+            if home_dnp_table:
+                dnp_rows = home_dnp_table.find('tfoot').find_all('th', {'data-stat': 'player'})
+                for row in dnp_rows:
+                    if "Did Not Play" in row.get('csk', ''): home_dnp_names.append(row.text.strip())
+            away_dnp_table = comment_soup.find('table', {'id': f'box-{away_team_abbr}-game-basic'})
+            if away_dnp_table:
+                dnp_rows = away_dnp_table.find('tfoot').find_all('th', {'data-stat': 'player'})
+                for row in dnp_rows:
+                    if "Did Not Play" in row.get('csk', ''): away_dnp_names.append(row.text.strip())
+
+    game_data['home_dnp'] = ', '.join(home_dnp_names)
+    game_data['away_dnp'] = ', '.join(away_dnp_names)
+
+    # 2. 抓取球隊統計 (Tfoot)
+    home_table = soup.find('table', {'id': f'box-{home_team_abbr}-game-basic'})
+    if home_table and home_table.find('tfoot'):
+        home_row = home_table.find('tfoot').find('tr')
+        if home_row:
+            for stat in ['pts', 'fg', 'fga', 'fg3', 'fg3a', 'ft', 'fta', 'orb', 'drb', 'trb', 'ast', 'stl', 'blk', 'tov', 'pf']:
+                cell = home_row.find('td', {'data-stat': stat})
+                if cell: game_data[f'home_{stat}'] = int(cell.text)
+    
+    away_table = soup.find('table', {'id': f'box-{away_team_abbr}-game-basic'})
+    if away_table and away_table.find('tfoot'):
+        away_row = away_table.find('tfoot').find('tr')
+        if away_row:
+            for stat in ['pts', 'fg', 'fga', 'fg3', 'fg3a', 'ft', 'fta', 'orb', 'drb', 'trb', 'ast', 'stl', 'blk', 'tov', 'pf']:
+                cell = away_row.find('td', {'data-stat': stat})
+                if cell: game_data[f'away_{stat}'] = int(cell.text)
+
+    # === PART B: 球員數據 (GmSc) ===
+    player_gmsc_list = []
+    
+    # 定義一個內部函式來解析球員表格
+    def extract_players_from_table(table, team_code):
+        if not table or not table.find('tbody'): return
+        for row in table.find('tbody').find_all('tr'):
+            if row.has_attr('class') and 'thead' in row['class']: continue
+            
+            # 必須有 MP (上場時間)，代表有出賽
+            mp_cell = row.find('td', {'data-stat': 'mp'})
+            if not mp_cell or not mp_cell.text.strip(): continue
+            
+            # Player Name & ID
+            # Name 在 th data-stat="player"
+            player_th = row.find('th', {'data-stat': 'player'})
+            if not player_th: continue
+            
+            player_id = player_th.get('data-append-csv') # BBR 這裡直接藏了 ID!
+            player_name = player_th.find('a').text if player_th.find('a') else player_th.text
+            
+            if not player_id: continue # 沒 ID 可能是 Team Totals 或異常
+            
+            # GmSc
+            gmsc_cell = row.find('td', {'data-stat': 'game_score'})
+            try:
+                gmsc_val = float(gmsc_cell.text) if gmsc_cell and gmsc_cell.text.strip() else 0.0
+            except:
+                gmsc_val = 0.0
+            
+            # 計算 Season_Year
+            # 10,11,12月 -> Year+1, 1-9月 -> Year
+            g_year = int(game_date[:4])
+            g_month = int(game_date[4:6])
+            season_year = g_year + 1 if g_month >= 10 else g_year
+            
+            player_gmsc_list.append({
+                'Player_ID': player_id,
+                'Player_Name': player_name,
+                'Season_Year': season_year,
+                'Date': f"{game_date[:4]}-{game_date[4:6]}-{game_date[6:]}", # YYYY-MM-DD
+                'Team_Abbr': team_code,
+                'G': 1, # 這裡 G 不重要，重要的是 GmSc
+                'Single_Game_GmSc': gmsc_val
+            })
+
+    # 提取主隊球員
+    extract_players_from_table(home_table, home_team_abbr)
+    # 提取客隊球員
+    extract_players_from_table(away_table, away_team_abbr)
+
+    return game_data, player_gmsc_list
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    """回傳 [(final_url, content bytes), ...]；fixture_dir 為 None 時讀取 .http_cache/"""
+    pages = []
+    if fixture_dir:
+        for path in sorted(glob.glob(os.path.join(fixture_dir, '*.html'))):
+            with open(path, 'rb') as f:
+                pages.append((f"https://www.basketball-reference.com/boxscores/{os.path.basename(path)}", f.read()))
+        return pages
+
+    for meta_path in sorted(glob.glob(os.path.join(scrape_client.CACHE_DIR, '*.json'))):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        final_url = meta.get('final_url') or meta['url']
+        if not re.search(r'/boxscores/\d{8}0\w{3}\.html', final_url):
+            continue
+        with open(meta_path[:-len('.json')] + '.body', 'rb') as f:
+            pages.append((final_url, f.read()))
+    return pages
+
+
+def time_parser(parser, content, final_url):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = parser(content, final_url)
+    return (time.perf_counter() - start) / REPEAT, result
+
+
+def main():
+    if '--http-cache' in sys.argv:
+        fixture_dir = None
+    else:
+        fixture_dir = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+    pages = load_fixtures(fixture_dir)
+    if not pages:
+        print(f"找不到任何 Box Score 頁面 ({fixture_dir or scrape_client.CACHE_DIR})。")
+        return
+
+    print(f"--- Box Score 解析效能測試 ({len(pages)} 頁, 每頁 {REPEAT} 次) ---")
+    print(f"{'頁面':<22} | {'KB':>6} | {'soup (ms)':>10} | {'xpath (ms)':>10} | {'加速':>6} | 輸出一致")
+    print("-" * 80)
+
+    total_soup = total_fast = 0.0
+    mismatches = 0
+    for final_url, content in pages:
+        t_soup, r_soup = time_parser(parse_box_score_soup, content, final_url)
+        t_fast, r_fast = time_parser(parse_box_score_html, content, final_url)
+        same = r_soup == r_fast
+        if not same: mismatches += 1
+        total_soup += t_soup
+        total_fast += t_fast
+        name = os.path.basename(final_url)
+        print(f"{name:<22} | {len(content) / 1024:>6.0f} | {t_soup * 1000:>10.1f} | {t_fast * 1000:>10.1f} | "
+              f"{t_soup / t_fast:>5.1f}x | {'V' if same else 'X'}")
+
+    print("-" * 80)
+    print(f"平均每頁: soup {total_soup / len(pages) * 1000:.1f} ms, xpath {total_fast / len(pages) * 1000:.1f} ms "
+          f"({total_soup / total_fast:.1f}x)")
+    if mismatches:
+        print(f"[!] {mismatches} 頁輸出不一致")
+    else:
+        print("所有頁面輸出一致。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+【v900 - data_store.append_csv 追加成本測試】
+以原始比賽資料重複堆出不同總筆數的 CSV (含 Parquet 鏡像)，量測每天追加少量新比賽的時間：
+1. append_csv：CSV 尾端追加 + 鏡像新增一個分段 + 只雜湊新寫入的位元組
+2. 原本的鏡像更新方式 (讀整份鏡像 -> concat -> 重寫 -> 整檔 sha1)，作為對照
+追加後 data_store.read_csv / read_table 的結果必須與 pd.read_csv 完全相同 (check_exact)，
+且 mtime 改變 (例如 git checkout) 時以分段雜湊沿用鏡像、不重建。
+在暫存資料夾中執行，不修改目前資料夾的檔案。
+
+用法:
+  python bench_data_store_append.py
+"""
+import hashlib
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import data_store
+
+RAW_GAMES = "nba_game_data_raw_v52_PATCHED.csv"
+TOTAL_ROWS = [10_000, 100_000, 400_000]
+NEW_ROWS = [10, 1_000]
+REPEAT = 5
+
+
+def legacy_append_mirror(parquet_path, new_rows, csv_path):
+    """原本的寫法：整份鏡像讀出、合併、重寫，並雜湊整個 CSV"""
+    old = pd.read_parquet(parquet_path)
+    combined = pd.concat([old, pd.read_csv(io.StringIO(new_rows.to_csv(index=False)))], ignore_index=True)
+    combined.to_parquet(parquet_path, index=False)
+    h = hashlib.sha1()
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def median_time(func):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    if not data_store.HAS_COLUMNAR:
+        print("錯誤: 找不到 pyarrow，無法測試 Parquet 鏡像 (pip install pyarrow)。")
+        return
+    if not os.path.exists(RAW_GAMES):
+        print(f"錯誤: 找不到 '{RAW_GAMES}'")
+        return
+    raw = pd.read_csv(RAW_GAMES)
+    cwd = os.getcwd()
+
+    print(f"--- append_csv 追加成本 (中位數, {REPEAT} 次) ---")
+    print(f"{'總筆數':>8} | {'新增':>6} | {'append_csv':>11} | {'原本鏡像更新':>12} | 讀取一致")
+    print("-" * 62)
+    all_same = True
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for total in TOTAL_ROWS:
+                base = raw.iloc[np.arange(total) % len(raw)].reset_index(drop=True)
+                for new_n in NEW_ROWS:
+                    path = RAW_GAMES
+                    for name in os.listdir('.'):
+                        if name.endswith('.csv'): os.remove(name)
+                    base.to_csv(path, index=False)
+                    data_store.build_mirror(path)
+                    new_rows = raw.tail(new_n)
+
+                    t_append = median_time(lambda: data_store.append_csv(new_rows, path))
+
+                    # 模擬 git checkout：內容不變、mtime 改變 -> 分段雜湊相符，沿用鏡像
+                    os.utime(path, ns=(time.time_ns(), time.time_ns()))
+                    parts_before = data_store._read_meta(path).get('parts')
+                    expected = pd.read_csv(path)
+                    same = data_store._read_meta(path) != {}
+                    try:
+                        pd.testing.assert_frame_equal(data_store.read_csv(path), expected, check_exact=True)
+                        last_day = int(expected['date'].max())
+                        pd.testing.assert_frame_equal(
+                            data_store.read_table(path, columns=['game_id'], start=str(last_day), end=str(last_day)),
+                            expected.loc[expected['date'] == last_day, ['game_id']].reset_index(drop=True),
+                            check_exact=True)
+                    except AssertionError:
+                        same = False
+                    same = same and data_store._read_meta(path).get('parts') == parts_before == REPEAT
+                    all_same = all_same and same
+
+                    parquet_path, _ = data_store._mirror_paths(path)
+                    data_store.build_mirror(path)
+                    t_legacy = median_time(lambda: legacy_append_mirror(parquet_path, new_rows, path))
+                    print(f"{total:>8} | {new_n:>6} | {t_append * 1000:>8.1f} ms | {t_legacy * 1000:>9.1f} ms | "
+                          f"{'V' if same else 'X'}")
+        finally:
+            os.chdir(cwd)
+    print("所有讀取結果一致。" if all_same else "[!] 追加後的讀取結果與 CSV 不一致")
+
+
+if __name__ == "__main__":
+    main()
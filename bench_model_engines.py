@@ -0,0 +1,93 @@
+"""
+【v900 - 模型引擎效能比較】
+以 2026 賽季為 holdout (只用之前的賽季訓練)，比較 model_registry.MODEL_ENGINES 中每個可用引擎：
+1. 訓練時間 (StandardScaler + 模型，與 load_or_train 相同)
+2. 預測延遲：單日賽程 (SLATE_SIZE 場，取 REPEAT 次中位數) 與整個 holdout 一次預測
+3. 模型大小 (joblib 序列化後的位元組數)
+4. holdout 的 log loss 與準確率
+(不讀寫 models/ 與 model_config.json；各引擎使用 MODEL_ENGINES 的預設參數)
+
+用法:
+  python bench_model_engines.py [--engine rf|hist_gb|xgboost]
+"""
+import io
+import sys
+import time
+import numpy as np
+import joblib
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.preprocessing import StandardScaler
+import data_store
+import master_schema
+import model_registry
+from feature_builder import FEATURE_COLUMNS
+
+HOLDOUT_SEASON = 2026
+SLATE_SIZE = 10
+REPEAT = 20
+
+
+def bench_engine(engine, X_train, y_train, X_test, y_test):
+    _, params = model_registry.resolve_model_config(engine)
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    model = model_registry.make_model(engine, params)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    train_s = time.perf_counter() - start
+
+    slate = X_test[:SLATE_SIZE]
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        model.predict_proba(scaler.transform(slate))
+        times.append(time.perf_counter() - start)
+    slate_ms = float(np.median(times)) * 1000
+
+    start = time.perf_counter()
+    proba = model.predict_proba(scaler.transform(X_test))[:, 1]
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    buf = io.BytesIO()
+    joblib.dump({'scaler': scaler, 'model': model}, buf)
+    return {
+        'engine': engine, 'train_s': train_s, 'slate_ms': slate_ms, 'batch_ms': batch_ms,
+        'size_mb': buf.tell() / 1e6,
+        'log_loss': log_loss(y_test, proba, labels=[0, 1]),
+        'accuracy': accuracy_score(y_test, proba >= 0.5),
+    }
+
+
+def main():
+    engines = model_registry.ENGINES
+    if '--engine' in sys.argv:
+        engines = [sys.argv[sys.argv.index('--engine') + 1]]
+        if engines[0] not in model_registry.ENGINES:
+            print(f"錯誤: 無法使用的模型引擎 '{engines[0]}' (可用: {', '.join(model_registry.ENGINES)})")
+            return
+    if not data_store.exists(master_schema.MASTER_FILE):
+        print(f"錯誤: 找不到 '{master_schema.MASTER_FILE}'")
+        return
+
+    df = master_schema.read_master(usecols=FEATURE_COLUMNS + ['Season_Year', 'Win']).fillna(0)
+    train = df['Season_Year'] < HOLDOUT_SEASON
+    test = df['Season_Year'] == HOLDOUT_SEASON
+    if not test.any():
+        print(f"錯誤: 找不到 {HOLDOUT_SEASON} 賽季數據")
+        return
+    X_train, y_train = df.loc[train, FEATURE_COLUMNS].to_numpy(dtype=float), df.loc[train, 'Win'].to_numpy(dtype=int)
+    X_test, y_test = df.loc[test, FEATURE_COLUMNS].to_numpy(dtype=float), df.loc[test, 'Win'].to_numpy(dtype=int)
+
+    print(f"--- 模型引擎比較 (訓練 {len(y_train)} 筆, {HOLDOUT_SEASON} holdout {len(y_test)} 筆) ---")
+    if not model_registry.HAS_XGBOOST:
+        print("(未安裝 xgboost，略過 xgboost 引擎)")
+    print(f"{'引擎':<8} | {'訓練 (s)':>8} | {f'單日 {SLATE_SIZE} 場 (ms)':>14} | {'整季 (ms)':>9} | "
+          f"{'大小 (MB)':>9} | {'log loss':>8} | {'準確率':>6}")
+    print("-" * 86)
+    for engine in engines:
+        r = bench_engine(engine, X_train, y_train, X_test, y_test)
+        print(f"{r['engine']:<8} | {r['train_s']:>8.2f} | {r['slate_ms']:>14.2f} | {r['batch_ms']:>9.1f} | "
+              f"{r['size_mb']:>9.2f} | {r['log_loss']:>8.4f} | {r['accuracy']:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+【v900 - 連勝 / 傷病影響 向量化效能測試】
+在完整的 2015~2026 資料上比較原本的逐列寫法與向量化版本：
+1. Before_Game_Streak：groupby.apply + Python for 迴圈 vs 切點 cumsum
+2. Total_Injury_Impact：df.apply(axis=1) + 字典查詢 vs DNP 展開 + 合併平均 GmSc 表
+兩者輸出必須完全相同 (check_exact)。
+
+用法:
+  python bench_team_features.py
+"""
+import time
+import pandas as pd
+import data_store
+from v200data_process9 import (build_team_games, player_avg_gmsc_by_season, calculate_streak,
+                               calculate_injury_impact, compute_team_features)
+
+RAW_GAMES = "nba_game_data_raw_v52_PATCHED.csv"
+PLAYER_CUMULATIVE = "nba_player_cumulative_gmsc_v108.csv"
+REPEAT = 3
+
+
+def legacy_streak(df_team_games):
+    """原本的寫法 (v108)"""
+    def calculate_streak(series):
+        streaks = []
+        current_streak = 0
+        for result in series:
+            streaks.append(current_streak)
+            if result == 1: current_streak = current_streak + 1 if current_streak > 0 else 1
+            else: current_streak = current_streak - 1 if current_streak < 0 else -1
+        return pd.Series(streaks, index=series.index)
+    return df_team_games.groupby(['Season_Year', 'team'])['win'].apply(calculate_streak).reset_index(level=[0,1], drop=True)
+
+
+def legacy_injury_impact(df_team_games, avg_gmsc_by_season):
+    """原本的寫法 (v108)"""
+    avg_gmsc_by_season = avg_gmsc_by_season.to_dict()
+
+    def calculate_injury_impact_fast(row):
+        dnp_str = row['dnp']
+        if pd.isna(dnp_str) or dnp_str == "": return 0.0
+        team_avg_gmsc = 80.0
+        dnp_list = [x.strip() for x in str(dnp_str).split(',')]
+        total_missing_gmsc = 0.0
+        season = row['Season_Year']
+        for player_name in dnp_list:
+            key = (season, player_name)
+            if key in avg_gmsc_by_season:
+                total_missing_gmsc += avg_gmsc_by_season[key]
+        return total_missing_gmsc / team_avg_gmsc
+    return df_team_games.apply(calculate_injury_impact_fast, axis=1)
+
+
+def best_time(func, *args):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    if not data_store.exists(RAW_GAMES) or not data_store.exists(PLAYER_CUMULATIVE):
+        print("錯誤: 找不到輸入檔案 (需要原始比賽資料與球員累積 GmSc)。")
+        return
+    df_games = data_store.read_csv(RAW_GAMES)
+    avg_gmsc_by_season = player_avg_gmsc_by_season(data_store.read_csv(PLAYER_CUMULATIVE))
+    team_games = build_team_games(df_games).sort_values(by=['team', 'date']).reset_index(drop=True)
+
+    print(f"--- 連勝 / 傷病影響 向量化效能測試 ({len(df_games)} 場, {len(team_games)} 隊次, 取 {REPEAT} 次最佳) ---")
+    print(f"{'項目':<20} | {'原本 (ms)':>10} | {'向量化 (ms)':>11} | {'加速':>7} | 輸出一致")
+    print("-" * 72)
+
+    cases = [
+        ("Before_Game_Streak", legacy_streak, calculate_streak, (team_games,)),
+        ("Total_Injury_Impact", legacy_injury_impact, calculate_injury_impact, (team_games, avg_gmsc_by_season)),
+    ]
+    all_same = True
+    for name, legacy, fast, args in cases:
+        t_old, r_old = best_time(legacy, *args)
+        t_new, r_new = best_time(fast, *args)
+        r_new = pd.Series(r_new, index=team_games.index)
+        try:
+            pd.testing.assert_series_equal(r_old.sort_index(), r_new, check_exact=True, check_names=False)
+            same = True
+        except AssertionError:
+            same = False
+        all_same = all_same and same
+        print(f"{name:<20} | {t_old * 1000:>10.1f} | {t_new * 1000:>11.1f} | {t_old / t_new:>6.1f}x | {'V' if same else 'X'}")
+
+    t_total, _ = best_time(compute_team_features, build_team_games(df_games), avg_gmsc_by_season)
+    print("-" * 72)
+    print(f"compute_team_features 全部特徵: {t_total * 1000:.0f} ms")
+    print("所有輸出一致。" if all_same else "[!] 向量化結果與原本寫法不一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+【v900 - Box Score 快速解析引擎 (lxml XPath)】
+只取管線需要的部分，不建立完整的 BeautifulSoup 樹：
+1. scorebox 中的客隊連結
+2. Inactive 名單 (新版公開 HTML) 或註解中的 box-*-game-basic (舊版)
+3. box-*-game-basic 的 tfoot (球隊總計) 與 tbody (球員 GmSc)
+回傳格式與 v300 的 BeautifulSoup 版本完全相同 (game_data, player_gmsc_list)。
+"""
+import re
+import lxml.html
+from lxml import etree
+
+TEAM_STATS = ['pts', 'fg', 'fga', 'fg3', 'fg3a', 'ft', 'fta', 'orb', 'drb', 'trb', 'ast', 'stl', 'blk', 'tov', 'pf']
+
+_SCOREBOX_TEAM = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' scorebox ')]//strong//a[contains(@href, '/teams/')]"
+)
+_COMMENTS = etree.XPath("//comment()")
+_PLAYER_TH = etree.XPath(".//th[@data-stat='player']")
+# BBR 頁面為 UTF-8；明確指定以免沒有 meta charset 時被當成 Latin-1
+_UTF8_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+
+def _first(el, xpath):
+    found = el.xpath(xpath)
+    return found[0] if found else None
+
+
+def _text(el):
+    """等同 BeautifulSoup 的 .text (不含註解)"""
+    return ''.join(el.itertext()) if el is not None else ''
+
+
+def _bs_string(el):
+    """
+    等同 BeautifulSoup 的 .string：
+    只有一個子節點時往下取，否則為 None (find(..., string=...) 依此比對)
+    """
+    nodes = []
+    if el.text:
+        nodes.append(el.text)
+    for child in el:
+        nodes.append(child)
+        if child.tail:
+            nodes.append(child.tail)
+    if len(nodes) != 1:
+        return None
+    node = nodes[0]
+    if isinstance(node, str):
+        return node
+    if node.tag is etree.Comment:
+        return node.text
+    return _bs_string(node)
+
+
+def _find_by_string(root, tag, pattern):
+    for el in root.iter(tag):
+        value = _bs_string(el)
+        if value is not None and re.search(pattern, value):
+            return el
+    return None
+
+
+def _inactive_names(inactive_div, team_abbr):
+    names = []
+    span = _find_by_string(inactive_div, 'span', team_abbr)
+    if span is None:
+        return names
+    for sibling in span.itersiblings():
+        if not isinstance(sibling.tag, str):
+            continue
+        if sibling.tag == 'span': break
+        if sibling.tag == 'a': names.append(_text(sibling).strip())
+    return names
+
+
+def _commented_dnp(root, team_abbr):
+    """舊版頁面：DNP 藏在註解中的 box 表格 tfoot；只解析含有該表格 id 的註解"""
+    table_id = f'box-{team_abbr}-game-basic'
+    names = []
+    for comment in _COMMENTS(root):
+        text = comment.text or ''
+        if table_id not in text:
+            continue
+        table = _first(lxml.html.document_fromstring(text), f"//table[@id='{table_id}']")
+        if table is None:
+            continue
+        tfoot = _first(table, './/tfoot')
+        if tfoot is None:
+            raise AttributeError(f"{table_id} 沒有 tfoot")
+        for th in _PLAYER_TH(tfoot):
+            if "Did Not Play" in th.get('csk', ''):
+                names.append(_text(th).strip())
+    return names
+
+
+def _team_totals(table, side, game_data):
+    tfoot = _first(table, './/tfoot') if table is not None else None
+    if tfoot is None:
+        return
+    row = _first(tfoot, './/tr')
+    if row is None:
+        return
+    cells = {}
+    for td in row.iter('td'):
+        cells.setdefault(td.get('data-stat'), td)
+    for stat in TEAM_STATS:
+        if stat in cells:
+            game_data[f'{side}_{stat}'] = int(_text(cells[stat]))
+
+
+def _players(table, team_code, game_date, player_gmsc_list):
+    tbody = _first(table, './/tbody') if table is not None else None
+    if tbody is None:
+        return
+    g_year = int(game_date[:4])
+    g_month = int(game_date[4:6])
+    season_year = g_year + 1 if g_month >= 10 else g_year
+    date_str = f"{game_date[:4]}-{game_date[4:6]}-{game_date[6:]}"
+
+    for row in tbody.iter('tr'):
+        if 'thead' in (row.get('class') or '').split(): continue
+
+        cells = {}
+        for cell in row.iter('td', 'th'):
+            cells.setdefault((cell.tag, cell.get('data-stat')), cell)
+
+        mp_cell = cells.get(('td', 'mp'))
+        if mp_cell is None or not _text(mp_cell).strip(): continue
+
+        player_th = cells.get(('th', 'player'))
+        if player_th is None: continue
+
+        player_id = player_th.get('data-append-csv')
+        link = _first(player_th, './/a')
+        player_name = _text(link) if link is not None else _text(player_th)
+        if not player_id: continue
+
+        gmsc_cell = cells.get(('td', 'game_score'))
+        try:
+            gmsc_text = _text(gmsc_cell)
+            gmsc_val = float(gmsc_text) if gmsc_cell is not None and gmsc_text.strip() else 0.0
+        except ValueError:
+            gmsc_val = 0.0
+
+        player_gmsc_list.append({
+            'Player_ID': player_id,
+            'Player_Name': player_name,
+            'Season_Year': season_year,
+            'Date': date_str,
+            'Team_Abbr': team_code,
+            'G': 1,
+            'Single_Game_GmSc': gmsc_val
+        })
+
+
+def parse_box_score_html(content, final_url):
+    """
+    解析 Box Score 頁面內容 (bytes 或 str)。
+    網址或客隊無法辨識時回傳 (None, None)；欄位格式錯誤時拋出例外 (與舊版相同由呼叫端處理)。
+    """
+    match = re.search(r'/boxscores/(\d{8})0(\w{3})\.html', final_url)
+    if not match:
+        return None, None
+    game_date = match.group(1)
+    home_team_abbr = match.group(2)
+
+    if isinstance(content, bytes):
+        root = lxml.html.document_fromstring(content, parser=_UTF8_PARSER)
+    else:
+        root = lxml.html.document_fromstring(content)
+
+    away_team_abbr = None
+    links = _SCOREBOX_TEAM(root)
+    if links:
+        away_match = re.search(r'/teams/(\w{3})/', links[0].get('href'))
+        if away_match:
+            away_team_abbr = away_match.group(1)
+    if not away_team_abbr:
+        return None, None
+
+    game_id = f"{game_date}_{away_team_abbr}_at_{home_team_abbr}"
+    game_data = {'game_id': game_id, 'date': int(game_date), 'home_team': home_team_abbr, 'away_team': away_team_abbr}
+
+    # DNP：新版 Inactive 區塊，找不到時才看註解中的舊版表格
+    home_dnp_names = []
+    away_dnp_names = []
+    inactive_div = _find_by_string(root, 'div', r'Inactive:')
+    if inactive_div is not None:
+        home_dnp_names = _inactive_names(inactive_div, home_team_abbr)
+        away_dnp_names = _inactive_names(inactive_div, away_team_abbr)
+    if not home_dnp_names and not away_dnp_names:
+        home_dnp_names = _commented_dnp(root, home_team_abbr)
+        away_dnp_names = _commented_dnp(root, away_team_abbr)
+
+    game_data['home_dnp'] = ', '.join(home_dnp_names)
+    game_data['away_dnp'] = ', '.join(away_dnp_names)
+
+    home_table = _first(root, f"//table[@id='box-{home_team_abbr}-game-basic']")
+    away_table = _first(root, f"//table[@id='box-{away_team_abbr}-game-basic']")
+    _team_totals(home_table, 'home', game_data)
+    _team_totals(away_table, 'away', game_data)
+
+    player_gmsc_list = []
+    _players(home_table, home_team_abbr, game_date, player_gmsc_list)
+    _players(away_table, away_team_abbr, game_date, player_gmsc_list)
+    return game_data, player_gmsc_list
@@ -0,0 +1,168 @@
+"""
+【v900 - 管線建置快取 (Build Cache)】
+類似 make 的增量建置：
+- 指紋 (fingerprint) = 階段程式碼 (含遞迴 import 的專案內模組) + 呼叫參數
+  + 所有輸入檔案/DataFrame 的內容雜湊 + 設定檔 (config) 與環境變數 (env)
+- 階段成功後，把輸出 (記憶體中的 DataFrame 與硬碟檔案) 存入 .pipeline_cache/ 並寫入 manifest
+- 下次執行時若指紋相同，直接還原輸出並跳過該階段
+"""
+import ast
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import pandas as pd
+import data_store
+
+CACHE_DIR = ".pipeline_cache"
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")
+
+
+def _hash_file(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _hash_frame(df):
+    h = hashlib.sha1()
+    h.update(str(list(df.columns)).encode('utf-8'))
+    h.update(str(list(df.dtypes.astype(str))).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def _hash_input(pattern):
+    """輸入可能在記憶體中 (優先) 或硬碟上，也可能是萬用字元"""
+    frames = data_store.export_frames([pattern])
+    if frames:
+        return {key: _hash_frame(df) for key, df in sorted(frames.items())}
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        return {pattern: 'missing'}
+    return {path: _hash_file(path) for path in paths}
+
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _module_path(name):
+    """專案內模組的檔案路徑 (第三方套件 / 標準函式庫 / 找不到時回傳 None)"""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if not spec or not spec.origin or not os.path.exists(spec.origin):
+        return None
+    path = os.path.abspath(spec.origin)
+    return path if os.path.dirname(path) == PROJECT_DIR else None
+
+
+def code_dependencies(module):
+    """階段模組與它遞迴 import 的所有專案內模組 (排序後的檔案路徑)"""
+    seen = {}
+    stack = [module]
+    while stack:
+        name = stack.pop()
+        path = _module_path(name)
+        if path is None or path in seen.values():
+            continue
+        seen[name] = path
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                stack.extend(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                stack.append(node.module.split('.')[0])
+    return sorted(seen.values())
+
+
+def stage_fingerprint(stage):
+    """計算階段指紋：程式碼 (含專案內相依模組) + 參數 + 輸入內容 + 設定檔 + 環境變數"""
+    h = hashlib.sha1()
+    for path in code_dependencies(stage['module']):
+        h.update(f"{os.path.basename(path)}:{_hash_file(path)}".encode('utf-8'))
+    h.update(f"{stage['func']}{stage.get('args', ())}".encode('utf-8'))
+    for pattern in stage['inputs'] + stage.get('config', []):
+        h.update(json.dumps(_hash_input(pattern), sort_keys=True).encode('utf-8'))
+    env = {name: os.environ.get(name) for name in stage.get('env', [])}
+    h.update(json.dumps(env, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def _artifact_path(module, output, kind):
+    suffix = '.pkl' if kind == 'frame' else '.file'
+    return os.path.join(CACHE_DIR, module, os.path.basename(output) + suffix)
+
+
+def record(manifest, stage, fingerprint):
+    """階段成功後：把輸出存入快取並更新 manifest"""
+    module = stage['module']
+    os.makedirs(os.path.join(CACHE_DIR, module), exist_ok=True)
+    outputs = {}
+    for output in stage['outputs']:
+        entry = {}
+        frames = data_store.export_frames([output])
+        key = os.path.normpath(output)
+        if key in frames:
+            path = _artifact_path(module, output, 'frame')
+            pd.to_pickle(frames[key], path)
+            entry['frame'] = path
+        if os.path.exists(output):
+            path = _artifact_path(module, output, 'file')
+            shutil.copyfile(output, path)
+            entry['file'] = path
+            entry['file_hash'] = _hash_file(output)
+        if not entry:
+            # 宣告的輸出沒有產生 (例如階段內部提早 return)，不快取
+            manifest.pop(module, None)
+            return False
+        outputs[output] = entry
+    manifest[module] = {'fingerprint': fingerprint, 'outputs': outputs}
+    return True
+
+
+def restore(manifest, stage, fingerprint):
+    """
+    若指紋相符，還原所有輸出並回傳 True。
+    記憶體輸出載入 data_store；硬碟輸出若遺失或被改動，從快取複製回來。
+    """
+    entry = manifest.get(stage['module'])
+    if not entry or entry.get('fingerprint') != fingerprint:
+        return False
+    outputs = entry.get('outputs', {})
+    if set(outputs) != set(stage['outputs']):
+        return False
+    for artifact in outputs.values():
+        for kind in ('frame', 'file'):
+            if kind in artifact and not os.path.exists(artifact[kind]):
+                return False
+
+    for output, artifact in outputs.items():
+        if 'frame' in artifact:
+            data_store.import_frames({os.path.normpath(output): pd.read_pickle(artifact['frame'])})
+        if 'file' in artifact:
+            if not os.path.exists(output) or _hash_file(output) != artifact['file_hash']:
+                shutil.copyfile(artifact['file'], output)
+    return True
@@ -0,0 +1,78 @@
+"""
+【v900 - v53 進階數據回歸檢查】
+比較 v1_update_v53 的向量化累積平均與原本「逐組 expanding().mean() + .loc 回寫」的寫法：
+1. 兩者的 v1_adv_stats_v53 輸出必須完全相同 (check_exact)
+2. 列出兩種寫法的計算時間與整個階段的執行時間
+
+用法:
+  python check_adv_stats_v53.py                  # 與原本寫法即時比對
+  python check_adv_stats_v53.py old_output.csv   # 另外與舊版產生的 v1_adv_stats_v53.csv 比對
+"""
+import io
+import sys
+import time
+import numpy as np
+import pandas as pd
+import data_store
+from v1_update_v53 import ADV_STATS_COLS, add_before_game_averages, update_team_advanced_stats_v53
+
+OUTPUT_FILE = "v1_adv_stats_v53.csv"
+
+
+def legacy_before_game_averages(team_game_df, adv_stats_cols=ADV_STATS_COLS):
+    """原本的寫法 (v53)"""
+    new_col_names = [f'Before_Game_Avg_{col}' for col in adv_stats_cols]
+
+    for col in new_col_names:
+        team_game_df[col] = np.nan
+
+    groups = team_game_df.groupby(['season_year', 'team'])
+    for name, group in groups:
+        expanding_mean = group[adv_stats_cols].expanding().mean()
+        before_game_avg = expanding_mean.shift(1)
+        group_indices = group.index
+        team_game_df.loc[group_indices, new_col_names] = before_game_avg.values
+
+    team_game_df[new_col_names] = team_game_df[new_col_names].fillna(0)
+    return team_game_df
+
+
+def main():
+    data_store.configure(in_memory=True)
+    start = time.perf_counter()
+    update_team_advanced_stats_v53()
+    t_stage = time.perf_counter() - start
+    if not data_store.exists(OUTPUT_FILE):
+        return
+    output = data_store.read_csv(OUTPUT_FILE)
+
+    # 用同一份重塑後的資料分別跑兩種寫法
+    base = output.drop(columns=[f'Before_Game_Avg_{col}' for col in ADV_STATS_COLS])
+    start = time.perf_counter()
+    legacy = legacy_before_game_averages(base.copy())
+    t_legacy = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = add_before_game_averages(base.copy())
+    t_fast = time.perf_counter() - start
+
+    print("\n--- v53 累積平均回歸檢查 ---")
+    print(f"逐組迴圈: {t_legacy * 1000:.0f} ms | 向量化: {t_fast * 1000:.0f} ms ({t_legacy / t_fast:.0f}x)")
+    print(f"整個階段 (讀取 + 計算，不含寫檔): {t_stage * 1000:.0f} ms")
+
+    checks = [("原本寫法", legacy, fast), ("階段輸出", legacy, output)]
+    if len(sys.argv) > 1:
+        # 舊檔是 CSV：目前的輸出也先經過一次 CSV 轉換再比
+        checks.append((sys.argv[1], pd.read_csv(sys.argv[1]), pd.read_csv(io.StringIO(output.to_csv(index=False)))))
+    ok = True
+    for label, expected, actual in checks:
+        try:
+            pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True), check_exact=True)
+            print(f"與{label}: 一致")
+        except AssertionError as e:
+            ok = False
+            print(f"與{label}: 不一致\n{e}")
+    print("全部一致。" if ok else "[!] 輸出有差異")
+
+
+if __name__ == "__main__":
+    main()
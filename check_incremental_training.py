@@ -0,0 +1,128 @@
+"""
+【v900 - 增量訓練回歸檢查】
+逐日重播 2026 賽季的前 N 個比賽日。每一天都和正式流程一樣，從原始比賽資料與球員累積 GmSc
+完整重建主資料表 (v200data_process9)，舊比賽的特徵因此會隨著新資料變動 (例如傷病影響使用整季平均 GmSc)。
+比較兩種每日訓練方式對當天比賽的預測：
+1. 每日完整重訓
+2. model_registry.incremental_update：沿用前一天的模型追加少量的樹，定期 / 漂移時才完整重訓
+列出兩者的準確率、log loss、每日訓練時間與增量更新實際執行的天數；
+兩者準確率的差距 (不論正負) 需在 INCREMENTAL_DEFAULTS['tolerance'] (可由 model_config.json 覆寫) 之內。
+只回報通過 / 未通過，不修改 model_config.json，也不讀寫 models/。
+
+用法:
+  python check_incremental_training.py [--days N] [--engine rf|hist_gb]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, log_loss
+import data_store
+import master_schema
+import model_registry
+from feature_builder import FEATURE_COLUMNS
+from v200data_process9 import build_team_games, player_avg_gmsc_by_season, compute_team_features, assemble_final_dataset
+
+RAW_GAMES = "nba_game_data_raw_v52_PATCHED.csv"
+PLAYER_CUMULATIVE = "nba_player_cumulative_gmsc_v108.csv"
+HOLDOUT_SEASON = 2026
+DAYS = 30
+
+
+def rebuild_master(df_games, df_player, day):
+    """只用 day (含) 之前的原始資料重建主資料表 (與每天的 v200data_process9 相同)"""
+    games = df_games[df_games['date'] <= int(day.strftime('%Y%m%d'))]
+    players = df_player[pd.to_datetime(df_player['Date']) <= day]
+    df = assemble_final_dataset(compute_team_features(build_team_games(games), player_avg_gmsc_by_season(players)))
+    df = master_schema.apply_master_schema(df.loc[:, ~df.columns.duplicated()])
+    return df[FEATURE_COLUMNS + ['game_id', 'date', 'Win']].fillna(0)
+
+
+def replay(df_games, df_player, days, engine, params, config):
+    """
+    回傳 (完整重訓機率, 增量更新機率, 實際 y, 完整重訓秒數, 增量秒數, 增量模式的完整重訓原因清單)。
+    訓練資料 = 當天重建的主資料表中當天以前的列 (保留原本依球隊排序的列順序)，測試資料 = 當天的比賽。
+    """
+    fp_params = model_registry.fingerprint_params(engine, params)
+    full_parts, inc_parts, y_parts = [], [], []
+    full_seconds, inc_seconds, refits = [], [], []
+    artifact = None
+    for day in days:
+        df = rebuild_master(df_games, df_player, day)
+        dates = pd.to_datetime(df['date'])
+        train, test = (dates < day).values, (dates == day).values
+        X_train, y_train = df.loc[train, FEATURE_COLUMNS], df.loc[train, 'Win']
+        dates_train, keys_train = dates[train], df.loc[train, 'game_id']
+        fingerprint = model_registry.training_fingerprint(X_train, y_train, FEATURE_COLUMNS, fp_params)
+
+        start = time.perf_counter()
+        full = model_registry.train_artifact(X_train, y_train, FEATURE_COLUMNS, engine, params, fingerprint,
+                                             dates_train, keys_train)
+        full_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reason = "第一天"
+        if artifact is not None:
+            updated, reason = model_registry.incremental_update(artifact, X_train, y_train, FEATURE_COLUMNS,
+                                                                fingerprint, config, dates_train, keys_train)
+        if artifact is None or updated is None:
+            refits.append(reason)
+            print(f"  {day.strftime('%Y-%m-%d')}: 完整重訓 ({reason})")
+            updated = full
+        else:
+            inc_seconds.append(time.perf_counter() - start)
+        artifact = updated
+
+        X_test = df.loc[test, FEATURE_COLUMNS]
+        for parts, trained in ((full_parts, full), (inc_parts, artifact)):
+            parts.append(trained['model'].predict_proba(trained['scaler'].transform(X_test))[:, 1])
+        y_parts.append(df.loc[test, 'Win'].astype(int).values)
+    return (np.concatenate(full_parts), np.concatenate(inc_parts), np.concatenate(y_parts),
+            full_seconds, inc_seconds, refits)
+
+
+def main():
+    days_n = int(sys.argv[sys.argv.index('--days') + 1]) if '--days' in sys.argv else DAYS
+    engine = sys.argv[sys.argv.index('--engine') + 1] if '--engine' in sys.argv else None
+    engine, params = model_registry.resolve_model_config(engine)
+    if engine not in model_registry.WARM_START_PARAMS:
+        print(f"錯誤: {engine} 不支援增量更新 (可用: {', '.join(model_registry.WARM_START_PARAMS)})")
+        return
+    if not data_store.exists(RAW_GAMES) or not data_store.exists(PLAYER_CUMULATIVE):
+        print("錯誤: 找不到輸入檔案 (需要原始比賽資料與球員累積 GmSc)。")
+        return
+    # 即使目前已關閉增量模式，也照樣重播增量更新來比對
+    config = dict(model_registry.load_incremental_config(), enabled=True)
+
+    df_games = data_store.read_csv(RAW_GAMES)
+    df_player = data_store.read_csv(PLAYER_CUMULATIVE)
+    game_dates = pd.to_datetime(df_games['date'].astype(str), format='%Y%m%d')
+    season = game_dates.dt.year + (game_dates.dt.month >= 10)
+    days = [pd.Timestamp(d) for d in sorted(game_dates[season == HOLDOUT_SEASON].unique())[:days_n]]
+    if not days:
+        print(f"錯誤: 找不到 {HOLDOUT_SEASON} 賽季數據")
+        return
+
+    print(f"--- 增量訓練 vs 每日完整重訓 ({engine}, {len(days)} 個比賽日，每天重建主資料表) ---")
+    full_proba, inc_proba, y_test, full_s, inc_s, refits = replay(df_games, df_player, days, engine, params, config)
+
+    full_acc = accuracy_score(y_test, full_proba >= 0.5)
+    inc_acc = accuracy_score(y_test, inc_proba >= 0.5)
+    print(f"\n{'方式':<10} | {'準確率':>6} | {'log loss':>8} | 每日訓練")
+    print(f"{'完整重訓':<10} | {full_acc:>6.1%} | {log_loss(y_test, full_proba, labels=[0, 1]):>8.4f} | "
+          f"中位數 {np.median(full_s):.2f}s")
+    inc_time = f"中位數 {np.median(inc_s):.2f}s" if inc_s else "-"
+    print(f"{'增量更新':<10} | {inc_acc:>6.1%} | {log_loss(y_test, inc_proba, labels=[0, 1]):>8.4f} | "
+          f"{inc_time} (增量 {len(inc_s)} 天, 完整重訓 {len(refits)} 天)")
+    if not inc_s:
+        print("[!] 增量更新一次都沒有執行 (每天都退回完整重訓)")
+        return
+    gap = full_acc - inc_acc
+    if abs(gap) <= config['tolerance']:
+        print(f"準確率差距 {gap:+.1%}，在容許範圍 ±{config['tolerance']:.1%} 之內。通過。")
+    else:
+        print(f"[!] 準確率差距 {gap:+.1%} 超過容許範圍 ±{config['tolerance']:.1%}。未通過。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+【v900 - 管線 DAG 相依檢查】
+檢查 pipeline_engine.build_dag 算出的前置階段：
+1. 預測與分析階段 (v500 / v501 / v600 / v800) 的相依集合與下方 EXPECTED_DEPS 完全相同
+2. 回測報表 predictions_2026_full_report.csv 只被 plot_accuracy 讀取，
+   每日預測的 predictions_YYYY-MM-DD.csv 樣式不能連到它
+不執行任何階段。
+
+用法:
+  python check_pipeline_dag.py
+"""
+import pipeline_engine
+
+SCRAPERS = {'v300_get_links', 'v300_parse_data_incremental', 'v400_get_current_injuries'}
+
+# 每個階段應有的前置階段 (共用 .http_cache 的爬蟲階段也要依序執行)
+EXPECTED_DEPS = {
+    'v500_export_predictions': SCRAPERS | {'v200_gmsc_cumulative', 'v200data_process9'},
+    'v501_get_odds_for_prediction': SCRAPERS | {'v500_export_predictions', 'matchup_matrix'},
+    'v600_merge_analysis': {'v500_export_predictions', 'v501_get_odds_for_prediction'},
+    'v800_value_analyzer': {'v500_export_predictions', 'v501_get_odds_for_prediction'},
+}
+REPORT_STAGE = 'predictions_2026_full_report'
+
+
+def main():
+    stages = pipeline_engine.PIPELINE_STAGES
+    names = [stage['module'] for stage in stages]
+    deps = {names[i]: {names[j] for j in stage_deps}
+            for i, stage_deps in enumerate(pipeline_engine.build_dag(stages))}
+
+    print("--- 管線 DAG 相依檢查 ---")
+    ok = True
+    for name, expected in EXPECTED_DEPS.items():
+        try:
+            assert deps[name] == expected, (f"多出: {sorted(deps[name] - expected)}，"
+                                            f"缺少: {sorted(expected - deps[name])}")
+            print(f"{name}: 一致 ({len(expected)} 個前置階段)")
+        except AssertionError as e:
+            ok = False
+            print(f"{name}: 不一致 ({e})")
+
+    readers = sorted(name for name, stage_deps in deps.items() if REPORT_STAGE in stage_deps)
+    try:
+        assert readers == ['plot_accuracy'], f"依賴 {REPORT_STAGE} 的階段: {readers}"
+        print(f"{REPORT_STAGE}: 只有 plot_accuracy 依賴")
+    except AssertionError as e:
+        ok = False
+        print(f"{REPORT_STAGE}: 不一致 ({e})")
+    print("全部一致。" if ok else "[!] DAG 相依有差異")
+
+
+if __name__ == "__main__":
+    main()
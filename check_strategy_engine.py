@@ -0,0 +1,153 @@
+"""
+【v900 - 向量化策略引擎回歸檢查】
+比較 strategy_engine 與原本 v600 / v800 逐列 df.apply 的寫法：
+1. EV_Home / EV_Away 必須完全相同 (check_exact)
+2. Bet_Signal 字串必須完全相同
+測試資料：歷史報告 (final_analysis_report*.csv) 的勝率與賠率，
+再加上一組涵蓋所有區間 (含缺賠率) 的隨機資料，並列出兩種寫法的計算時間。
+
+用法:
+  python check_strategy_engine.py
+"""
+import time
+import numpy as np
+import pandas as pd
+import data_store
+import strategy_engine
+
+HISTORY_FILES = ["final_analysis_report.csv", "final_analysis_report_v800.csv"]
+SYNTHETIC_ROWS = 20000
+
+
+def legacy_calculate_ev(row):
+    """原本的寫法 (v600 / v800)"""
+    hp = row.get('Home_Win_Prob', row.get('Predicted_Prob_Win (1)', 0.5))
+    ap = 1.0 - hp
+    try:
+        ho = float(row.get('Odds_Home', np.nan))
+    except: ho = np.nan
+    try:
+        ao = float(row.get('Odds_Away', np.nan))
+    except: ao = np.nan
+    if pd.notna(ho): ev_home = (hp * ho) - 1
+    else: ev_home = np.nan
+    if pd.notna(ao): ev_away = (ap * ao) - 1
+    else: ev_away = np.nan
+    return ev_home, ev_away
+
+
+def legacy_get_signal(row):
+    """原本的寫法 (v600)"""
+    hp = row.get('Home_Win_Prob', row.get('Predicted_Prob_Win (1)'))
+    eh = row['EV_Home']
+    ea = row['EV_Away']
+    if pd.isna(eh) or pd.isna(ea): return "無賠率"
+    res = []
+    if eh > 0:
+        star = "★" if eh > 0.1 else ""
+        conf = "🔥" if hp >= 0.65 else ""
+        res.append(f"主EV={eh:.2f}{star}{conf}")
+    if ea > 0:
+        star = "★" if ea > 0.1 else ""
+        conf = "🔥" if hp <= 0.35 else ""
+        res.append(f"客EV={ea:.2f}{star}{conf}")
+    return " | ".join(res) if res else "觀望"
+
+
+def legacy_get_v800_signal(row):
+    """原本的寫法 (v800.2)"""
+    hp = row.get('Home_Win_Prob', row.get('Predicted_Prob_Win (1)'))
+    eh = row['EV_Home']
+    ea = row['EV_Away']
+    if pd.isna(eh) or pd.isna(ea): return "無賠率"
+    signal = []
+    if 0.70 <= hp < 0.90:
+        if eh > 0:
+            conf = "🔥" if eh > 0.1 else ""
+            signal.append(f"BET HOME (Solid) EV={eh:.2f}{conf}")
+        else:
+            signal.append(f"HOME (Parlay) Win={hp:.0%}")
+    elif 0.20 <= hp < 0.30:
+        if ea > 0:
+            conf = "🔥" if ea > 0.1 else ""
+            signal.append(f"BET AWAY (Sniper) EV={ea:.2f}{conf}")
+        else:
+            signal.append(f"AWAY (Parlay) Win={1-hp:.0%}")
+    elif 0.50 <= hp < 0.60:
+        adjusted_hp = hp + 0.08
+        adjusted_ev_h = (adjusted_hp * float(row.get('Odds_Home', 0))) - 1
+        if adjusted_ev_h > 0:
+            signal.append(f"BET HOME (Value) AdjEV={adjusted_ev_h:.2f}💎")
+    elif hp >= 0.90:
+        if eh > 0.05: signal.append(f"BET HOME (Lock) EV={eh:.2f}")
+        else: signal.append(f"PASS (Too Low Odds)")
+    elif hp < 0.20:
+        if ea > 0.05: signal.append(f"BET AWAY (Lock) EV={ea:.2f}")
+        else: signal.append(f"PASS (Too Low Odds)")
+    else:
+        if eh > 0.15: signal.append(f"主EV高={eh:.2f} (Risky)")
+        if ea > 0.15: signal.append(f"客EV高={ea:.2f} (Risky)")
+    return " | ".join(signal) if signal else "觀望"
+
+
+def legacy(df, signal_func):
+    df = df.copy()
+    ev_results = df.apply(legacy_calculate_ev, axis=1, result_type='expand')
+    df['EV_Home'] = ev_results[0]
+    df['EV_Away'] = ev_results[1]
+    df['Bet_Signal'] = df.apply(signal_func, axis=1)
+    return df[['EV_Home', 'EV_Away', 'Bet_Signal']]
+
+
+def engine(df, version):
+    ev_home, ev_away = strategy_engine.compute_ev(df)
+    hp = strategy_engine.home_win_prob(df)
+    if version == 'v600':
+        signals = strategy_engine.render_v600_signals(strategy_engine.v600_decisions(hp, ev_home, ev_away))
+    else:
+        decisions = strategy_engine.v800_decisions(hp, ev_home, ev_away, strategy_engine.numeric_column(df, 'Odds_Home'))
+        signals = strategy_engine.render_v800_signals(decisions)
+    return pd.DataFrame({'EV_Home': ev_home, 'EV_Away': ev_away, 'Bet_Signal': signals}, index=df.index)
+
+
+def synthetic_games(n):
+    """勝率涵蓋 0~1 (含各區邊界)，賠率 1.01~6 並有約 10% 缺值"""
+    rng = np.random.default_rng(0)
+    hp = np.round(rng.uniform(0, 1, n), 2)
+    odds_home = np.round(rng.uniform(1.01, 6.0, n), 2)
+    odds_away = np.round(rng.uniform(1.01, 6.0, n), 2)
+    odds_home[rng.random(n) < 0.1] = np.nan
+    odds_away[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({'Home_Win_Prob': hp, 'Odds_Home': odds_home, 'Odds_Away': odds_away})
+
+
+def main():
+    datasets = [(f, data_store.read_csv(f)) for f in HISTORY_FILES if data_store.exists(f)]
+    datasets.append((f"隨機 {SYNTHETIC_ROWS} 場", synthetic_games(SYNTHETIC_ROWS)))
+
+    print(f"{'資料':<34} | {'版本':<4} | {'逐列 (ms)':>9} | {'向量化 (ms)':>11} | {'加速':>7} | 輸出一致")
+    print("-" * 90)
+    ok = True
+    for label, df in datasets:
+        df = df[[c for c in ['Home_Win_Prob', 'Odds_Home', 'Odds_Away'] if c in df.columns]]
+        for version, signal_func in [('v600', legacy_get_signal), ('v800', legacy_get_v800_signal)]:
+            start = time.perf_counter()
+            expected = legacy(df, signal_func)
+            t_old = time.perf_counter() - start
+            start = time.perf_counter()
+            actual = engine(df, version)
+            t_new = time.perf_counter() - start
+            try:
+                pd.testing.assert_frame_equal(expected, actual, check_exact=True, check_dtype=False)
+                same = True
+            except AssertionError as e:
+                print(e)
+                same = False
+            ok = ok and same
+            print(f"{label:<34} | {version:<4} | {t_old * 1000:>9.1f} | {t_new * 1000:>11.1f} | "
+                  f"{t_old / t_new:>6.1f}x | {'V' if same else 'X'}")
+    print("全部一致。" if ok else "[!] 向量化結果與原本寫法不一致")
+
+
+if __name__ == "__main__":
+    main()
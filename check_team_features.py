@@ -0,0 +1,209 @@
+"""
+【v900 - v108 特徵拆分回歸檢查】
+1. v200data_process9 拆成 build_team_games / compute_team_features / assemble_final_dataset 後，
+   輸出必須與原本一整段寫在 create_final_dataset_v108 裡的版本完全相同 (check_exact)
+   (滾動視窗與主客場累積的參考寫法已改為逐組計算)
+2. 只用前面的比賽重算一次：之後新增比賽不能改變之前每一場的特徵
+   (球員平均 GmSc 表兩次相同；該表每天更新造成的傷病影響變動不在此檢查範圍)
+
+用法:
+  python check_team_features.py [--days N]   # 第 2 項移除最後 N 個比賽日 (預設 30)
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+import data_store
+from v200data_process9 import build_team_games, player_avg_gmsc_by_season, compute_team_features, assemble_final_dataset
+
+RAW_GAMES = "nba_game_data_raw_v52_PATCHED.csv"
+PLAYER_CUMULATIVE = "nba_player_cumulative_gmsc_v108.csv"
+DAYS = 30
+
+
+def legacy_final_dataset(df_games, df_player):
+    """原本的寫法 (v108，去掉讀寫檔)"""
+    df_games['date'] = df_games['date'].astype(str)
+    df_games['game_date'] = pd.to_datetime(df_games['date'], format='%Y%m%d')
+    df_games['Season_Year'] = df_games['game_date'].apply(lambda x: x.year + 1 if x.month >= 10 else x.year)
+
+    df_games['home_win'] = (df_games['home_pts'] > df_games['away_pts']).astype(int)
+    df_games['home_margin'] = df_games['home_pts'] - df_games['away_pts']
+    df_games['away_margin'] = -df_games['home_margin']
+
+    home_df = df_games[['game_id', 'game_date', 'Season_Year', 'home_team', 'away_team', 'home_pts', 'away_pts', 'home_win', 'home_margin', 'home_dnp']].copy()
+    home_df.columns = ['game_id', 'date', 'Season_Year', 'team', 'opponent', 'pts', 'opp_pts', 'win', 'margin', 'dnp']
+    home_df['location'] = 'Home'
+
+    away_df = df_games[['game_id', 'game_date', 'Season_Year', 'away_team', 'home_team', 'away_pts', 'home_pts', 'home_win', 'away_margin', 'away_dnp']].copy()
+    away_df['win'] = 1 - away_df['home_win']
+    away_df = away_df.drop(columns=['home_win'])
+    away_df.columns = ['game_id', 'date', 'Season_Year', 'team', 'opponent', 'pts', 'opp_pts', 'margin', 'dnp', 'win']
+    away_df['location'] = 'Away'
+
+    df_team_games = pd.concat([home_df, away_df], ignore_index=True)
+    df_team_games = df_team_games.sort_values(by=['team', 'date']).reset_index(drop=True)
+
+    df_team_games['win_cumsum'] = df_team_games.groupby(['Season_Year', 'team'])['win'].cumsum()
+    df_team_games['games_played'] = df_team_games.groupby(['Season_Year', 'team']).cumcount() + 1
+    df_team_games['Before_Game_Win_Pct'] = df_team_games.groupby(['Season_Year', 'team'])['win_cumsum'].shift(1) / df_team_games.groupby(['Season_Year', 'team'])['games_played'].shift(1)
+    df_team_games['Before_Game_Win_Pct'] = df_team_games['Before_Game_Win_Pct'].fillna(0.0)
+
+    df_team_games['Before_Game_Total_Games'] = df_team_games.groupby(['Season_Year', 'team'])['games_played'].shift(1).fillna(0)
+
+    df_team_games['margin_cumsum'] = df_team_games.groupby(['Season_Year', 'team'])['margin'].cumsum()
+    df_team_games['Before_Game_Avg_Margin'] = df_team_games.groupby(['Season_Year', 'team'])['margin_cumsum'].shift(1) / df_team_games.groupby(['Season_Year', 'team'])['games_played'].shift(1)
+    df_team_games['Before_Game_Avg_Margin'] = df_team_games['Before_Game_Avg_Margin'].fillna(0.0)
+
+    df_team_games['win_home'] = np.where(df_team_games['location'] == 'Home', df_team_games['win'], 0)
+    df_team_games['games_home'] = np.where(df_team_games['location'] == 'Home', 1, 0)
+    df_team_games['win_away'] = np.where(df_team_games['location'] == 'Away', df_team_games['win'], 0)
+    df_team_games['games_away'] = np.where(df_team_games['location'] == 'Away', 1, 0)
+
+    # 主客場累積與滾動視窗：原本在整張表上 shift / rolling，這裡改成逐組計算 (與 compute_team_features 的修正相同)
+    def before_cumsum(col):
+        return df_team_games.groupby(['Season_Year', 'team'])[col].transform(lambda s: s.cumsum().shift(1))
+    df_team_games['Before_Home_Win_Pct'] = before_cumsum('win_home') / before_cumsum('games_home')
+    df_team_games['Before_Away_Win_Pct'] = before_cumsum('win_away') / before_cumsum('games_away')
+    df_team_games['Before_Home_Win_Pct'] = df_team_games['Before_Home_Win_Pct'].fillna(0.0)
+    df_team_games['Before_Away_Win_Pct'] = df_team_games['Before_Away_Win_Pct'].fillna(0.0)
+
+    def last_n(keys, col, n):
+        return df_team_games.groupby(keys)[col].transform(lambda s: s.shift(1).rolling(n, min_periods=1).mean())
+    df_team_games['Before_Game_Win_Pct_Last_5'] = last_n(['Season_Year', 'team'], 'win', 5).fillna(0.0)
+    df_team_games['Before_Game_Win_Pct_Last_10'] = last_n(['Season_Year', 'team'], 'win', 10).fillna(0.0)
+    df_team_games['Before_Game_Avg_Margin_Last_5'] = last_n(['Season_Year', 'team'], 'margin', 5).fillna(0.0)
+
+    def calculate_streak(series):
+        streaks = []
+        current_streak = 0
+        for result in series:
+            streaks.append(current_streak)
+            if result == 1: current_streak = current_streak + 1 if current_streak > 0 else 1
+            else: current_streak = current_streak - 1 if current_streak < 0 else -1
+        return pd.Series(streaks, index=series.index)
+    df_team_games['Before_Game_Streak'] = df_team_games.groupby(['Season_Year', 'team'])['win'].apply(calculate_streak).reset_index(level=[0,1], drop=True)
+
+    df_team_games['date'] = pd.to_datetime(df_team_games['date'])
+    df_team_games['prev_date'] = df_team_games.groupby(['Season_Year', 'team'])['date'].shift(1)
+    df_team_games['Days_Since_Last_Game'] = (df_team_games['date'] - df_team_games['prev_date']).dt.days.fillna(7)
+
+    df_team_games['CS_Win_Pct_L5'] = df_team_games['Before_Game_Win_Pct_Last_5']
+    df_team_games['CS_Avg_Margin_L5'] = df_team_games['Before_Game_Avg_Margin_Last_5']
+
+    df_team_games = df_team_games.sort_values(by=['team', 'opponent', 'date'])
+    df_team_games['Before_Game_H2H_Win_Pct_L5'] = last_n(['team', 'opponent'], 'win', 5).fillna(0.5)
+    df_team_games['Before_Game_H2H_Avg_Margin_L5'] = last_n(['team', 'opponent'], 'margin', 5).fillna(0.0)
+
+    df_player['Date'] = pd.to_datetime(df_player['Date'])
+    df_player = df_player.sort_values(['Player_ID', 'Date'])
+    df_player['games_played'] = df_player.groupby(['Player_ID', 'Season_Year']).cumcount() + 1
+    df_player['Before_Game_Player_Avg_GmSc'] = df_player['Before_Game_Player_GmSc'] / df_player['games_played'].shift(1).fillna(1)
+    df_player['Before_Game_Player_Avg_GmSc'] = df_player['Before_Game_Player_Avg_GmSc'].fillna(0.0)
+
+    avg_gmsc_by_season = df_player.groupby(['Season_Year', 'Player_Name'])['Before_Game_Player_Avg_GmSc'].mean().to_dict()
+
+    def calculate_injury_impact_fast(row):
+        dnp_str = row['dnp']
+        if pd.isna(dnp_str) or dnp_str == "": return 0.0
+        team_avg_gmsc = 80.0
+        dnp_list = [x.strip() for x in str(dnp_str).split(',')]
+        total_missing_gmsc = 0.0
+        season = row['Season_Year']
+        for player_name in dnp_list:
+            key = (season, player_name)
+            if key in avg_gmsc_by_season:
+                total_missing_gmsc += avg_gmsc_by_season[key]
+        return total_missing_gmsc / team_avg_gmsc
+
+    df_team_games['Total_Injury_Impact'] = df_team_games.apply(calculate_injury_impact_fast, axis=1)
+
+    df_home = df_team_games[df_team_games['location'] == 'Home'].copy()
+    df_away = df_team_games[df_team_games['location'] == 'Away'].copy()
+
+    raw_cols = [
+        'Before_Game_Win_Pct', 'Before_Home_Win_Pct', 'Before_Away_Win_Pct',
+        'Before_Game_Avg_Margin', 'Before_Game_Streak',
+        'Before_Game_Win_Pct_Last_5', 'Before_Game_Win_Pct_Last_10',
+        'Before_Game_Avg_Margin_Last_5', 'CS_Win_Pct_L5', 'CS_Avg_Margin_L5',
+        'Before_Game_H2H_Win_Pct_L5', 'Before_Game_H2H_Avg_Margin_L5',
+        'Total_Injury_Impact', 'Days_Since_Last_Game', 'Before_Game_Total_Games'
+    ]
+
+    opp_cols = {col: f"Opp_{col}" for col in raw_cols}
+    opp_cols['team'] = 'Opp_Abbr'
+
+    df_away = df_away.rename(columns=opp_cols)
+
+    df_final = pd.merge(df_home, df_away[['game_id'] + list(opp_cols.values())], on='game_id', how='inner')
+    df_final.rename(columns={'team': 'Team_Abbr', 'opponent': 'Opp_Abbr', 'win': 'Win'}, inplace=True)
+
+    diff_cols = [
+        ('Diff_Before_Home_Win_Pct', 'Before_Home_Win_Pct', 'Opp_Before_Home_Win_Pct'),
+        ('Diff_Before_Away_Win_Pct', 'Before_Away_Win_Pct', 'Opp_Before_Away_Win_Pct'),
+        ('Diff_Days_Since_Last_Game', 'Days_Since_Last_Game', 'Opp_Days_Since_Last_Game'),
+        ('Diff_Before_Game_Streak', 'Before_Game_Streak', 'Opp_Before_Game_Streak'),
+        ('Diff_Before_Game_Win_Pct_Last_5', 'Before_Game_Win_Pct_Last_5', 'Opp_Before_Game_Win_Pct_Last_5'),
+        ('Diff_Before_Game_Avg_Margin_Last_5', 'Before_Game_Avg_Margin_Last_5', 'Opp_Before_Game_Avg_Margin_Last_5'),
+        ('Diff_Before_Game_Win_Pct_Last_10', 'Before_Game_Win_Pct_Last_10', 'Opp_Before_Game_Win_Pct_Last_10'),
+        ('Diff_CS_Win_Pct_L5', 'CS_Win_Pct_L5', 'Opp_CS_Win_Pct_L5'),
+        ('Diff_CS_Avg_Margin_L5', 'CS_Avg_Margin_L5', 'Opp_CS_Avg_Margin_L5'),
+        ('Diff_Before_Game_H2H_Win_Pct_L5', 'Before_Game_H2H_Win_Pct_L5', 'Opp_Before_Game_H2H_Win_Pct_L5'),
+        ('Diff_Before_Game_H2H_Avg_Margin_L5', 'Before_Game_H2H_Avg_Margin_L5', 'Opp_Before_Game_H2H_Avg_Margin_L5'),
+        ('Diff_Total_Injury_Impact', 'Total_Injury_Impact', 'Opp_Total_Injury_Impact')
+    ]
+    for new_col, home_col, opp_col in diff_cols:
+        df_final[new_col] = df_final[home_col] - df_final[opp_col]
+
+    df_final['date'] = df_final['date'].dt.strftime('%Y-%m-%d')
+    return df_final
+
+
+def unique_columns(df):
+    """主客隊合併後有兩個 Opp_Abbr (值相同)，只比對第一個"""
+    return df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+
+
+def main():
+    if not data_store.exists(RAW_GAMES) or not data_store.exists(PLAYER_CUMULATIVE):
+        print("錯誤: 找不到輸入檔案 (需要原始比賽資料與球員累積 GmSc)。")
+        return
+    df_games = data_store.read_csv(RAW_GAMES)
+    df_player = data_store.read_csv(PLAYER_CUMULATIVE)
+
+    start = time.perf_counter()
+    legacy = unique_columns(legacy_final_dataset(df_games.copy(), df_player.copy()))
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_team_games = compute_team_features(build_team_games(df_games), player_avg_gmsc_by_season(df_player))
+    t_features = time.perf_counter() - start
+    start = time.perf_counter()
+    split = unique_columns(assemble_final_dataset(df_team_games))
+    t_assemble = time.perf_counter() - start
+
+    # 移除最後 N 個比賽日重算，之前的比賽應該完全相同
+    days_n = int(sys.argv[sys.argv.index('--days') + 1]) if '--days' in sys.argv else DAYS
+    cutoff = sorted(df_games['date'].unique())[-days_n]
+    earlier = df_games[df_games['date'] < cutoff]
+    prefix = unique_columns(assemble_final_dataset(
+        compute_team_features(build_team_games(earlier), player_avg_gmsc_by_season(df_player))))
+    grown = split[split['game_id'].isin(prefix['game_id'])].set_index('game_id').loc[prefix['game_id']].reset_index()
+
+    print(f"--- v108 特徵拆分回歸檢查 ({len(df_games)} 場) ---")
+    print(f"原本一整段: {t_legacy * 1000:.0f} ms | 拆分後: 特徵 {t_features * 1000:.0f} ms + 組合 {t_assemble * 1000:.0f} ms")
+    checks = [("原本寫法", legacy, split[legacy.columns]),
+              (f"{cutoff} 之前的比賽 (新增 {len(df_games) - len(earlier)} 場後)", prefix, grown[prefix.columns])]
+    ok = True
+    for label, expected, actual in checks:
+        try:
+            pd.testing.assert_frame_equal(expected, actual, check_exact=True)
+            print(f"與{label}: 一致")
+        except AssertionError as e:
+            ok = False
+            print(f"與{label}: 不一致\n{e}")
+    print("全部一致。" if ok else "[!] 輸出有差異")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+【v900 - 管線資料倉庫 (Data Store)】
+所有階段腳本透過這裡讀寫 CSV：
+- 單獨執行腳本時 (預設模式)：行為與 pd.read_csv / to_csv 完全相同。
+- 由 pipeline_engine 執行時 (記憶體模式)：DataFrame 直接在階段之間傳遞，
+  只有被指定為 checkpoint 的檔案才會真正寫入硬碟。
+- 大型資料集 (COLUMNAR_DATASETS) 在 .columnar/ 保有 Parquet 鏡像 (需要 pyarrow)：
+  讀取時只解碼需要的欄位 (usecols) 並可依日期區間過濾 (read_table)。
+  CSV 仍是正本 (給人看、進版控)；CSV 內容變動時鏡像自動失效並在下次讀取時重建。
+  append_csv 追加的列另外寫成一個 Parquet 分段 (.parts/)，不重寫整份鏡像。
+"""
+import os
+import fnmatch
+import hashlib
+import io
+import json
+import shutil
+import pandas as pd
+
+try:
+    import pyarrow.parquet  # noqa: F401 (只用來確認可用)
+    HAS_COLUMNAR = True
+except ImportError:
+    HAS_COLUMNAR = False
+
+COLUMNAR_DIR = ".columnar"
+# 每次 append_csv 在鏡像旁多一個分段；超過此數量時鏡像失效，下次讀取整份重建 (攤提後仍只跟新資料量有關)
+MAX_MIRROR_PARTS = 64
+# 檔名樣式 -> 日期欄位 (read_table 的 start/end 以此欄位過濾)
+COLUMNAR_DATASETS = {
+    'nba_game_data_raw_v52_PATCHED.csv': 'date',
+    'nba_player_single_game_gmsc_v52.csv': 'Date',
+    'nba_player_cumulative_gmsc_v108.csv': 'Date',
+    'FINAL_MASTER_*.csv': 'date',
+    'predictions_2026_full_report.csv': 'date',
+}
+
+_MEMORY = {}
+_WRITTEN = set()
+_STATE = {'in_memory': False, 'checkpoints': []}
+
+
+def _key(path):
+    return os.path.normpath(path)
+
+
+def configure(in_memory=False, checkpoints=None):
+    """設定倉庫模式。checkpoints 為需要落地的檔名 (支援 fnmatch 萬用字元)"""
+    _STATE['in_memory'] = in_memory
+    _STATE['checkpoints'] = list(checkpoints or [])
+
+
+def reset():
+    """清空記憶體中的所有資料並回到預設模式"""
+    _MEMORY.clear()
+    _WRITTEN.clear()
+    configure(in_memory=False)
+
+
+def is_checkpoint(path):
+    name = os.path.basename(path)
+    return any(fnmatch.fnmatch(name, pattern) for pattern in _STATE['checkpoints'])
+
+
+def writes_to_disk(path):
+    """這個檔案寫入時是否會落地 (預設模式或 checkpoint)"""
+    return not _STATE['in_memory'] or is_checkpoint(path)
+
+
+def exists(path):
+    return _key(path) in _MEMORY or os.path.exists(path)
+
+
+def _mangle_duplicate_columns(df):
+    """
+    模擬 pd.read_csv 對重複欄位的處理 (例如第二個 'Opp_Abbr' -> 'Opp_Abbr.1')，
+    確保記憶體傳遞與 CSV 來回讀寫後的欄位名稱一致。
+    """
+    if not df.columns.duplicated().any():
+        return df
+    seen = {}
+    new_cols = []
+    for col in df.columns:
+        if col in seen:
+            seen[col] += 1
+            new_cols.append(f"{col}.{seen[col]}")
+        else:
+            seen[col] = 0
+            new_cols.append(col)
+    df.columns = new_cols
+    return df
+
+
+def read_csv(path, **kwargs):
+    """讀取資料：優先使用記憶體中的版本，其次是 Parquet 鏡像，否則從 CSV 讀取"""
+    key = _key(path)
+    if key in _MEMORY:
+        df = _MEMORY[key].copy()
+        usecols = kwargs.get('usecols')
+        if usecols is not None:
+            df = df[_select_columns(df.columns, usecols)]
+        return df
+    if set(kwargs) <= {'usecols'} and _columnar_date_col(path) is not False:
+        mirror = _columnar_files(path)
+        if mirror:
+            return _read_mirror(mirror, kwargs.get('usecols'))
+    return pd.read_csv(path, **kwargs)
+
+
+def read_table(path, columns=None, start=None, end=None):
+    """
+    讀取大型資料集的部分內容：columns 只取需要的欄位，
+    start/end (含) 依 COLUMNAR_DATASETS 設定的日期欄位過濾 (有 Parquet 鏡像時直接下推到檔案)。
+    """
+    date_col = _columnar_date_col(path) or None
+    if (start is not None or end is not None) and date_col is None:
+        raise ValueError(f"'{path}' 沒有設定日期欄位，無法依日期過濾")
+    read_cols = None
+    if columns is not None:
+        read_cols = list(columns) + ([date_col] if date_col and date_col not in columns else [])
+
+    key = _key(path)
+    mirror = None if key in _MEMORY else _columnar_files(path)
+    if mirror and (start is not None or end is not None):
+        filters = _date_filters(mirror[0], date_col, start, end)
+        df = _read_mirror(mirror, read_cols, filters)
+    else:
+        df = read_csv(path, usecols=read_cols) if read_cols is not None else read_csv(path)
+        if start is not None or end is not None:
+            df = df[_date_mask(df[date_col], start, end)].reset_index(drop=True)
+    if columns is not None:
+        df = df[[c for c in df.columns if c in columns]]
+    return df
+
+
+def _select_columns(columns, usecols):
+    """usecols 可以是欄位清單或 callable (與 pd.read_csv 相同)，依原始欄位順序回傳"""
+    if callable(usecols):
+        return [c for c in columns if usecols(c)]
+    return [c for c in columns if c in usecols]
+
+
+# --- Parquet 鏡像 ---
+def _columnar_date_col(path):
+    """回傳該檔案的日期欄位 (None = 有鏡像但沒有日期欄位)；不是大型資料集時回傳 False"""
+    name = os.path.basename(path)
+    for pattern, date_col in COLUMNAR_DATASETS.items():
+        if fnmatch.fnmatch(name, pattern):
+            return date_col
+    return False
+
+
+def _mirror_paths(path):
+    base = os.path.join(COLUMNAR_DIR, os.path.basename(path))
+    return base + '.parquet', base + '.json'
+
+
+def _parts_dir(path):
+    return os.path.join(COLUMNAR_DIR, os.path.basename(path)) + '.parts'
+
+
+def _part_paths(path, parts):
+    return [os.path.join(_parts_dir(path), f"{i:05d}.parquet") for i in range(1, parts + 1)]
+
+
+def _hash_file(path, start=0, end=None):
+    """檔案 [start, end) 區段的 sha1 (預設整個檔案)"""
+    h = hashlib.sha1()
+    remaining = (os.path.getsize(path) if end is None else end) - start
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def _same_content(path, meta):
+    """
+    CSV 內容是否與鏡像建立時相同。雜湊是分段記錄的 ([結束位置, sha1]，建立時一段、每次追加一段)，
+    追加時只需雜湊新寫入的位元組；舊版 meta 只有整檔 sha1。
+    """
+    segments = meta.get('segments') or ([[meta['size'], meta['sha1']]] if 'sha1' in meta else [])
+    start = 0
+    for end, sha1 in segments:
+        if _hash_file(path, start, end) != sha1:
+            return False
+        start = end
+    return bool(segments) and start == os.path.getsize(path)
+
+
+def _read_meta(path):
+    parquet_path, meta_path = _mirror_paths(path)
+    if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+        return {}
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not all(os.path.exists(part) for part in _part_paths(path, meta.get('parts', 0))):
+        return {}
+    return meta
+
+
+def _columnar_files(path):
+    """
+    回傳可用的 Parquet 鏡像檔案清單 (主檔 + 依序追加的分段)；鏡像不存在或已過期時從 CSV 重建。
+    沒有 pyarrow、不是大型資料集、或轉換失敗時回傳 None (呼叫端改讀 CSV)。
+    """
+    if not HAS_COLUMNAR or _columnar_date_col(path) is False or not os.path.exists(path):
+        return None
+    parquet_path, meta_path = _mirror_paths(path)
+    stat = os.stat(path)
+    meta = _read_meta(path)
+    if meta.get('size') == stat.st_size:
+        files = [parquet_path] + _part_paths(path, meta.get('parts', 0))
+        if meta.get('mtime_ns') == stat.st_mtime_ns:
+            return files
+        # git checkout 等操作會改變 mtime：內容雜湊相同就沿用
+        if _same_content(path, meta):
+            meta['mtime_ns'] = stat.st_mtime_ns
+            _write_meta(meta_path, meta)
+            return files
+    parquet_path = build_mirror(path)
+    return [parquet_path] if parquet_path else None
+
+
+def _write_meta(meta_path, meta):
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def build_mirror(path):
+    """把 CSV 轉成 Parquet 鏡像 (內容與 pd.read_csv 的結果完全相同)，回傳鏡像路徑"""
+    if not HAS_COLUMNAR:
+        return None
+    os.makedirs(COLUMNAR_DIR, exist_ok=True)
+    parquet_path, meta_path = _mirror_paths(path)
+    shutil.rmtree(_parts_dir(path), ignore_errors=True)
+    stat = os.stat(path)
+    sha1 = _hash_file(path)
+    df = pd.read_csv(path)
+    tmp = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+    except Exception as e:
+        # 例如同一欄混雜數字與字串，pyarrow 無法決定型別
+        print(f"  [!] 無法建立 '{path}' 的 Parquet 鏡像，改用 CSV: {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+        return None
+    os.replace(tmp, parquet_path)
+    _write_meta(meta_path, {'source': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                            'segments': [[stat.st_size, sha1]], 'rows': len(df), 'parts': 0})
+    return parquet_path
+
+
+def _read_mirror(files, usecols=None, filters=None):
+    """files = 主檔 + 分段 (依追加順序)，合起來與 CSV 的列順序相同"""
+    source = files[0] if len(files) == 1 else files
+    if usecols is None:
+        return pd.read_parquet(source, filters=filters)
+    # 與 pd.read_csv(usecols=...) 相同：依檔案中的欄位順序回傳
+    import pyarrow.parquet as pq
+    schema_cols = pq.read_schema(files[0]).names
+    if not callable(usecols):
+        missing = [c for c in usecols if c not in schema_cols]
+        if missing:
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+    return pd.read_parquet(source, columns=_select_columns(schema_cols, usecols), filters=filters)
+
+
+def _date_value(bound, integer):
+    """把日期轉成檔案中的表示法：整數 YYYYMMDD 或字串 YYYY-MM-DD"""
+    ts = pd.Timestamp(bound)
+    return int(ts.strftime('%Y%m%d')) if integer else ts.strftime('%Y-%m-%d')
+
+
+def _date_filters(parquet_path, date_col, start, end):
+    import pyarrow.parquet as pq
+    import pyarrow.types as pat
+    integer = pat.is_integer(pq.read_schema(parquet_path).field(date_col).type)
+    filters = []
+    if start is not None: filters.append((date_col, '>=', _date_value(start, integer)))
+    if end is not None: filters.append((date_col, '<=', _date_value(end, integer)))
+    return filters
+
+
+def _date_mask(series, start, end):
+    integer = pd.api.types.is_integer_dtype(series)
+    mask = pd.Series(True, index=series.index)
+    if start is not None: mask &= series >= _date_value(start, integer)
+    if end is not None: mask &= series <= _date_value(end, integer)
+    return mask
+
+
+def write_csv(df, path, **kwargs):
+    """
+    寫入資料。
+    記憶體模式下只保存在倉庫中，除非該檔案被指定為 checkpoint。
+    """
+    kwargs.setdefault('index', False)
+    if _STATE['in_memory']:
+        stored = df.reset_index(drop=True) if not kwargs['index'] else df.reset_index()
+        _MEMORY[_key(path)] = _mangle_duplicate_columns(stored.copy())
+        _WRITTEN.add(_key(path))
+        if not is_checkpoint(path):
+            return
+    df.to_csv(path, **kwargs)
+
+
+def append_csv(df, path):
+    """
+    在檔案尾端追加資料列 (欄位依現有檔案的順序對齊)。
+    成本只跟新資料量有關：硬碟上只寫入新的列，Parquet 鏡像多一個分段，內容雜湊只計算新寫入的位元組。
+    記憶體模式下，倉庫中已有這份資料時一併追加；沒有時不讀全檔 (之後從硬碟讀取)，
+    只有不落地的既有檔案才需要先讀進倉庫。
+    回傳是否有寫入硬碟。
+    """
+    key = _key(path)
+    on_disk = os.path.exists(path)
+    if key in _MEMORY:
+        header = list(_MEMORY[key].columns)
+    elif on_disk:
+        header = list(pd.read_csv(path, nrows=0).columns)
+    else:
+        header = list(df.columns)
+    df = df.reindex(columns=header)
+
+    if _STATE['in_memory'] and (key in _MEMORY or not writes_to_disk(path)):
+        base = _MEMORY[key] if key in _MEMORY else (read_csv(path) if on_disk else None)
+        stored = df.reset_index(drop=True) if base is None else pd.concat([base, df], ignore_index=True)
+        _MEMORY[key] = stored
+        _WRITTEN.add(key)
+    if not writes_to_disk(path):
+        return False
+
+    if not on_disk:
+        df.to_csv(path, index=False)
+        return True
+
+    # 鏡像目前有效才追加分段 (只比對大小與 mtime)；無效的鏡像留給下次讀取時重建
+    meta = _read_meta(path) if HAS_COLUMNAR and _columnar_date_col(path) is not False else {}
+    stat = os.stat(path)
+    fresh = meta.get('size') == stat.st_size and meta.get('mtime_ns') == stat.st_mtime_ns
+
+    text = df.to_csv(header=False, index=False)
+    if stat.st_size > 0:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                text = '\n' + text
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        f.write(text)
+    if fresh:
+        _append_mirror(path, meta, df, text.encode('utf-8'))
+    return True
+
+
+def _append_mirror(path, meta, df, written):
+    """
+    把新的列寫成鏡像的下一個分段。新列先經過 CSV 來回轉換，型別與主檔的 schema 一致
+    (或整欄為空值) 時才追加，否則 (或分段已達 MAX_MIRROR_PARTS) 讓鏡像失效，下次讀取時整份重建。
+    written 是這次寫入 CSV 的位元組，用來記錄新的內容雜湊分段。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    parquet_path, meta_path = _mirror_paths(path)
+    new_rows = pd.read_csv(io.StringIO(df.iloc[:0].to_csv(index=False) + written.decode('utf-8').lstrip('\n')))
+    segments = meta.get('segments') or ([[meta['size'], meta['sha1']]] if 'sha1' in meta else None)
+    parts = meta.get('parts', 0) + 1
+    schema = pq.read_schema(parquet_path)
+    table = pa.Table.from_pandas(new_rows, preserve_index=False)
+    columns = []
+    for field, column in zip(schema, table.columns):
+        # 新列這一欄全是空值 (例如當天沒有 DNP)：read_csv 會推成 float，整份重建時仍是主檔的型別
+        if column.type != field.type and column.null_count == len(column):
+            column = pa.nulls(len(column), type=field.type)
+        columns.append(column)
+    try:
+        table = pa.Table.from_arrays(columns, schema=schema)
+    except (pa.ArrowInvalid, TypeError, ValueError):
+        table = None
+    if table is None or table.schema.names != list(new_rows.columns) or segments is None or parts > MAX_MIRROR_PARTS:
+        os.remove(meta_path)
+        return
+    part_path = _part_paths(path, parts)[-1]
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    tmp = f"{part_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, part_path)
+
+    stat = os.stat(path)
+    _write_meta(meta_path, {'source': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                            'segments': segments + [[stat.st_size, hashlib.sha1(written).hexdigest()]],
+                            'rows': meta.get('rows', 0) + len(new_rows), 'parts': parts})
+
+
+def flush(paths=None):
+    """將記憶體中的資料全部 (或指定的檔案) 寫入硬碟"""
+    written = []
+    for key, df in _MEMORY.items():
+        if paths is not None and key not in {_key(p) for p in paths}:
+            continue
+        df.to_csv(key, index=False)
+        written.append(key)
+    return written
+
+
+def export_frames(patterns):
+    """取出記憶體中符合檔名樣式的 DataFrame (用於傳給其他行程)"""
+    return {key: df for key, df in _MEMORY.items()
+            if any(fnmatch.fnmatch(os.path.basename(key), p) for p in patterns)}
+
+
+def import_frames(frames):
+    """載入其他行程產生的 DataFrame"""
+    _MEMORY.update(frames)
+
+
+def take_written():
+    """回傳自上次呼叫以來寫入的所有 DataFrame，並清除紀錄"""
+    frames = {key: _MEMORY[key] for key in _WRITTEN if key in _MEMORY}
+    _WRITTEN.clear()
+    return frames
@@ -0,0 +1,119 @@
+"""
+【v900 - 共用特徵建構模組 (Feature Builder)】
+v500 與 nba_battle_predictor 共用：
+1. FEATURE_COLUMNS：模型使用的 13 個 Diff 特徵 (順序固定)
+2. build_team_state_index()：一次建立「每隊最近一場比賽後」的狀態表 (O(1) 查詢)
+3. build_feature_matrix()：向量化產生整個賽程 (多場比賽) 的特徵矩陣
+"""
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = [
+    'Diff_Days_Since_Last_Game', 'Diff_Before_Game_Streak',
+    'Diff_Before_Game_Win_Pct_Last_5', 'Diff_Before_Game_Avg_Margin_Last_5',
+    'Diff_Before_Game_Win_Pct_Last_10', 'Diff_CS_Win_Pct_L5', 'Diff_CS_Avg_Margin_L5',
+    'Diff_Before_Game_H2H_Win_Pct_L5', 'Diff_Before_Game_H2H_Avg_Margin_L5',
+    'Diff_Total_Injury_Impact', 'Diff_Before_Game_Avg_NetRtg',
+    'Diff_Before_Game_Avg_TOV_Rate', 'Diff_Before_Game_Avg_ORB_Pct'
+]
+
+# 狀態欄位 -> (主隊視角欄位, 客隊視角欄位, 缺欄位時的預設值)
+STATE_SOURCES = {
+    'Win_Pct_L5': ('Before_Game_Win_Pct_Last_5', 'Opp_Before_Game_Win_Pct_Last_5', 0),
+    'Win_Pct_L10': ('Before_Game_Win_Pct_Last_10', 'Opp_Before_Game_Win_Pct_Last_10', 0),
+    'Margin_L5': ('Before_Game_Avg_Margin_Last_5', 'Opp_Before_Game_Avg_Margin_Last_5', 0),
+    'Streak': ('Before_Game_Streak', 'Opp_Before_Game_Streak', 0),
+    'CS_Win_L5': ('CS_Win_Pct_L5', 'Opp_CS_Win_Pct_L5', 0),
+    'CS_Margin_L5': ('CS_Avg_Margin_L5', 'Opp_CS_Avg_Margin_L5', 0),
+    'H2H_Win': ('Before_Game_H2H_Win_Pct_L5', 'Opp_Before_Game_H2H_Win_Pct_L5', 0.5),
+    'H2H_Margin': ('Before_Game_H2H_Avg_Margin_L5', 'Opp_Before_Game_H2H_Avg_Margin_L5', 0),
+    'NetRtg': ('Before_Game_Avg_NetRtg', 'Opp_Before_Game_Avg_NetRtg', 0),
+    'TOV': ('Before_Game_Avg_TOV_Rate', 'Opp_Before_Game_Avg_TOV_Rate', 0),
+    'ORB': ('Before_Game_Avg_ORB_Pct', 'Opp_Before_Game_Avg_ORB_Pct', 0),
+}
+
+# Diff 特徵 -> 狀態欄位 (休息天數與傷病另外計算)
+DIFF_SOURCES = [
+    ('Diff_Before_Game_Streak', 'Streak'),
+    ('Diff_Before_Game_Win_Pct_Last_5', 'Win_Pct_L5'),
+    ('Diff_Before_Game_Avg_Margin_Last_5', 'Margin_L5'),
+    ('Diff_Before_Game_Win_Pct_Last_10', 'Win_Pct_L10'),
+    ('Diff_CS_Win_Pct_L5', 'CS_Win_L5'),
+    ('Diff_CS_Avg_Margin_L5', 'CS_Margin_L5'),
+    ('Diff_Before_Game_H2H_Win_Pct_L5', 'H2H_Win'),
+    ('Diff_Before_Game_H2H_Avg_Margin_L5', 'H2H_Margin'),
+    ('Diff_Before_Game_Avg_NetRtg', 'NetRtg'),
+    ('Diff_Before_Game_Avg_TOV_Rate', 'TOV'),
+    ('Diff_Before_Game_Avg_ORB_Pct', 'ORB'),
+]
+
+# 預測程式需要從主資料庫讀取的欄位 (data_store.read_csv 的 usecols，其餘欄位不解碼)
+MASTER_COLUMNS = set(
+    FEATURE_COLUMNS + ['game_id', 'date', 'Season_Year', 'Win', 'Team_Abbr', 'Opp_Abbr']
+    + [col for home_col, opp_col, _ in STATE_SOURCES.values() for col in (home_col, opp_col)]
+)
+
+
+def _team_view(df, team_col, side):
+    """把每場比賽轉成某一隊視角的狀態列 (side: 0=主隊欄位, 1=客隊欄位)"""
+    view = pd.DataFrame({'team': df[team_col].values, 'Last_Date': df['date_dt'].values})
+    for state_col, sources in STATE_SOURCES.items():
+        col = sources[side]
+        view[state_col] = df[col].values if col in df.columns else sources[2]
+    # 主隊 Win==1 代表贏；客隊 Win==0 代表贏
+    view['last_win'] = (df['Win'] == (1 if side == 0 else 0)).values
+    return view
+
+
+def build_team_state_index(df, before_date=None):
+    """
+    【每隊最新狀態索引】
+    找出每隊在 before_date 之前的最後一場比賽 (不論主客)，取出該隊視角的賽前數據，
+    並把連勝/連敗紀錄推進到「這場比賽之後」。
+    回傳以球隊代碼為 index 的 DataFrame。
+    """
+    if 'date_dt' not in df.columns:
+        df = df.assign(date_dt=pd.to_datetime(df['date']))
+    if before_date is not None:
+        df = df[df['date_dt'] < before_date]
+
+    long_df = pd.concat([_team_view(df, 'Team_Abbr', 0), _team_view(df, 'Opp_Abbr', 1)], ignore_index=True)
+    long_df = long_df.sort_values('Last_Date', kind='stable')
+    index = long_df.drop_duplicates(subset='team', keep='last').set_index('team')
+
+    streak = index['Streak']
+    index['Streak'] = np.where(
+        index['last_win'],
+        np.where(streak > 0, streak + 1, 1),
+        np.where(streak < 0, streak - 1, -1),
+    )
+    return index.drop(columns=['last_win']).sort_index()
+
+
+def get_team_state(index, team_abbr):
+    """O(1) 查詢單隊狀態 (dict)；沒有資料時回傳 None"""
+    if team_abbr not in index.index:
+        return None
+    return index.loc[team_abbr].to_dict()
+
+
+def build_feature_matrix(index, home_teams, away_teams, target_date, home_impact=0.0, away_impact=0.0):
+    """
+    【向量化特徵矩陣】
+    一次產生多場比賽的 FEATURE_COLUMNS 矩陣。
+    home_impact / away_impact 可以是純量或與比賽數等長的陣列。
+    兩隊都必須存在於 index 中 (呼叫前請先過濾)。
+    """
+    home = index.loc[list(home_teams)]
+    away = index.loc[list(away_teams)]
+    target_date = pd.Timestamp(target_date)
+
+    features = pd.DataFrame(index=range(len(home)))
+    features['Diff_Days_Since_Last_Game'] = (
+        (target_date - pd.to_datetime(home['Last_Date'].values)).days
+        - (target_date - pd.to_datetime(away['Last_Date'].values)).days
+    )
+    for diff_col, state_col in DIFF_SOURCES:
+        features[diff_col] = home[state_col].values - away[state_col].values
+    features['Diff_Total_Injury_Impact'] = np.asarray(home_impact, dtype=float) - np.asarray(away_impact, dtype=float)
+    return features[FEATURE_COLUMNS]
@@ -0,0 +1,223 @@
+"""
+【v900 - 超參數搜尋 (Hyperparameter Search)】
+在 FINAL_MASTER_DATASET_v109_FIXED.csv 上以「依時間排序的 fold」搜尋 RandomForest / HistGradientBoosting / XGBoost 超參數：
+1. fold：最近 VALID_SEASONS 個賽季各為一個驗證 fold，只用該賽季開始之前的比賽訓練
+2. 特徵矩陣只建立一次 (.tuning_cache/<資料指紋>/X.npy, y.npy)，
+   各 worker 以 np.load(mmap_mode='r') 共用同一份記憶體，不必各自複製資料
+3. 先完整評估目前的設定 (model_config.json) 作為基準；其餘 trial 平行執行，
+   每跑完一個 fold 就和基準的累積平均 log loss 比較，差超過 PRUNE_MARGIN 就提前停止
+4. --apply：把 log loss 最低的設定寫入 model_config.json，v500 / 實戰預測器下次執行時依新設定重新訓練
+(樹模型不受標準化影響，搜尋時不套用 StandardScaler)
+
+用法:
+  python hyperparam_search.py [--trials N] [--engine rf|hist_gb|xgboost|all] [--workers N] [--apply]
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, log_loss
+import data_store
+import master_schema
+import model_registry
+from feature_builder import FEATURE_COLUMNS
+
+CACHE_DIR = ".tuning_cache"
+OUTPUT_FILE = "tuning_results.csv"
+VALID_SEASONS = 4
+N_TRIALS = 24
+PRUNE_MARGIN = 0.02
+SEED = 42
+
+SEARCH_SPACES = {
+    'rf': {
+        'n_estimators': [100, 200, 300],
+        'max_depth': [None, 6, 8, 10, 12, 16],
+        'min_samples_leaf': [1, 2, 5, 10, 20, 50],
+        'max_features': ['sqrt', 0.5, 0.8],
+        'max_samples': [None, 0.5, 0.8],
+    },
+    'hist_gb': {
+        'max_iter': [100, 200, 400],
+        'learning_rate': [0.02, 0.05, 0.1],
+        'max_leaf_nodes': [7, 15, 31],
+        'min_samples_leaf': [20, 40, 80],
+        'l2_regularization': [0.0, 1.0, 5.0],
+    },
+    'xgboost': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [2, 3, 4, 6],
+        'learning_rate': [0.02, 0.05, 0.1],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': [1, 5, 10, 20],
+    },
+}
+# 每個 trial 固定的參數 (n_jobs=1：平行度交給 trial 層級，避免超額訂用 CPU)
+FIXED_PARAMS = {
+    'rf': {'random_state': 42, 'n_jobs': 1},
+    'hist_gb': {'random_state': 42, 'early_stopping': False},
+    'xgboost': {'random_state': 42, 'n_jobs': 1, 'eval_metric': 'logloss'},
+}
+
+
+# --- 共用 fold 資料 ---
+def materialize_folds(df, feature_columns=FEATURE_COLUMNS, valid_seasons=VALID_SEASONS):
+    """
+    依日期排序後把特徵矩陣寫成 .npy (已存在就沿用)，回傳資料目錄。
+    folds.json 記錄每個 fold 的 [訓練結束列, 驗證結束列) (訓練集一律從第 0 列開始)。
+    """
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    X = np.ascontiguousarray(df[feature_columns].to_numpy(dtype=np.float32))
+    y = np.ascontiguousarray(df['Win'].to_numpy(dtype=np.int8))
+    seasons = df['Season_Year'].to_numpy()
+
+    h = hashlib.sha1()
+    h.update(json.dumps([list(feature_columns), valid_seasons]).encode('utf-8'))
+    h.update(X.tobytes())
+    h.update(y.tobytes())
+    h.update(seasons.astype(np.int64).tobytes())
+    data_dir = os.path.join(CACHE_DIR, h.hexdigest()[:16])
+    if os.path.exists(os.path.join(data_dir, 'folds.json')):
+        return data_dir
+
+    folds = []
+    for season in sorted(np.unique(seasons))[-valid_seasons:]:
+        rows = np.flatnonzero(seasons == season)
+        if rows[0] > 0:
+            folds.append({'season': int(season), 'train_end': int(rows[0]), 'valid_end': int(rows[-1]) + 1})
+
+    os.makedirs(data_dir, exist_ok=True)
+    np.save(os.path.join(data_dir, 'X.npy'), X)
+    np.save(os.path.join(data_dir, 'y.npy'), y)
+    with open(os.path.join(data_dir, 'folds.json'), 'w', encoding='utf-8') as f:
+        json.dump(folds, f, indent=2)
+    return data_dir
+
+
+def _load_folds(data_dir):
+    X = np.load(os.path.join(data_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(data_dir, 'y.npy'), mmap_mode='r')
+    with open(os.path.join(data_dir, 'folds.json'), 'r', encoding='utf-8') as f:
+        return X, y, json.load(f)
+
+
+# --- trial ---
+def sample_trials(engines, n_trials, seed=SEED):
+    """從搜尋空間隨機抽樣 (不重複) 的 (engine, params) 清單，各模型輪流"""
+    rng = np.random.default_rng(seed)
+    trials = []
+    seen = set()
+    attempts = 0
+    while len(trials) < n_trials and attempts < n_trials * 20:
+        engine = engines[attempts % len(engines)]
+        attempts += 1
+        space = SEARCH_SPACES[engine]
+        params = {name: values[int(rng.integers(len(values)))] for name, values in space.items()}
+        key = json.dumps([engine, params], sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            trials.append((engine, params))
+    return trials
+
+
+def run_trial(task):
+    """
+    依序評估每個 fold；baseline (每個 fold 之後的累積平均 log loss) 不為 None 時，
+    累積平均比基準差超過 PRUNE_MARGIN 就停止 (最後一個 fold 不提前停止)。
+    """
+    trial_id, engine, params, data_dir, baseline = task
+    X, y, folds = _load_folds(data_dir)
+    model_params = dict(FIXED_PARAMS.get(engine, {}), **params)
+    start = time.perf_counter()
+    losses, accs = [], []
+    pruned = False
+    for k, fold in enumerate(folds):
+        train_end, valid_end = fold['train_end'], fold['valid_end']
+        model = model_registry.make_model(engine, model_params)
+        model.fit(X[:train_end], y[:train_end])
+        proba = model.predict_proba(X[train_end:valid_end])[:, 1]
+        y_valid = np.asarray(y[train_end:valid_end])
+        losses.append(log_loss(y_valid, proba, labels=[0, 1]))
+        accs.append(accuracy_score(y_valid, proba >= 0.5))
+        if baseline is not None and k < len(folds) - 1 and np.mean(losses) > baseline[k] * (1 + PRUNE_MARGIN):
+            pruned = True
+            break
+    return {
+        'Trial': trial_id, 'Engine': engine, 'Params': json.dumps(params, sort_keys=True),
+        'Folds': len(losses), 'Pruned': pruned,
+        'Log_Loss': float(np.mean(losses)), 'Accuracy': float(np.mean(accs)),
+        'Fold_Log_Loss': json.dumps([round(v, 5) for v in losses]),
+        'Seconds': time.perf_counter() - start,
+    }
+
+
+def search(df, engines=None, n_trials=N_TRIALS, workers=None):
+    """回傳 (基準結果, 所有 trial 結果 DataFrame)"""
+    engines = engines or [e for e in model_registry.ENGINES if e in SEARCH_SPACES]
+    workers = workers or min(4, os.cpu_count() or 1)
+    data_dir = materialize_folds(df)
+
+    base_engine, base_params = model_registry.load_model_config()
+    base_params = {k: v for k, v in base_params.items() if k not in FIXED_PARAMS.get(base_engine, {})}
+    baseline = run_trial((0, base_engine, base_params, data_dir, None))
+    curve = np.cumsum(json.loads(baseline['Fold_Log_Loss'])) / np.arange(1, baseline['Folds'] + 1)
+    print(f"  基準 ({base_engine} {base_params}): log loss {baseline['Log_Loss']:.4f} | "
+          f"準確率 {baseline['Accuracy']:.1%} | {baseline['Seconds']:.1f}s")
+
+    tasks = [(i + 1, engine, params, data_dir, curve) for i, (engine, params) in enumerate(sample_trials(engines, n_trials))]
+    if workers == 1:
+        results = [run_trial(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_trial, tasks))
+    return baseline, pd.DataFrame([baseline] + results)
+
+
+def main():
+    n_trials = int(sys.argv[sys.argv.index('--trials') + 1]) if '--trials' in sys.argv else N_TRIALS
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+    engines = None
+    if '--engine' in sys.argv:
+        choice = sys.argv[sys.argv.index('--engine') + 1]
+        engines = None if choice == 'all' else [choice]
+    if engines and engines[0] not in model_registry.ENGINES:
+        print(f"錯誤: 無法使用的模型引擎 '{engines[0]}' (可用: {', '.join(model_registry.ENGINES)})")
+        return
+
+    print("--- 超參數搜尋 (依時間排序的賽季 fold) ---")
+    if not data_store.exists(master_schema.MASTER_FILE):
+        print(f"錯誤: 找不到 '{master_schema.MASTER_FILE}'")
+        return
+    df = master_schema.read_master(usecols=FEATURE_COLUMNS + ['date', 'Season_Year', 'Win']).fillna(0)
+
+    start = time.perf_counter()
+    baseline, results = search(df, engines, n_trials, workers)
+    finished = results[~results['Pruned']].sort_values('Log_Loss')
+    print(f"\n{len(results) - 1} 個 trial 完成 ({time.perf_counter() - start:.1f}s)，"
+          f"提前停止 {int(results['Pruned'].sum())} 個")
+    print(f"{'排名':<4} | {'模型':<8} | {'log loss':>8} | {'準確率':>6} | 參數")
+    for rank, (_, row) in enumerate(finished.head(10).iterrows(), 1):
+        print(f"{rank:<4} | {row['Engine']:<8} | {row['Log_Loss']:>8.4f} | {row['Accuracy']:>6.1%} | {row['Params']}")
+    data_store.write_csv(results, OUTPUT_FILE, index=False)
+    print(f"\n完整結果已儲存至: {OUTPUT_FILE}")
+
+    best = finished.iloc[0]
+    if '--apply' not in sys.argv:
+        print("(加上 --apply 可把最佳設定寫入 model_config.json)")
+    elif best['Trial'] == baseline['Trial']:
+        print("目前設定已是最佳，model_config.json 不變。")
+    else:
+        model_registry.save_model_config(
+            best['Engine'],
+            dict({k: v for k, v in FIXED_PARAMS[best['Engine']].items() if k != 'n_jobs'}, **json.loads(best['Params'])),
+            note=f"hyperparam_search: log loss {best['Log_Loss']:.4f} (基準 {baseline['Log_Loss']:.4f})")
+        print(f"已寫入 {model_registry.MODEL_CONFIG_FILE}：{best['Engine']} {best['Params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+【v900 - 增量寫入庫 (Ingest Store)】
+v300 每天新增的比賽/球員資料不再「讀全檔 -> 去重 -> 重寫全檔」：
+1. 每個資料檔有一份依賽季分區的鍵值索引 (.ingest_index/<檔名>/<賽季>.keys)
+2. 新資料只跟「所屬賽季」的索引比對去重
+3. 全新的列直接追加到檔案尾端 (data_store.append_csv)，成本只跟新資料量有關
+4. 只有在重新抓到「已存在」的比賽 (需要覆蓋舊資料) 時，才退回整檔重寫
+"""
+import json
+import os
+import pandas as pd
+import data_store
+
+INDEX_DIR = ".ingest_index"
+
+
+def season_from_yyyymmdd(dates):
+    """比賽日期 (YYYYMMDD 整數) -> 賽季 (10~12 月屬於下一年的賽季)"""
+    dates = pd.Series(dates).astype(int)
+    year = dates // 10000
+    month = (dates // 100) % 100
+    return (year + (month >= 10)).astype(int)
+
+
+def _index_dir(path):
+    return os.path.join(INDEX_DIR, os.path.basename(path))
+
+
+def _row_keys(df, key_cols):
+    keys = df[key_cols[0]].astype(str)
+    for col in key_cols[1:]:
+        keys = keys + '|' + df[col].astype(str)
+    return keys
+
+
+def _load_meta(path):
+    meta_path = os.path.join(_index_dir(path), 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(path, key_cols, rows):
+    with open(os.path.join(_index_dir(path), 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'size': os.path.getsize(path), 'key_cols': key_cols, 'rows': rows}, f, indent=2)
+
+
+def _index_valid(path, key_cols):
+    """索引必須對應目前硬碟上的檔案 (大小相同) 且鍵值欄位一致"""
+    meta = _load_meta(path)
+    return (meta is not None and os.path.exists(path)
+            and meta.get('size') == os.path.getsize(path) and meta.get('key_cols') == key_cols)
+
+
+def rebuild_index(path, key_cols, season_of):
+    """從完整資料檔重建索引 (索引遺失或與檔案不符時自動執行；有 Parquet 鏡像時很快)"""
+    index_dir = _index_dir(path)
+    os.makedirs(index_dir, exist_ok=True)
+    for name in os.listdir(index_dir):
+        os.remove(os.path.join(index_dir, name))
+
+    df = data_store.read_csv(path)
+    keys = _row_keys(df, key_cols)
+    seasons = season_of(df)
+    for season, season_keys in keys.groupby(seasons.values):
+        with open(os.path.join(index_dir, f"{season}.keys"), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(season_keys.unique()) + '\n')
+    _save_meta(path, key_cols, len(df))
+    print(f"    (已重建 '{path}' 的鍵值索引: {len(keys)} 筆)")
+
+
+def _load_season_keys(path, season):
+    keys_path = os.path.join(_index_dir(path), f"{season}.keys")
+    if not os.path.exists(keys_path):
+        return set()
+    with open(keys_path, 'r', encoding='utf-8') as f:
+        return set(line for line in f.read().split('\n') if line)
+
+
+def _add_season_keys(path, season, keys):
+    with open(os.path.join(_index_dir(path), f"{season}.keys"), 'a', encoding='utf-8') as f:
+        f.write('\n'.join(keys) + '\n')
+
+
+def _full_rewrite(new_df, path, key_cols, season_of):
+    """原本的做法：讀全檔 + 去重 (保留最新) + 重寫；用於需要覆蓋既有資料時"""
+    final_df = pd.concat([data_store.read_csv(path), new_df], ignore_index=True)
+    final_df.drop_duplicates(subset=key_cols, keep='last', inplace=True)
+    data_store.write_csv(final_df, path, index=False)
+    if data_store.writes_to_disk(path):
+        rebuild_index(path, key_cols, season_of)
+    return len(final_df)
+
+
+def ingest(new_df, path, key_cols, season_of):
+    """
+    把新資料併入 path。
+    key_cols: 唯一鍵欄位 (例如 ['game_id'] 或 ['Player_ID', 'Date'])
+    season_of: df -> 每列所屬賽季的函式 (用來決定索引分區)
+    回傳 (新增筆數, 覆蓋筆數, 檔案總筆數)。
+    """
+    new_df = new_df.drop_duplicates(subset=key_cols, keep='last')
+    if not data_store.exists(path):
+        data_store.write_csv(new_df, path, index=False)
+        if data_store.writes_to_disk(path):
+            rebuild_index(path, key_cols, season_of)
+        return len(new_df), 0, len(new_df)
+
+    if not _index_valid(path, key_cols):
+        if os.path.exists(path):
+            rebuild_index(path, key_cols, season_of)
+        else:
+            # 只存在於記憶體中 (沒有落地)：沒有索引可用，直接整份處理
+            total = _full_rewrite(new_df, path, key_cols, season_of)
+            return len(new_df), 0, total
+
+    keys = _row_keys(new_df, key_cols)
+    seasons = season_of(new_df)
+    is_new = pd.Series(True, index=new_df.index)
+    for season in seasons.unique():
+        existing = _load_season_keys(path, season)
+        in_season = (seasons == season).values
+        is_new[in_season] = ~keys[in_season].isin(existing)
+
+    replaced = int((~is_new).sum())
+    if replaced:
+        # 重新抓到已存在的比賽：需要覆蓋舊資料，退回整檔重寫
+        print(f"    {replaced} 筆資料已存在，將以新資料覆蓋 (整檔重寫)")
+        total = _full_rewrite(new_df, path, key_cols, season_of)
+        return int(is_new.sum()), replaced, total
+
+    total = _load_meta(path)['rows'] + len(new_df)
+    if data_store.append_csv(new_df, path):
+        for season in seasons.unique():
+            _add_season_keys(path, season, keys[(seasons == season).values].tolist())
+        _save_meta(path, key_cols, total)
+    return len(new_df), 0, total
@@ -0,0 +1,59 @@
+"""
+【v900 - 傷病影響 (Injury Impact)】
+v500、實戰預測器與對戰矩陣共用同一套傷病計算，確保同一組對戰不論走哪條路徑都得到相同的主勝率：
+- get_player_gmsc_dict()：球員本季平均 GmSc (找不到本季時用上一季)
+- calculate_team_injury_impact()：缺陣球員 GmSc 總和 / 80 (查不到 GmSc 的球員以 DEFAULT_GMSC 計)
+- team_injuries()：多隊一次計算，回傳 predict_slate 需要的 {球隊: (impact, [傷兵名單])}
+"""
+import pandas as pd
+import data_store
+
+INJURY_FILE = "current_injuries.csv"
+GMSC_FILE = "nba_player_cumulative_gmsc_v108.csv"
+RAW_GMSC_FILE = "nba_player_single_game_gmsc_v52.csv"
+GMSC_COLUMNS = ['Player_ID', 'Season_Year', 'Single_Game_GmSc']
+DEFAULT_GMSC = 5.0
+IMPACT_SCALE = 80.0
+
+
+def load_injuries(path=INJURY_FILE):
+    """傷病名單 (不存在時為空表)"""
+    return data_store.read_csv(path) if data_store.exists(path) else pd.DataFrame()
+
+
+def get_player_gmsc_dict(gmsc_file=GMSC_FILE):
+    if not data_store.exists(gmsc_file): return {}
+    try:
+        # 從單場數據計算更準確的平均值 (只讀需要的三個欄位)
+        if data_store.exists(RAW_GMSC_FILE):
+            df_raw = data_store.read_csv(RAW_GMSC_FILE, usecols=GMSC_COLUMNS)
+            df_2026 = df_raw[df_raw['Season_Year'] == 2026]
+            if df_2026.empty: df_2026 = df_raw[df_raw['Season_Year'] == 2025]
+            return df_2026.groupby('Player_ID')['Single_Game_GmSc'].mean().to_dict()
+        return {}
+    except: return {}
+
+
+def calculate_team_injury_impact(team_abbr, injuries_df, player_gmsc_map):
+    """回傳 (impact, ["球員(GmSc)", ...])"""
+    if injuries_df is None or injuries_df.empty: return 0.0, []
+    team_injuries_df = injuries_df[injuries_df['Team_Abbr'] == team_abbr]
+    if team_injuries_df.empty: return 0.0, []
+
+    missing_gmsc_sum = 0.0
+    injured_names = []
+    for _, row in team_injuries_df.iterrows():
+        p_id = row['Player_ID']
+        gmsc = 0.0
+        if pd.notna(p_id) and p_id in player_gmsc_map:
+            gmsc = player_gmsc_map[p_id]
+        if gmsc == 0.0: gmsc = DEFAULT_GMSC
+        if gmsc > 0:
+            missing_gmsc_sum += gmsc
+            injured_names.append(f"{row['Player_Name']}({gmsc:.1f})")
+    return missing_gmsc_sum / IMPACT_SCALE, injured_names
+
+
+def team_injuries(teams, injuries_df, player_gmsc_map):
+    """{球隊: (impact, 傷兵名單)}"""
+    return {team: calculate_team_injury_impact(team, injuries_df, player_gmsc_map) for team in teams}
@@ -1,32 +1,8 @@
-import subprocess
 import sys
-import time
 import os
 import pandas as pd
 import base64
-
-def run_step(script_name):
-    """執行外部 Python 腳本的函式"""
-    print(f"\n" + "="*60)
-    print(f" ▶ 正在執行: {script_name}")
-    print("="*60)
-    
-    if not os.path.exists(script_name):
-        print(f" [X] 錯誤：找不到檔案 '{script_name}'")
-        return False
-
-    start_time = time.time()
-    try:
-        result = subprocess.run([sys.executable, script_name], check=True)
-        elapsed = time.time() - start_time
-        print(f"\n [V] {script_name} 執行成功！ (耗時: {elapsed:.1f} 秒)")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"\n [X] {script_name} 執行失敗！ (錯誤碼: {e.returncode})")
-        return False
-    except Exception as e:
-        print(f"\n [X] 發生未預期錯誤: {e}")
-        return False
+import pipeline_engine
 
 def get_image_base64(image_path):
     """將圖片轉換為 Base64 字串以便嵌入 HTML"""
@@ -235,41 +211,18 @@ def main():
     print(" 🏀 NBA 全自動投資系統 (Master Controller v3)")
     print("#"*60)
     
-    pipeline = [
-        # --- 階段 1: 數據更新 ---
-        "v300_get_links.py",
-        "v300_parse_data_incremental.py",
-        "v400_get_current_injuries.py",
-        
-        # --- 階段 2: 特徵工程 ---
-        "v200_gmsc_cumulative.py",
-        "v1_update_v53.py",
-        "v200data_process9.py",
-        
-        # --- 階段 3: 數據整合 ---
-        "v200_merge_final.py",
-        "fix_columns.py",
-        
-        # --- 階段 4: 回測與繪圖 (新增) ---
-        "predictions_2026_full_report.py",
-        "plot_accuracy.py",
-
-        # --- 階段 5: 預測與分析 ---
-        "v500_export_predictions.py",
-        "v501_get_odds_for_prediction.py",
-        "v600_merge_analysis.py",
-        "v800_value_analyzer.py",
-        
-        # --- 階段 6: 成績結算 ---
-        "v700_grade_report.py"
-    ]
-
-    total_steps = len(pipeline)
-    for i, script in enumerate(pipeline):
-        print(f"\n [進度] 步驟 {i+1}/{total_steps}...")
-        if not run_step(script):
-            print(f"警告：'{script}' 執行失敗或找不到，將嘗試繼續執行下一步...")
-            continue
+    # 依 DAG 執行所有階段 (見 pipeline_engine.PIPELINE_STAGES)
+    # --checkpoint-all: 額外把記憶體中的中間產物寫入硬碟
+    # --workers N: 平行執行的行程數 (1 = 在目前行程中依序執行)
+    # --no-cache: 忽略建置快取，強制重算所有特徵階段
+    workers = None
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+    pipeline_engine.run_pipeline(
+        checkpoint_all='--checkpoint-all' in sys.argv,
+        workers=workers,
+        use_cache='--no-cache' not in sys.argv,
+    )
 
     print("\n" + "#"*60)
     print(" 🎉 恭喜！所有步驟執行完畢。")
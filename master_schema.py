@@ -0,0 +1,78 @@
+"""
+【v900 - 主資料庫欄位型別 (Master Schema)】
+FINAL_MASTER_DATASET_v109_FIXED.csv 的欄位型別只在這裡宣告一次，所有讀取主資料庫的程式共用：
+- 球隊代碼 / 主客場：category (30 隊的字串只存一份，主客兩欄共用同一組類別)
+- 勝率、平均分差、傷病影響、進階數據等比率：float32
+- 連勝、休息天數、累積場數、得分：int16
+- Win 與主客場計數：int8
+只在讀取時套用；CSV 正本仍由 v200data_process9 以 float64 寫出，內容不變。
+"""
+import pandas as pd
+import data_store
+
+MASTER_FILE = "FINAL_MASTER_DATASET_v109_FIXED.csv"
+
+# 主隊 / 客隊 / 差值 三種視角的欄位前綴
+VIEW_PREFIXES = ['', 'Opp_', 'Diff_']
+
+TEAM_COLUMNS = ['Team_Abbr', 'Opp_Abbr']
+CATEGORY_COLUMNS = TEAM_COLUMNS + ['location']
+
+INT8_COLUMNS = ['Win', 'win_home', 'games_home', 'win_away', 'games_away']
+
+INT16_COLUMNS = (
+    ['Season_Year', 'pts', 'opp_pts', 'margin', 'win_cumsum', 'games_played', 'margin_cumsum']
+    + [prefix + col for prefix in VIEW_PREFIXES
+       for col in ['Before_Game_Streak', 'Days_Since_Last_Game', 'Before_Game_Total_Games']]
+)
+
+FLOAT32_COLUMNS = [
+    prefix + col for prefix in VIEW_PREFIXES
+    for col in [
+        'Before_Game_Win_Pct', 'Before_Game_Avg_Margin', 'Before_Home_Win_Pct', 'Before_Away_Win_Pct',
+        'Before_Game_Win_Pct_Last_5', 'Before_Game_Win_Pct_Last_10', 'Before_Game_Avg_Margin_Last_5',
+        'CS_Win_Pct_L5', 'CS_Avg_Margin_L5', 'Before_Game_H2H_Win_Pct_L5', 'Before_Game_H2H_Avg_Margin_L5',
+        'Total_Injury_Impact',
+        'Before_Game_Avg_Pace', 'Before_Game_Avg_OffRtg', 'Before_Game_Avg_DefRtg',
+        'Before_Game_Avg_NetRtg', 'Before_Game_Avg_TOV_Rate', 'Before_Game_Avg_ORB_Pct',
+    ]
+]
+
+MASTER_DTYPES = dict(
+    [(col, 'category') for col in CATEGORY_COLUMNS]
+    + [(col, 'int8') for col in INT8_COLUMNS]
+    + [(col, 'int16') for col in INT16_COLUMNS]
+    + [(col, 'float32') for col in FLOAT32_COLUMNS]
+)
+
+
+def apply_master_schema(df):
+    """
+    把主資料庫的欄位轉成 MASTER_DTYPES 宣告的型別 (只處理存在的欄位，其餘不動)。
+    整數欄位若含有缺值 (舊版資料)，改用 float32 保留 NaN。
+    """
+    casts = {}
+    for col, dtype in MASTER_DTYPES.items():
+        if col not in df.columns or col in TEAM_COLUMNS:
+            continue
+        if dtype.startswith('int') and df[col].isna().any():
+            dtype = 'float32'
+        casts[col] = dtype
+    df = df.astype(casts)
+
+    # 主客兩欄共用同一組球隊類別，合併 / 比較時不會退回字串
+    teams = [col for col in TEAM_COLUMNS if col in df.columns]
+    if teams:
+        codes = pd.unique(pd.concat([df[col] for col in teams], ignore_index=True).dropna())
+        team_dtype = pd.CategoricalDtype(sorted(codes))
+        df = df.astype({col: team_dtype for col in teams})
+    return df
+
+
+def read_master(path=MASTER_FILE, usecols=None):
+    """透過 data_store 讀取主資料庫並套用欄位型別"""
+    if usecols is None:
+        df = data_store.read_csv(path)
+    else:
+        df = data_store.read_csv(path, usecols=usecols)
+    return apply_master_schema(df)
@@ -0,0 +1,92 @@
+"""
+【v900 - 全對戰勝率矩陣 (Matchup Matrix)】
+模型訓練 (v500) 之後，一次算出下一個比賽日所有 30x29 組主客對戰的主勝率 (含 current_injuries.csv 的傷病影響)，
+存成 matchup_matrix_v900.csv (一列 = 一支主隊，欄 = 客隊)。
+實戰預測器的手動模式、Streamlit 雲端版與假想對戰工具直接查表，不必再建特徵與呼叫 predict_proba：
+  matrix = load_matchup_matrix()
+  prob = lookup(matrix, 'BOS', 'NYK')
+"""
+import numpy as np
+import pandas as pd
+import data_store
+import master_schema
+import model_registry
+import schedule_store
+from feature_builder import FEATURE_COLUMNS, MASTER_COLUMNS, build_team_state_index
+from slate_predictor import predict_all_pairings
+from injury_impact import get_player_gmsc_dict, load_injuries, team_injuries
+
+MATRIX_FILE = "matchup_matrix_v900.csv"
+
+
+def build_matchup_matrix(team_index, target_date, scaler, model, injuries=None):
+    """所有主客組合 -> 以主隊為 index、客隊為欄位的主勝率表 (對角線為 NaN)"""
+    pairings = predict_all_pairings(team_index, target_date, scaler, model, injuries)
+    teams = list(team_index.index)
+    return pairings.pivot(index='Home', columns='Away', values='Home_Win_Prob').reindex(index=teams, columns=teams)
+
+
+def save_matchup_matrix(matrix, target_date, data_date, path=MATRIX_FILE):
+    """Date = 預測的比賽日，Data_Date = 主資料庫最後一天 (用來判斷矩陣是否過期)"""
+    out = matrix.rename_axis(index='Home', columns=None).reset_index()
+    out.insert(0, 'Data_Date', pd.Timestamp(data_date).strftime('%Y-%m-%d'))
+    out.insert(0, 'Date', pd.Timestamp(target_date).strftime('%Y-%m-%d'))
+    data_store.write_csv(out, path, index=False)
+
+
+def load_matchup_matrix(path=MATRIX_FILE):
+    """
+    讀取矩陣檔，回傳 dict：date / data_date / teams / pos (球隊 -> 位置) / probs (float 陣列)。
+    檔案不存在時回傳 None。
+    """
+    if not data_store.exists(path):
+        return None
+    df = data_store.read_csv(path)
+    teams = list(df['Home'])
+    return {
+        'date': df['Date'].iloc[0],
+        'data_date': df['Data_Date'].iloc[0],
+        'teams': teams,
+        'pos': {team: i for i, team in enumerate(teams)},
+        'probs': df[teams].to_numpy(dtype=float),
+    }
+
+
+def lookup(matrix, home, away):
+    """單次陣列查詢的主勝率；球隊不在矩陣中或主客相同時回傳 None"""
+    i, j = matrix['pos'].get(home), matrix['pos'].get(away)
+    if i is None or j is None or i == j:
+        return None
+    prob = matrix['probs'][i, j]
+    return None if np.isnan(prob) else float(prob)
+
+
+def main():
+    print("--- 全對戰勝率矩陣 ---")
+    if not data_store.exists(master_schema.MASTER_FILE):
+        print(f"錯誤: 找不到 '{master_schema.MASTER_FILE}'")
+        return
+    df = master_schema.read_master(usecols=lambda c: c in MASTER_COLUMNS)
+    df['date_dt'] = pd.to_datetime(df['date'])
+    df_train = df.fillna(0)
+    # 與 v500 相同的設定，資料沒變時直接載入 v500 剛訓練 / 更新的模型
+    scaler, model = model_registry.load_or_train(df_train[FEATURE_COLUMNS], df_train['Win'], FEATURE_COLUMNS,
+                                                 dates=df_train['date_dt'], keys=df_train['game_id'])
+
+    data_date = df['date_dt'].max()
+    # 與 v500 / 實戰預測器相同的目標日
+    target_date, todays_games = schedule_store.next_game_date(data_date, days=7)
+    if not todays_games:
+        print(f"  [!] 未來 7 天內找不到比賽，以 {target_date.strftime('%Y-%m-%d')} 計算")
+
+    team_index = build_team_state_index(df, before_date=target_date)
+    injuries = team_injuries(team_index.index, load_injuries(), get_player_gmsc_dict())
+
+    matrix = build_matchup_matrix(team_index, target_date, scaler, model, injuries)
+    save_matchup_matrix(matrix, target_date, data_date)
+    print(f"已儲存 {target_date.strftime('%Y-%m-%d')} 的 {len(matrix)} 隊對戰矩陣 "
+          f"({len(matrix) * (len(matrix) - 1)} 組) 至: {MATRIX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+【v900 - 資料集轉換為 Parquet 鏡像】
+把 data_store.COLUMNAR_DATASETS 中現有的 CSV 全部轉成 .columnar/ 下的 Parquet 鏡像，
+並比較 CSV 與 Parquet (完整 / 只讀部分欄位) 的讀取時間與記憶體用量。
+之後 data_store 會自動維護鏡像 (CSV 變動時下次讀取自動重建)，不需要再執行。
+需要 pyarrow (pip install pyarrow)。
+"""
+import fnmatch
+import glob
+import os
+import time
+import pandas as pd
+import data_store
+from feature_builder import MASTER_COLUMNS
+
+
+def _timed(func):
+    start = time.perf_counter()
+    df = func()
+    return time.perf_counter() - start, df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def main():
+    if not data_store.HAS_COLUMNAR:
+        print("錯誤: 找不到 pyarrow，無法建立 Parquet 鏡像 (pip install pyarrow)。")
+        return
+
+    targets = sorted(path for path in glob.glob("*.csv")
+                     if any(fnmatch.fnmatch(path, p) for p in data_store.COLUMNAR_DATASETS))
+    if not targets:
+        print("目前資料夾中沒有需要轉換的資料集。")
+        return
+
+    print(f"--- 轉換 {len(targets)} 個資料集為 Parquet 鏡像 ---")
+    print(f"{'檔案':<38} | {'CSV MB':>6} | {'PQ MB':>5} | {'CSV 讀取':>8} | {'PQ 讀取':>8} | {'PQ 預測欄位':>10} | 記憶體 (CSV -> 預測欄位)")
+    print("-" * 115)
+    for path in targets:
+        parquet_path = data_store.build_mirror(path)
+        if not parquet_path:
+            continue
+        t_csv, m_csv = _timed(lambda: pd.read_csv(path))
+        t_pq, m_pq = _timed(lambda: data_store.read_csv(path))
+        line = (f"{path:<38} | {os.path.getsize(path) / 1024 ** 2:>6.1f} | {os.path.getsize(parquet_path) / 1024 ** 2:>5.1f} | "
+                f"{t_csv * 1000:>5.0f} ms | {t_pq * 1000:>5.0f} ms")
+        if fnmatch.fnmatch(path, 'FINAL_MASTER_*.csv'):
+            # 預測程式 (v500 / 實戰預測器) 只讀 MASTER_COLUMNS
+            t_proj, m_proj = _timed(lambda: data_store.read_csv(path, usecols=lambda c: c in MASTER_COLUMNS))
+            line += f" | {t_proj * 1000:>7.0f} ms | {m_csv:.1f} MB -> {m_proj:.1f} MB"
+        else:
+            line += f" | {'-':>10} | {m_csv:.1f} MB"
+        print(line)
+
+    print(f"\n完成。鏡像位於 '{data_store.COLUMNAR_DIR}/' (已加入 .gitignore，CSV 仍是正本)。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+【v900 - 模型登錄庫 (Model Registry)】
+訓練好的 StandardScaler + 模型存在 models/ 目錄中，
+並記錄訓練資料的指紋 (雜湊) 與 feature_columns。
+預測程式呼叫 load_or_train()：資料沒變就直接載入 (毫秒級)，有變才重新訓練。
+模型引擎 (MODEL_ENGINES) 可以抽換：
+- rf：RandomForest (原本的 v114 模型，預設)
+- hist_gb：sklearn HistGradientBoosting (直方圖梯度提升樹，模型小、預測快)
+- xgboost：已安裝 xgboost 時可用 (CPU, tree_method='hist')
+引擎與超參數來自 model_config.json (由 hyperparam_search --apply 寫入)，
+環境變數 NBA_MODEL_ENGINE 可以臨時指定引擎 (使用該引擎的預設參數)。
+增量模式 (INCREMENTAL_DEFAULTS，可由 model_config.json 的 "incremental" 覆寫)：
+每天只新增約 10 場比賽時，沿用昨天的模型以 warm_start 追加少量的樹 (只用最近的資料並依時間加權)，
+連續增量 full_refit_every 次、歷史比賽被修改 (比賽鍵值或勝負)、或最近比賽的樣本外 log loss 超過門檻 (漂移) 時才完整重訓。
+check_incremental_training.py 以逐日重建的主資料表比對增量更新與每日完整重訓；
+沒通過時在 model_config.json 設定 "incremental": {"enabled": false} 即可一律完整重訓。
+環境變數 NBA_FULL_REFIT=1 可以強制完整重訓。
+"""
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import joblib
+import sklearn
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import log_loss
+from sklearn.preprocessing import StandardScaler
+
+try:
+    import xgboost
+    HAS_XGBOOST = True
+except ImportError:
+    HAS_XGBOOST = False
+
+MODEL_DIR = "models"
+MODEL_CONFIG_FILE = "model_config.json"
+DEFAULT_ENGINE = 'rf'
+DEFAULT_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+# 引擎名稱 -> (分類器類別, 預設參數)；新增引擎只要在這裡註冊
+MODEL_ENGINES = {
+    'rf': (RandomForestClassifier, DEFAULT_PARAMS),
+    'hist_gb': (HistGradientBoostingClassifier, {
+        'max_iter': 200, 'learning_rate': 0.05, 'max_leaf_nodes': 15, 'min_samples_leaf': 40,
+        'l2_regularization': 1.0, 'early_stopping': False, 'random_state': 42,
+    }),
+}
+if HAS_XGBOOST:
+    MODEL_ENGINES['xgboost'] = (xgboost.XGBClassifier, {
+        'n_estimators': 200, 'max_depth': 4, 'learning_rate': 0.05, 'subsample': 0.8,
+        'colsample_bytree': 0.8, 'tree_method': 'hist', 'eval_metric': 'logloss', 'random_state': 42,
+    })
+ENGINES = list(MODEL_ENGINES)
+
+# 支援 warm_start 的引擎 -> 每次增量更新要加大的參數 (樹的數量 / boosting 迭代數)
+WARM_START_PARAMS = {'rf': 'n_estimators', 'hist_gb': 'max_iter'}
+# hist_gb 加上 sample_weight 時分箱會改用加權分位數 (慢 30 倍以上)，只用最近 window_rows 筆、不加權
+WEIGHTED_WARM_START = {'rf'}
+INCREMENTAL_DEFAULTS = {
+    'enabled': True,
+    'window_rows': 2000,          # 追加的樹只用最近 N 筆比賽訓練
+    'half_life_rows': 500,        # 樣本權重每 N 筆減半 (越新的比賽權重越高)
+    'trees_per_update': 2,        # 每次增量更新追加的樹 (hist_gb 為迭代數)；太多會讓預測偏離完整重訓
+    'full_refit_every': 7,        # 連續增量更新 N 次後完整重訓 (約一週)
+    'drift_window': 100,          # 漂移檢查使用最近 N 場的樣本外預測
+    'max_drift_log_loss': 0.68,   # 最近 N 場 log loss 超過此值視為漂移，完整重訓
+    'tolerance': 0.01,            # check_incremental_training：與每日完整重訓的準確率容許差距
+}
+
+
+def _read_model_config():
+    """讀取 model_config.json (不存在或損毀時回傳 {})"""
+    if not os.path.exists(MODEL_CONFIG_FILE):
+        return {}
+    try:
+        with open(MODEL_CONFIG_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"  [!] 無法讀取 '{MODEL_CONFIG_FILE}': {e}")
+        return {}
+
+
+def load_model_config():
+    """
+    回傳 (engine, params)。
+    NBA_MODEL_ENGINE 優先 (與設定檔的引擎不同時使用該引擎的預設參數)；
+    設定檔不存在、損毀或指定了無法使用的引擎時退回預設的 RandomForest。
+    """
+    engine, params = DEFAULT_ENGINE, dict(DEFAULT_PARAMS)
+    config = _read_model_config()
+    if config:
+        if config.get('engine', DEFAULT_ENGINE) in MODEL_ENGINES:
+            engine, params = config.get('engine', DEFAULT_ENGINE), dict(config.get('params', {}))
+        else:
+            print(f"  [!] '{MODEL_CONFIG_FILE}' 指定的引擎 '{config.get('engine')}' 無法使用 "
+                  f"(可用: {', '.join(ENGINES)})，改用預設 RandomForest")
+
+    override = os.environ.get('NBA_MODEL_ENGINE')
+    if override and override != engine:
+        if override in MODEL_ENGINES:
+            return override, dict(MODEL_ENGINES[override][1])
+        print(f"  [!] NBA_MODEL_ENGINE='{override}' 無法使用 (可用: {', '.join(ENGINES)})，忽略")
+    return engine, params
+
+
+def load_incremental_config():
+    """INCREMENTAL_DEFAULTS + model_config.json 的 "incremental" 區段"""
+    return dict(INCREMENTAL_DEFAULTS, **_read_model_config().get('incremental', {}))
+
+
+def save_model_config(engine, params, note=None):
+    """寫入引擎與參數 (保留既有的 "incremental" 設定)"""
+    config = {'engine': engine, 'params': params}
+    incremental = _read_model_config().get('incremental')
+    if incremental:
+        config['incremental'] = incremental
+    if note:
+        config['note'] = note
+    with open(MODEL_CONFIG_FILE, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+
+
+def make_model(engine, params):
+    """依引擎名稱建立未訓練的分類器"""
+    if engine not in MODEL_ENGINES:
+        hint = " (需要 xgboost 套件: pip install xgboost)" if engine == 'xgboost' else ""
+        raise ValueError(f"未知或無法使用的模型引擎: {engine}{hint}")
+    return MODEL_ENGINES[engine][0](**params)
+
+
+def resolve_model_config(engine=None, params=None):
+    """都沒指定時讀取 model_config.json；參數補上該引擎的預設值 (random_state 等)"""
+    if engine is None and params is None:
+        engine, params = load_model_config()
+    engine = engine or DEFAULT_ENGINE
+    defaults = MODEL_ENGINES[engine][1] if engine in MODEL_ENGINES else {}
+    return engine, dict(defaults, **(params or {}))
+
+
+def fingerprint_params(engine, params):
+    """RandomForest 維持原本的指紋內容 (既有模型不必重訓)；其他模型把引擎一起納入"""
+    return params if engine == 'rf' else dict(params, engine=engine)
+
+
+def training_fingerprint(X, y, feature_columns, params):
+    """訓練資料 + 特徵欄位 + 超參數 + sklearn 版本 的雜湊"""
+    h = hashlib.sha1()
+    h.update(json.dumps(list(feature_columns)).encode('utf-8'))
+    h.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    h.update(sklearn.__version__.encode('utf-8'))
+    h.update(np.ascontiguousarray(np.asarray(X, dtype=np.float64)).tobytes())
+    h.update(np.ascontiguousarray(np.asarray(y, dtype=np.int64)).tobytes())
+    return h.hexdigest()
+
+
+def history_fingerprint(keys, y):
+    """
+    已訓練比賽的雜湊：比賽鍵值 (game_id) + 勝負，依鍵值排序 (與列順序無關)。
+    不含特徵值：主資料表每天完整重建，球員平均 GmSc 是整季平均，舊比賽的傷病影響每天都會變動。
+    """
+    keys, y = np.asarray(keys).astype(str), np.asarray(y, dtype=np.int64)
+    order = np.lexsort((y, keys))
+    h = hashlib.sha1()
+    h.update('\n'.join(keys[order]).encode('utf-8'))
+    h.update(np.ascontiguousarray(y[order]).tobytes())
+    return h.hexdigest()
+
+
+def _history_keys(keys, dates):
+    """沒有比賽鍵值時退回比賽日期 (同一天的比賽只比對勝負分佈)"""
+    if keys is not None:
+        return np.asarray(keys)
+    return pd.to_datetime(np.asarray(dates)).strftime('%Y-%m-%d').values
+
+
+def model_path(name):
+    return os.path.join(MODEL_DIR, f"{name}.joblib")
+
+
+def load_model(name):
+    """讀取已儲存的模型 artifact (不存在或損毀時回傳 None)"""
+    path = model_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"  [!] 無法讀取模型 '{path}': {e}")
+        return None
+
+
+def save_model(name, artifact):
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    joblib.dump(artifact, model_path(name))
+
+
+def _take(X, rows):
+    """DataFrame / ndarray 依位置取列"""
+    return X.iloc[rows] if hasattr(X, 'iloc') else X[rows]
+
+
+def _last_date(dates):
+    return None if dates is None or len(dates) == 0 else pd.to_datetime(np.asarray(dates)).max().strftime('%Y-%m-%d')
+
+
+def train_artifact(X, y, feature_columns, engine, params, fingerprint, dates=None, keys=None):
+    """
+    完整重訓：StandardScaler + 模型，回傳可直接儲存的 artifact。
+    dates (與 X 對齊的比賽日期) 的最後一天記為 last_date，之後的增量更新以日期找出新比賽；
+    keys (與 X 對齊的 game_id) 與勝負記為 history，增量更新時用來確認舊比賽沒有被修改。
+    """
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = make_model(engine, params)
+    model.fit(X_scaled, y)
+    return {
+        'fingerprint': fingerprint,
+        'feature_columns': list(feature_columns),
+        'engine': engine,
+        'params': params,
+        'n_rows': len(y),
+        'scaler': scaler,
+        'model': model,
+        'last_date': _last_date(dates),
+        'history': None if dates is None else history_fingerprint(_history_keys(keys, dates), y),
+        'incremental_updates': 0,
+        'recent_proba': np.empty(0),
+        'recent_y': np.empty(0, dtype=np.int8),
+    }
+
+
+def incremental_update(artifact, X, y, feature_columns, fingerprint, config=None, dates=None, keys=None):
+    """
+    在 artifact 的模型上追加新的比賽。
+    dates (與 X 對齊的比賽日期) 晚於 last_date 的列就是新比賽 (主資料表不是依日期排序，新比賽會穿插在舊資料中間)；
+    其餘的列必須是上次訓練的同一批比賽、勝負相同 (以 keys / 日期 + 勝負的 history 比對)。
+    舊比賽的特徵值允許變動 (傷病影響用整季平均 GmSc)，舊的樹不會重訓，由定期完整重訓與漂移檢查修正。
+    回傳 (更新後的 artifact, None)；不適合增量更新時回傳 (None, 需要完整重訓的原因)。
+    scaler 沿用上次完整重訓的結果 (樹模型不受標準化影響)。
+    """
+    config = config or load_incremental_config()
+    engine = artifact.get('engine', DEFAULT_ENGINE)
+    n_old = artifact['n_rows']
+    if not config['enabled']:
+        return None, "增量模式已關閉"
+    if engine not in WARM_START_PARAMS:
+        return None, f"{engine} 不支援增量更新"
+    if artifact.get('last_date') is None or dates is None:
+        return None, "沒有比賽日期，無法找出新比賽"
+    if artifact.get('feature_columns') != list(feature_columns) or len(y) <= n_old:
+        return None, "特徵欄位或資料筆數不符"
+    dates = pd.to_datetime(np.asarray(dates))
+    known = np.asarray(dates <= pd.Timestamp(artifact['last_date']))
+    history_keys = _history_keys(keys, dates)
+    if known.sum() != n_old or history_fingerprint(history_keys[known], np.asarray(y)[known]) != artifact.get('history'):
+        return None, "歷史比賽已變更"
+    if artifact.get('incremental_updates', 0) >= config['full_refit_every']:
+        return None, f"已連續增量更新 {artifact['incremental_updates']} 次，定期完整重訓"
+
+    scaler, model = artifact['scaler'], artifact['model']
+    y = np.asarray(y)
+    order = np.argsort(dates, kind='stable')
+    new_rows = order[~known[order]]
+
+    # 漂移檢查：新比賽對舊模型而言是樣本外資料
+    proba = model.predict_proba(scaler.transform(_take(X, new_rows)))[:, 1]
+    window = config['drift_window']
+    recent_proba = np.concatenate([artifact.get('recent_proba', np.empty(0)), proba])[-window:]
+    recent_y = np.concatenate([artifact.get('recent_y', np.empty(0, dtype=np.int8)), y[new_rows]])[-window:]
+    if len(recent_y) >= window:
+        drift = log_loss(recent_y, recent_proba, labels=[0, 1])
+        if drift > config['max_drift_log_loss']:
+            return None, f"偵測到漂移 (最近 {window} 場 log loss {drift:.4f} > {config['max_drift_log_loss']})"
+
+    # 追加的樹只用最近 window_rows 筆，權重依新舊指數遞減
+    recent = order[-config['window_rows']:]
+    weight = None
+    if engine in WEIGHTED_WARM_START:
+        weight = 0.5 ** (np.arange(len(recent))[::-1] / config['half_life_rows'])
+    grow = WARM_START_PARAMS[engine]
+    model.set_params(warm_start=True, **{grow: model.get_params()[grow] + config['trees_per_update']})
+    model.fit(scaler.transform(_take(X, recent)), y[recent], sample_weight=weight)
+    model.set_params(warm_start=False)
+
+    return dict(artifact, fingerprint=fingerprint, n_rows=len(y), model=model, last_date=_last_date(dates),
+                history=history_fingerprint(history_keys, y), incremental_updates=artifact.get('incremental_updates', 0) + 1,
+                recent_proba=recent_proba, recent_y=recent_y), None
+
+
+def load_or_train(X, y, feature_columns, name=None, params=None, engine=None, dates=None, keys=None):
+    """
+    回傳 (scaler, model)。
+    若 models/{name}.joblib 的指紋與目前訓練資料相同則直接載入；
+    只新增了比賽時嘗試增量更新，否則完整重訓並儲存。
+    沒有指定 engine / params 時使用 model_config.json 的設定；name 預設為 '{engine}_v114'。
+    dates：與 X 對齊的比賽日期 (增量更新時用來決定最近的比賽)；keys：與 X 對齊的 game_id (確認舊比賽未被修改)。
+    """
+    engine, params = resolve_model_config(engine, params)
+    name = name or f"{engine}_v114"
+    fingerprint = training_fingerprint(X, y, feature_columns, fingerprint_params(engine, params))
+
+    artifact = load_model(name)
+    if (artifact is not None and artifact.get('fingerprint') == fingerprint
+            and artifact.get('feature_columns') == list(feature_columns)):
+        print(f"  [模型] 訓練資料未變更，載入已儲存的模型 '{name}' ({engine}, {artifact['n_rows']} 筆)")
+        return artifact['scaler'], artifact['model']
+
+    reason = "尚無模型"
+    if artifact is not None and (artifact.get('engine', DEFAULT_ENGINE), artifact.get('params')) != (engine, params):
+        reason = "模型設定已變更"
+    elif os.environ.get('NBA_FULL_REFIT'):
+        reason = "NBA_FULL_REFIT"
+    elif artifact is not None:
+        config = load_incremental_config()
+        start = time.perf_counter()
+        updated, reason = incremental_update(artifact, X, y, feature_columns, fingerprint, config, dates, keys)
+        if updated is not None:
+            print(f"  [模型] 增量更新 '{name}' ({engine}, +{len(y) - artifact['n_rows']} 筆, "
+                  f"第 {updated['incremental_updates']}/{config['full_refit_every']} 次, "
+                  f"{time.perf_counter() - start:.2f}s)")
+            save_model(name, updated)
+            return updated['scaler'], updated['model']
+
+    print(f"  [模型] 完整重新訓練 '{name}' ({engine}, {reason})...")
+    artifact = train_artifact(X, y, feature_columns, engine, params, fingerprint, dates, keys)
+    save_model(name, artifact)
+    return artifact['scaler'], artifact['model']
@@ -0,0 +1,289 @@
+"""
+【v900 - 管線引擎 (In-Process Pipeline Engine)】
+取代 master_run 的「每個腳本一個 subprocess」做法：
+- 每個階段直接 import 成 Python 函式呼叫 (pandas/sklearn 只載入一次)
+- 階段之間透過 data_store 在記憶體中傳遞 DataFrame
+- 只有 CHECKPOINTS 指定的檔案才會寫入硬碟
+- 依照每個階段宣告的輸入/輸出檔案建立 DAG，互不相依的分支平行執行
+- cache=True 的階段若輸入與程式碼都沒變，直接從 build_cache 還原輸出並跳過
+"""
+import fnmatch
+import importlib
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import data_store
+import build_cache
+
+# 階段定義：module = 腳本模組名稱，func = 進入點函式，args = 呼叫參數
+# inputs / outputs = 讀寫的檔案 (支援萬用字元)，用來建立 DAG 相依關係
+# cache = 結果只取決於輸入檔案 (不需連網、與日期無關)，可使用建置快取
+# config / env = 會影響結果的設定檔與環境變數 (只納入快取指紋，不影響 DAG)
+# state = 會讀寫的共用目錄 (模型庫、爬蟲快取等)：在 DAG 中視為同時讀寫，但不屬於快取的輸出
+MODEL_CONFIG = ['model_config.json']
+MODEL_ENV = ['NBA_MODEL_ENGINE']
+MODELS = 'models/*.joblib'
+HTTP_CACHE = '.http_cache/*'
+RAW_GAMES = 'nba_game_data_raw_v52_PATCHED.csv'
+RAW_PLAYERS = 'nba_player_single_game_gmsc_v52.csv'
+PLAYER_CUMULATIVE = 'nba_player_cumulative_gmsc_v108.csv'
+MASTER_FIXED = 'FINAL_MASTER_DATASET_v109_FIXED.csv'
+# 每日預測 (v500 產生 predictions_YYYY-MM-DD.csv)；不能寫成 predictions_*.csv，否則會連到回測的 predictions_2026_full_report.csv
+DAILY_PREDICTIONS = 'predictions_????-??-??.csv'
+
+PIPELINE_STAGES = [
+    # --- 階段 1: 數據更新 ---
+    {'module': 'v300_get_links', 'func': 'run_v300_get_links',
+     'inputs': [RAW_GAMES], 'outputs': ['new_links_v300.csv'], 'state': [HTTP_CACHE]},
+    {'module': 'v300_parse_data_incremental', 'func': 'run_v300_data_update',
+     'inputs': ['new_links_v300.csv', RAW_GAMES, RAW_PLAYERS], 'outputs': [RAW_GAMES, RAW_PLAYERS],
+     'state': [HTTP_CACHE, '.ingest_index/*']},
+    {'module': 'v400_get_current_injuries', 'func': 'get_current_injuries',
+     'inputs': [], 'outputs': ['current_injuries.csv'], 'state': [HTTP_CACHE]},
+
+    # --- 階段 2: 特徵工程 ---
+    {'module': 'v200_gmsc_cumulative', 'func': 'process_player_cumulative_gmsc_v108',
+     'inputs': [RAW_PLAYERS], 'outputs': [PLAYER_CUMULATIVE], 'cache': True},
+    # 基礎 / 傷病 / 進階特徵在同一份長表上計算，直接輸出 v109_FIXED
+    {'module': 'v200data_process9', 'func': 'create_final_dataset_v109',
+     'inputs': [RAW_GAMES, PLAYER_CUMULATIVE], 'outputs': [MASTER_FIXED], 'cache': True},
+
+    # --- 階段 3: 回測與繪圖 ---
+    {'module': 'predictions_2026_full_report', 'func': 'predict_2026_season_full',
+     'args': (MASTER_FIXED,),
+     'inputs': [MASTER_FIXED], 'outputs': ['predictions_2026_full_report.csv'], 'cache': True,
+     'config': MODEL_CONFIG, 'env': MODEL_ENV, 'state': ['.walk_forward_cache/*']},
+    {'module': 'plot_accuracy', 'func': 'plot_accuracy_chart',
+     'args': ("predictions_2026_full_report.csv",),
+     'inputs': ['predictions_2026_full_report.csv'], 'outputs': ['accuracy_chart.png'], 'cache': True},
+
+    # --- 階段 4: 預測與分析 ---
+    {'module': 'v500_export_predictions', 'func': 'main',
+     'inputs': [MASTER_FIXED, 'current_injuries.csv', PLAYER_CUMULATIVE, RAW_PLAYERS],
+     'outputs': [DAILY_PREDICTIONS, 'nba_schedule_v900.csv'], 'state': [MODELS, HTTP_CACHE]},
+    # 全部 30x29 組對戰的主勝率 (手動查詢 / Streamlit 直接查表)
+    {'module': 'matchup_matrix', 'func': 'main',
+     'inputs': [MASTER_FIXED, 'current_injuries.csv', PLAYER_CUMULATIVE, RAW_PLAYERS, 'nba_schedule_v900.csv'],
+     'outputs': ['matchup_matrix_v900.csv'], 'state': [MODELS, HTTP_CACHE]},
+    {'module': 'v501_get_odds_for_prediction', 'func': 'main',
+     'inputs': [DAILY_PREDICTIONS], 'outputs': ['odds_for_*.csv'], 'state': [HTTP_CACHE]},
+    {'module': 'v600_merge_analysis', 'func': 'main',
+     'inputs': [DAILY_PREDICTIONS, 'odds_for_*.csv', 'final_analysis_report.csv'],
+     'outputs': ['final_analysis_report.csv']},
+    {'module': 'v800_value_analyzer', 'func': 'main',
+     'inputs': [DAILY_PREDICTIONS, 'odds_for_*.csv', 'final_analysis_report_v800.csv'],
+     'outputs': ['final_analysis_report_v800.csv']},
+
+    # --- 階段 5: 成績結算 ---
+    {'module': 'v700_grade_report', 'func': 'main',
+     'inputs': ['final_analysis_report.csv', 'final_analysis_report_v800.csv'],
+     'outputs': ['final_analysis_report_graded.csv', 'final_analysis_report_v800_graded.csv'],
+     'state': [HTTP_CACHE]},
+]
+
+# 需要落地的檔案 (原始資料、最終資料庫與所有報表)
+# 其餘中間產物只留在記憶體中 (v108_base / v53 / v109 已併入單一特徵階段，不再產生)
+CHECKPOINTS = [
+    RAW_GAMES,
+    RAW_PLAYERS,
+    PLAYER_CUMULATIVE,
+    'new_links_v300.csv',
+    'current_injuries.csv',
+    MASTER_FIXED,
+    'predictions_*.csv',
+    'nba_schedule_v900.csv',
+    'matchup_matrix_v900.csv',
+    'odds_for_*.csv',
+    'final_analysis_report*.csv',
+]
+
+
+def run_stage(stage):
+    """在目前的 Python 行程中執行單一階段，回傳 (是否成功, 耗時秒數)"""
+    name = stage['module']
+    print(f"\n" + "="*60)
+    print(f" ▶ 正在執行: {name}.{stage['func']}()")
+    print("="*60)
+
+    start_time = time.time()
+    try:
+        module = importlib.import_module(name)
+        func = getattr(module, stage['func'])
+        func(*stage.get('args', ()))
+        elapsed = time.time() - start_time
+        print(f"\n [V] {name} 執行成功！ (耗時: {elapsed:.1f} 秒)")
+        return True, elapsed
+    except SystemExit as e:
+        elapsed = time.time() - start_time
+        print(f"\n [X] {name} 提前結束 (exit code: {e.code})")
+        return False, elapsed
+    except Exception as e:
+        elapsed = time.time() - start_time
+        print(f"\n [X] {name} 執行失敗: {e}")
+        traceback.print_exc()
+        return False, elapsed
+
+
+def _overlaps(patterns_a, patterns_b):
+    """兩組檔案樣式是否可能指到同一個檔案 (萬用字元雙向比對，例如 predictions_????-??-??.csv 與 predictions_2026-01-01.csv)"""
+    return any(a == b or fnmatch.fnmatch(a, b) or fnmatch.fnmatch(b, a)
+               for a in patterns_a for b in patterns_b)
+
+
+def build_dag(stages):
+    """
+    根據 inputs / outputs 建立相依關係 (回傳每個階段依賴的前置階段索引)。
+    除了「讀取前一階段的輸出」之外，也保留「寫入別人正在讀的檔案」與
+    「寫入同一個檔案」的先後順序，確保結果與依序執行完全相同。
+    """
+    def reads(stage):
+        return stage['inputs'] + stage.get('state', [])
+
+    def writes(stage):
+        return stage['outputs'] + stage.get('state', [])
+
+    deps = []
+    for j, stage in enumerate(stages):
+        stage_deps = set()
+        for i in range(j):
+            if (_overlaps(writes(stages[i]), reads(stage)) or _overlaps(reads(stages[i]), writes(stage))
+                    or _overlaps(writes(stages[i]), writes(stage))):
+                stage_deps.add(i)
+        deps.append(stage_deps)
+    return deps
+
+
+def _run_stage_in_worker(stage, frames, checkpoints):
+    """在子行程中執行階段：載入上游傳來的 DataFrame，並回傳本階段寫入的 DataFrame"""
+    data_store.reset()
+    data_store.configure(in_memory=True, checkpoints=checkpoints)
+    data_store.import_frames(frames)
+    ok, elapsed = run_stage(stage)
+    sys.stdout.flush()
+    return ok, elapsed, data_store.take_written()
+
+
+def print_timing_summary(stages, deps, timings, wall_clock, cached=()):
+    """印出每個階段耗時、關鍵路徑 (critical path) 與平行化節省的時間"""
+    # 最早完成時間 = 自身耗時 + 最慢的前置階段
+    finish = {}
+    prev = {}
+    for j in range(len(stages)):
+        slowest = max(deps[j], key=lambda i: finish[i], default=None)
+        finish[j] = timings[j][1] + (finish[slowest] if slowest is not None else 0.0)
+        prev[j] = slowest
+
+    path = []
+    node = max(finish, key=finish.get) if finish else None
+    while node is not None:
+        path.append(node)
+        node = prev[node]
+    path.reverse()
+
+    print("\n" + "-"*60)
+    print(f" {'階段':<32} | {'狀態':<4} | 耗時")
+    print("-"*60)
+    for j, stage in enumerate(stages):
+        ok, elapsed = timings[j]
+        marker = " *" if j in path else ""
+        status = '快取' if j in cached else ('V' if ok else 'X')
+        print(f" {stage['module']:<32} | {status:<4} | {elapsed:.1f} 秒{marker}")
+    print("-"*60)
+
+    serial_total = sum(t[1] for t in timings.values())
+    critical_total = sum(timings[j][1] for j in path)
+    print(f" 關鍵路徑 (*): {' -> '.join(stages[j]['module'] for j in path)}")
+    print(f" 關鍵路徑耗時: {critical_total:.1f} 秒")
+    print(f" 各階段總耗時: {serial_total:.1f} 秒 | 實際經過時間: {wall_clock:.1f} 秒")
+
+
+def _try_cache(stage, manifest, use_cache):
+    """回傳 (是否命中快取, 指紋)。不可快取的階段指紋為 None"""
+    if not use_cache or not stage.get('cache'):
+        return False, None
+    fingerprint = build_cache.stage_fingerprint(stage)
+    if build_cache.restore(manifest, stage, fingerprint):
+        print(f"\n [快取] {stage['module']} 的輸入與程式碼皆未變更，沿用上次結果。")
+        return True, fingerprint
+    return False, fingerprint
+
+
+def run_pipeline(stages=None, checkpoints=None, checkpoint_all=False, workers=None, use_cache=True):
+    """
+    依 DAG 執行所有階段，互不相依的分支會在 process pool 中同時執行。
+    - 失敗的階段會被記錄，下游階段仍會嘗試執行 (與舊版 master_run 相同)
+    - workers=1 時在目前行程中依序執行 (除錯用)
+    - checkpoint_all=True 時，結束後把記憶體中的中間產物也全部寫入硬碟
+    - use_cache=False 時忽略建置快取，強制重算所有階段
+    """
+    stages = PIPELINE_STAGES if stages is None else stages
+    checkpoints = CHECKPOINTS if checkpoints is None else checkpoints
+    workers = workers or min(4, os.cpu_count() or 1)
+    data_store.configure(in_memory=True, checkpoints=checkpoints)
+
+    deps = build_dag(stages)
+    manifest = build_cache.load_manifest()
+    fingerprints = {}
+    cached = set()
+    timings = {}
+    start_time = time.time()
+
+    def finish(j, ok, elapsed):
+        timings[j] = (ok, elapsed)
+        if ok and fingerprints.get(j):
+            build_cache.record(manifest, stages[j], fingerprints[j])
+            build_cache.save_manifest(manifest)
+
+    if workers == 1:
+        for j, stage in enumerate(stages):
+            print(f"\n [進度] 步驟 {j+1}/{len(stages)}...")
+            hit, fingerprints[j] = _try_cache(stage, manifest, use_cache)
+            if hit:
+                cached.add(j)
+                timings[j] = (True, 0.0)
+                continue
+            finish(j, *run_stage(stage))
+    else:
+        pending = set(range(len(stages)))
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                ready = [j for j in sorted(pending) if deps[j].issubset(timings)]
+                any_hit = False
+                for j in ready:
+                    pending.discard(j)
+                    hit, fingerprints[j] = _try_cache(stages[j], manifest, use_cache)
+                    if hit:
+                        cached.add(j)
+                        timings[j] = (True, 0.0)
+                        any_hit = True
+                        continue
+                    frames = data_store.export_frames(stages[j]['inputs'])
+                    print(f"\n [進度] 啟動 {stages[j]['module']} ({len(timings) + len(running) + 1}/{len(stages)})")
+                    future = pool.submit(_run_stage_in_worker, stages[j], frames, checkpoints)
+                    running[future] = j
+                if any_hit or not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    j = running.pop(future)
+                    try:
+                        ok, elapsed, written = future.result()
+                        data_store.import_frames(written)
+                    except Exception as e:
+                        print(f"\n [X] {stages[j]['module']} 子行程錯誤: {e}")
+                        ok, elapsed = False, 0.0
+                    finish(j, ok, elapsed)
+
+    for j, stage in enumerate(stages):
+        if not timings[j][0]:
+            print(f"警告：'{stage['module']}' 執行失敗，下游結果可能不完整。")
+
+    if checkpoint_all:
+        written = data_store.flush()
+        print(f"\n [V] 已將 {len(written)} 個中間檔案寫入硬碟。")
+
+    print_timing_summary(stages, deps, timings, time.time() - start_time, cached)
+    return [(stage['module'],) + timings[j] for j, stage in enumerate(stages)]
@@ -1,17 +1,17 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import os
+import data_store
 
 def plot_accuracy_chart(input_file):
     print(f"--- 正在繪製準確率折線圖: {input_file} ---")
     
-    if not os.path.exists(input_file):
+    if not data_store.exists(input_file):
         print(f"錯誤: 找不到檔案 '{input_file}'")
         return
 
     # 1. 讀取數據
-    df = pd.read_csv(input_file)
+    df = data_store.read_csv(input_file)
     
     # 2. 轉換日期格式並排序
     df['date'] = pd.to_datetime(df['date'])
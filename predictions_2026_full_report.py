@@ -1,28 +1,24 @@
+import sys
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
+import data_store
+import master_schema
+import walk_forward
+from feature_builder import FEATURE_COLUMNS, MASTER_COLUMNS
 
-def predict_2026_season_full(input_file):
+def predict_2026_season_full(input_file, interval='weekly', workers=None, engine=None):
     print(f"--- 執行 2026 賽季完整預測與準確率分析 ---")
     
     try:
-        df = pd.read_csv(input_file)
+        df = master_schema.read_master(input_file, usecols=lambda c: c in MASTER_COLUMNS)
         print(f"成功讀取數據: {len(df)} 筆")
     except Exception as e:
         print(f"讀取失敗: {e}")
         return
 
     # 2. 定義特徵
-    feature_columns = [
-        'Diff_Days_Since_Last_Game', 'Diff_Before_Game_Streak',
-        'Diff_Before_Game_Win_Pct_Last_5', 'Diff_Before_Game_Avg_Margin_Last_5',
-        'Diff_Before_Game_Win_Pct_Last_10', 'Diff_CS_Win_Pct_L5', 'Diff_CS_Avg_Margin_L5',
-        'Diff_Before_Game_H2H_Win_Pct_L5', 'Diff_Before_Game_H2H_Avg_Margin_L5',
-        'Diff_Total_Injury_Impact', 'Diff_Before_Game_Avg_NetRtg',
-        'Diff_Before_Game_Avg_TOV_Rate', 'Diff_Before_Game_Avg_ORB_Pct'
-    ]
+    feature_columns = FEATURE_COLUMNS
     
     # 檢查欄位
     missing = [c for c in feature_columns if c not in df.columns]
@@ -32,34 +28,26 @@ def predict_2026_season_full(input_file):
 
     df = df.fillna(0)
 
-    # 3. 切分訓練 (2016-2025) 與 測試 (2026)
-    train_df = df[df['Season_Year'] < 2026].copy()
-    test_df = df[df['Season_Year'] == 2026].copy()
+    # 3. 測試期 = 2026 賽季；每個 fold 只用之前的比賽訓練 (與 v500 每天重新訓練相同)
+    test_mask = df['Season_Year'] == 2026
+    test_df = df[test_mask].copy()
     
     if test_df.empty:
         print("錯誤: 找不到 2026 賽季數據")
         return
         
-    print(f"訓練集: {len(train_df)} 筆")
+    print(f"起始訓練集: {int((pd.to_datetime(df['date']) < pd.to_datetime(test_df['date']).min()).sum())} 筆 (逐 fold 擴充)")
     print(f"測試集 (2026): {len(test_df)} 筆")
     
-    X_train = train_df[feature_columns]
-    y_train = train_df['Win']
-    X_test = test_df[feature_columns]
     y_test = test_df['Win']
     
-    # 4. 訓練
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train_scaled, y_train)
-    print("模型訓練完成")
+    # 4. 滾動訓練與預測 (各 fold 結果有快取，資料沒變時直接載入)
+    wf = walk_forward.run_walk_forward(df, feature_columns, test_mask, interval=interval, engine=engine, workers=workers)
+    print("模型已就緒")
     
     # 5. 預測
-    y_probs = model.predict_proba(X_test_scaled)[:, 1]
-    y_pred = model.predict(X_test_scaled)
+    y_probs = wf['Win_Prob'].astype(float).values
+    y_pred = wf['Predicted_Win'].astype(int).values
     
     # 6. 整理結果
     results = test_df[['date', 'Team_Abbr', 'Opp_Abbr', 'Win']].copy()
@@ -86,8 +74,14 @@ def predict_2026_season_full(input_file):
         
     # 8. 存檔
     output_file = "predictions_2026_full_report.csv"
-    results.to_csv(output_file, index=False, encoding='utf-8-sig')
+    data_store.write_csv(results, output_file, index=False, encoding='utf-8-sig')
     print(f"\n詳細報告已儲存至: {output_file}")
 
 if __name__ == "__main__":
-    predict_2026_season_full("FINAL_MASTER_DATASET_v109_FIXED.csv")
\ No newline at end of file
+    # --interval daily|weekly|N: 重新訓練的間隔 (預設每週)
+    # --workers N: 平行訓練 fold 的行程數
+    # --engine rf|hist_gb|xgboost: 模型引擎 (預設依 model_config.json)
+    interval = sys.argv[sys.argv.index('--interval') + 1] if '--interval' in sys.argv else 'weekly'
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+    engine = sys.argv[sys.argv.index('--engine') + 1] if '--engine' in sys.argv else None
+    predict_2026_season_full(master_schema.MASTER_FILE, interval=interval, workers=workers, engine=engine)
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+【v900 - 賽季賽程庫 (Schedule Store)】
+每個月的 NBA_{season}_games-{month}.html 只抓一次，
+把所有場次整理成以日期為索引的小表 (nba_schedule_v900.csv)，之後直接查表：
+- get_games(date)：某天的所有對戰 [(主隊, 客隊), ...]
+- next_slate(start_date, days)：從 start_date 起最近的比賽日 (最多 1~2 次請求)
+- next_game_date(last_data_date)：資料庫最後一天之後的預測目標日 (v500 / 實戰預測器 / 對戰矩陣共用)
+- season_games(season, start_date)：整個例行賽剩餘的賽程 (賽季模擬用)
+沒有比賽或頁面不存在 (尚未公布、休賽季) 的月份也會留下一列只有 fetched_at 的標記列，
+在 REFRESH_SECONDS 內不會重複請求。
+"""
+import re
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import lxml.html
+import data_store
+import scrape_client
+
+SCHEDULE_FILE = "nba_schedule_v900.csv"
+SCHEDULE_COLUMNS = ['date', 'home', 'away', 'season', 'month', 'fetched_at']
+# 月賽程 (時間/延賽可能變動) 超過這個時間就重新抓取
+REFRESH_SECONDS = 6 * 3600
+# 例行賽涵蓋的月份 (10~12 月屬於前一個年份)
+SEASON_MONTHS = [10, 11, 12, 1, 2, 3, 4]
+
+_ROW = "//table[@id='schedule']/tbody/tr"
+_TEAM = re.compile(r'/teams/(\w{3})/')
+
+_STATE = {'table': None}
+
+
+def _season_month(date):
+    date = pd.Timestamp(date)
+    season = date.year + 1 if date.month >= 10 else date.year
+    return season, date.strftime("%B").lower()
+
+
+def _month_url(season, month_name):
+    return f"https://www.basketball-reference.com/leagues/NBA_{season}_games-{month_name}.html"
+
+
+def parse_month_page(content):
+    """解析月賽程頁面 -> [(YYYY-MM-DD, 主隊, 客隊), ...] (依頁面順序)"""
+    root = lxml.html.document_fromstring(content)
+    games = []
+    for row in root.xpath(_ROW):
+        date_th = row.xpath("./th[@data-stat='date_game']")
+        if not date_th: continue
+        try:
+            game_date = datetime.strptime(date_th[0].text_content().strip(), "%a, %b %d, %Y")
+        except ValueError:
+            continue
+        abbrs = []
+        for stat in ('visitor_team_name', 'home_team_name'):
+            link = row.xpath(f"./td[@data-stat='{stat}']//a/@href")
+            m = _TEAM.search(link[0]) if link else None
+            abbrs.append(m.group(1) if m else None)
+        v_abbr, h_abbr = abbrs
+        if v_abbr and h_abbr:
+            games.append((game_date.strftime('%Y-%m-%d'), h_abbr, v_abbr))
+    return games
+
+
+def _load():
+    if _STATE['table'] is None:
+        if data_store.exists(SCHEDULE_FILE):
+            _STATE['table'] = data_store.read_csv(SCHEDULE_FILE)
+        else:
+            _STATE['table'] = pd.DataFrame(columns=SCHEDULE_COLUMNS)
+    return _STATE['table']
+
+
+def _refresh_month(season, month_name):
+    """
+    抓取並替換整個月份。
+    失敗時保留舊資料；沒有舊資料或頁面上沒有比賽時寫入標記列 (date / home / away 為空)。
+    """
+    response = scrape_client.fetch(_month_url(season, month_name), retries=1, delay=0)
+    table = _load()
+    in_month = (table['season'] == season) & (table['month'] == month_name)
+    if response is None and table.loc[in_month, 'home'].notna().any():
+        return False
+    now = time.time()
+    games = parse_month_page(response.content) if response is not None else []
+    rows = [{'date': d, 'home': h, 'away': a, 'season': season, 'month': month_name, 'fetched_at': now}
+            for d, h, a in games]
+    if not rows:
+        rows = [{'date': None, 'home': None, 'away': None, 'season': season, 'month': month_name, 'fetched_at': now}]
+    keep = table[~in_month]
+    new = pd.DataFrame(rows, columns=SCHEDULE_COLUMNS)
+    _STATE['table'] = pd.concat([keep, new], ignore_index=True) if not keep.empty else new
+    data_store.write_csv(_STATE['table'], SCHEDULE_FILE, index=False)
+    return response is not None
+
+
+def ensure_month(date):
+    """確保 date 所屬月份已載入且未過期 (需要時發出一次請求；標記列同樣依 REFRESH_SECONDS 過期)"""
+    season, month_name = _season_month(date)
+    table = _load()
+    month = table[(table['season'] == season) & (table['month'] == month_name)]
+    if not month.empty and time.time() - month['fetched_at'].max() < REFRESH_SECONDS:
+        return
+    _refresh_month(season, month_name)
+
+
+def get_games(date):
+    """查詢某天的所有對戰 [(主隊, 客隊), ...]"""
+    ensure_month(date)
+    table = _load()
+    day = table[table['date'] == pd.Timestamp(date).strftime('%Y-%m-%d')]
+    return list(zip(day['home'], day['away']))
+
+
+def next_slate(start_date, days=7):
+    """
+    從 start_date 起 days 天內最近的比賽日。
+    回傳 (日期 Timestamp, [(主隊, 客隊), ...])；找不到時回傳 (None, [])。
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = start + timedelta(days=days - 1)
+    for month_start in pd.date_range(start.replace(day=1), end, freq='MS'):
+        ensure_month(max(month_start, start))
+
+    table = _load()
+    dates = pd.to_datetime(table['date'])
+    window = table[(dates >= start) & (dates <= end)]
+    if window.empty:
+        return None, []
+    first = window['date'].min()
+    day = window[window['date'] == first]
+    return pd.Timestamp(first), list(zip(day['home'], day['away']))
+
+
+def next_game_date(last_data_date, days=7):
+    """
+    預測目標日：資料庫最後一天的隔天起 days 天內最近的比賽日。
+    回傳 (日期 Timestamp, [(主隊, 客隊), ...])；找不到比賽時為 (隔天, [])。
+    """
+    start = pd.Timestamp(last_data_date).normalize() + timedelta(days=1)
+    target_date, games = next_slate(start, days)
+    return (target_date, games) if target_date is not None else (start, [])
+
+
+def season_games(season, start_date=None):
+    """
+    整個賽季 (10 月 ~ 4 月) 的賽程，可只取 start_date (含) 之後的比賽。
+    回傳依日期排序的 DataFrame [date, home, away]；尚未公布的月份不會出現。
+    (4 月的頁面在季後賽開打後也會列出季後賽，需要時由呼叫端依場次數排除)
+    """
+    for month in SEASON_MONTHS:
+        month_start = pd.Timestamp(season - 1 if month >= 10 else season, month, 1)
+        if start_date is None or month_start + pd.offsets.MonthEnd(0) >= pd.Timestamp(start_date).normalize():
+            ensure_month(month_start)
+
+    table = _load()
+    games = table[(table['season'] == season) & table['home'].notna()]
+    if start_date is not None:
+        games = games[pd.to_datetime(games['date']) >= pd.Timestamp(start_date).normalize()]
+    return games.sort_values('date', kind='stable')[['date', 'home', 'away']].reset_index(drop=True)
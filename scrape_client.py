@@ -0,0 +1,269 @@
+"""
+【v900 - 共用爬蟲連線模組 (Scrape Client)】
+所有對 basketball-reference 的請求都經過這裡：
+1. 全域 Token Bucket 限速 (跨執行緒共用)，取代每個網址後固定 sleep 5~8 秒
+2. 遇到 429 (Too Many Requests) 時依 Retry-After 或指數退避，並暫停所有執行緒
+3. fetch_many()：多執行緒同時抓取 + 解析，讓網路等待與解析重疊
+4. 硬碟回應快取 (.http_cache/)：以 URL 為鍵，依來源設定 TTL，過期時用 ETag / Last-Modified 條件式驗證；
+   離線模式 (NBA_SCRAPE_OFFLINE=1) 只讀快取，可完整重播一次執行
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8'
+}
+
+# BBR 的爬蟲規範約為每分鐘 20 次，預設留一點餘裕 (每 4 秒 1 次)
+DEFAULT_RATE = 0.25
+DEFAULT_BURST = 1
+
+_LOCK = threading.Lock()
+_BUCKET = {
+    'rate': DEFAULT_RATE,
+    'capacity': DEFAULT_BURST,
+    'tokens': float(DEFAULT_BURST),
+    'updated': time.monotonic(),
+    'blocked_until': 0.0,
+}
+_LOCAL = threading.local()
+
+CACHE_DIR = ".http_cache"
+_CACHE = {'enabled': True, 'offline': os.environ.get('NBA_SCRAPE_OFFLINE') == '1'}
+
+HOUR = 3600
+# 比賽日期早於今天 N 天以上的頁面視為「已結束」，不再過期
+FINAL_AFTER_DAYS = 2
+
+# (網址樣式, TTL 秒數)；None = 永不過期。第一個符合的規則生效
+TTL_RULES = [
+    (r'/boxscores/\d{8}0\w{3}\.html', 'by_date'),  # 單場 Box Score：比賽後 FINAL_AFTER_DAYS 天才視為定稿 (數據更正)
+    (r'/boxscores/\?month=', 'by_date'),             # 每日比分頁：比賽結束後抓到的永不過期，近期 1 小時
+    (r'/leagues/NBA_\d{4}_games-', 6 * HOUR),        # 月賽程
+    (r'/friv/injuries', 1 * HOUR),                   # 傷病名單
+    (r'playsport\.cc/gamesData/result', 'by_date'),  # PlaySport 賠率/賽果
+]
+DEFAULT_TTL = 1 * HOUR
+RECENT_TTL = 1 * HOUR
+
+
+def configure_rate(requests_per_sec=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """設定全域請求速率 (每秒請求數) 與可累積的突發量"""
+    with _LOCK:
+        _BUCKET['rate'] = float(requests_per_sec)
+        _BUCKET['capacity'] = max(1, int(burst))
+        _BUCKET['tokens'] = min(_BUCKET['tokens'], _BUCKET['capacity'])
+        _BUCKET['updated'] = time.monotonic()
+
+
+def acquire():
+    """取得一個請求額度；額度不足時阻塞等待"""
+    while True:
+        with _LOCK:
+            now = time.monotonic()
+            if now < _BUCKET['blocked_until']:
+                wait = _BUCKET['blocked_until'] - now
+            else:
+                elapsed = now - _BUCKET['updated']
+                _BUCKET['tokens'] = min(_BUCKET['capacity'], _BUCKET['tokens'] + elapsed * _BUCKET['rate'])
+                _BUCKET['updated'] = now
+                if _BUCKET['tokens'] >= 1:
+                    _BUCKET['tokens'] -= 1
+                    return
+                wait = (1 - _BUCKET['tokens']) / _BUCKET['rate']
+        time.sleep(wait)
+
+
+def penalize(seconds):
+    """被限流 (429) 時：所有執行緒暫停 seconds 秒，並清空額度"""
+    with _LOCK:
+        _BUCKET['blocked_until'] = max(_BUCKET['blocked_until'], time.monotonic() + seconds)
+        _BUCKET['tokens'] = 0.0
+
+
+def _retry_after(response, default):
+    value = response.headers.get('Retry-After')
+    try:
+        return max(float(value), default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _thread_session():
+    """requests.Session 不保證執行緒安全，每個執行緒各用一個"""
+    if not hasattr(_LOCAL, 'session'):
+        _LOCAL.session = requests.Session()
+    return _LOCAL.session
+
+
+def configure_cache(enabled=True, offline=None):
+    """開關回應快取；offline=True 時完全不連網，只使用快取"""
+    _CACHE['enabled'] = enabled
+    if offline is not None:
+        _CACHE['offline'] = offline
+
+
+def _page_date(url):
+    """從網址取出頁面對應的比賽日期 (month/day/year、gametime=YYYY-MM-DD 或 Box Score 的 YYYYMMDD)"""
+    m = re.search(r'month=(\d+)&day=(\d+)&year=(\d{4})', url)
+    if m:
+        return datetime(int(m.group(3)), int(m.group(1)), int(m.group(2)))
+    m = re.search(r'gametime=(\d{4}-\d{2}-\d{2})', url)
+    if m:
+        return datetime.strptime(m.group(1), '%Y-%m-%d')
+    m = re.search(r'/boxscores/(\d{8})0\w{3}\.html', url)
+    if m:
+        return datetime.strptime(m.group(1), '%Y%m%d')
+    return None
+
+
+def cache_ttl(url, fetched_at=None):
+    """
+    回傳該網址的 TTL 秒數 (None = 永不過期)。
+    依日期的頁面：只有在比賽日期 FINAL_AFTER_DAYS 天之後才抓到的內容才算最終版本。
+    """
+    for pattern, ttl in TTL_RULES:
+        if re.search(pattern, url):
+            if ttl != 'by_date':
+                return ttl
+            page_date = _page_date(url)
+            fetched = datetime.fromtimestamp(fetched_at) if fetched_at else datetime.now()
+            if page_date and (fetched - page_date).days >= FINAL_AFTER_DAYS:
+                return None
+            return RECENT_TTL
+    return DEFAULT_TTL
+
+
+def _cache_paths(url):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, key + '.body'), os.path.join(CACHE_DIR, key + '.json')
+
+
+def _load_cached(url):
+    body_path, meta_path = _cache_paths(url)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            return meta, f.read()
+    except (OSError, ValueError):
+        return None, None
+
+
+def _atomic_write(path, data, mode):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store(url, response):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    body_path, meta_path = _cache_paths(url)
+    meta = {
+        'url': url,
+        'final_url': response.url,
+        'fetched_at': time.time(),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': response.headers.get('Content-Type'),
+        'encoding': response.encoding,
+    }
+    _atomic_write(body_path, response.content, 'wb')
+    _atomic_write(meta_path, json.dumps(meta, indent=2), 'w')
+
+
+def _touch(url, meta):
+    meta['fetched_at'] = time.time()
+    _atomic_write(_cache_paths(url)[1], json.dumps(meta, indent=2), 'w')
+
+
+def _cached_response(meta, body):
+    """把快取內容組回 requests.Response，呼叫端不需要任何修改"""
+    response = requests.Response()
+    response._content = body
+    response.status_code = 200
+    response.url = meta.get('final_url') or meta['url']
+    response.encoding = meta.get('encoding')
+    response.headers = CaseInsensitiveDict({'Content-Type': meta.get('content_type') or 'text/html', 'X-Cache': 'HIT'})
+    return response
+
+
+def _is_fresh(url, meta):
+    ttl = cache_ttl(url, meta.get('fetched_at'))
+    return ttl is None or time.time() - meta.get('fetched_at', 0) < ttl
+
+
+def fetch(url, session=None, headers=None, retries=3, delay=15, timeout=15, rate_limited=True):
+    """
+    先查快取，必要時限速後抓取單一網址；成功回傳 response，失敗回傳 None。
+    429 -> 依 Retry-After / 指數退避暫停全域請求；其他錯誤 -> 等待 delay 秒後重試。
+    rate_limited=False 用於非 BBR 的來源 (例如 PlaySport)。
+    """
+    meta, body = _load_cached(url) if _CACHE['enabled'] else (None, None)
+    if meta is not None and (_CACHE['offline'] or _is_fresh(url, meta)):
+        return _cached_response(meta, body)
+    if _CACHE['offline']:
+        print(f"    [離線] 快取中沒有 {url}")
+        return None
+
+    session = session or _thread_session()
+    headers = dict(headers or DEFAULT_HEADERS)
+    if meta is not None:
+        # 條件式驗證：內容沒變時伺服器回 304，不需重新下載
+        if meta.get('etag'): headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+
+    for attempt in range(retries):
+        if rate_limited:
+            acquire()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304 and meta is not None:
+                _touch(url, meta)
+                return _cached_response(meta, body)
+            if response.status_code == 429:
+                backoff = _retry_after(response, delay * (2 ** attempt))
+                print(f"    警告: {url} 被限流 (429)，全部請求暫停 {backoff:.0f} 秒 (第 {attempt + 1}/{retries} 次嘗試)")
+                penalize(backoff)
+                continue
+            response.raise_for_status()
+            if _CACHE['enabled']:
+                _store(url, response)
+            return response
+        except requests.exceptions.RequestException as e:
+            print(f"    警告: 訪問 {url} 失敗 (第 {attempt + 1}/{retries} 次嘗試): {e}")
+            time.sleep(delay)
+    return None
+
+
+def fetch_many(urls, handler, workers=4, **fetch_kwargs):
+    """
+    多執行緒抓取 urls，每個回應交給 handler(url, response) 處理 (response 可能為 None)。
+    實際速度由全域限速決定；回傳結果順序與 urls 相同。
+    Ctrl-C 時取消還在佇列中的網址並立即重新拋出 KeyboardInterrupt (只等進行中的請求自行結束)。
+    """
+    def task(url):
+        return handler(url, fetch(url, **fetch_kwargs))
+
+    # 不用 with：離開 with 時會等所有排隊中的網址跑完，Ctrl-C 要等很久才有反應
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        return list(pool.map(task, urls))
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=False)
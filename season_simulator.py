@@ -0,0 +1,212 @@
+"""
+【v900 - 賽季蒙地卡羅模擬 (Season Simulator)】
+預測剩餘例行賽的戰績分布與季後賽機率：
+1. 勝率矩陣：slate_predictor.predict_all_pairings 一次算出 30x30 的主勝率矩陣 P[主, 客]
+   (只呼叫一次 predict_proba，模擬本身不再碰模型)
+2. 剩餘賽程：schedule_store.season_games (BBR 月賽程頁面，每月只抓一次)，
+   每隊最多補到 GAMES_PER_SEASON 場 (排除季後賽)
+3. 模擬：每一批 (模擬次數 x 場次) 的亂數與 P[主隊, 客隊] 比較，
+   再以 one-hot 矩陣乘法累加每隊勝場；分批交給 ProcessPoolExecutor (--workers 1 = 在目前行程中依序執行)
+4. 輸出：
+   - season_sim_v900.csv：目前戰績、預估勝場 (平均 / P10 / P50 / P90)、前六 / 附加賽 / 分區第一機率
+   - season_sim_distribution_v900.csv：每隊最終勝場數 0~82 的機率
+(勝率矩陣以模擬開始日計算，不含傷病；同勝場以隨機方式決定排名)
+
+用法:
+  python season_simulator.py [--sims N] [--workers N]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import data_store
+import master_schema
+import model_registry
+import schedule_store
+from feature_builder import FEATURE_COLUMNS, MASTER_COLUMNS, build_team_state_index
+from slate_predictor import predict_all_pairings
+
+SUMMARY_FILE = "season_sim_v900.csv"
+DISTRIBUTION_FILE = "season_sim_distribution_v900.csv"
+N_SIMS = 10000
+BATCH_SIMS = 2000
+GAMES_PER_SEASON = 82
+SEED = 42
+
+CONFERENCES = {
+    'East': ['ATL', 'BOS', 'BRK', 'CHI', 'CHO', 'CLE', 'DET', 'IND', 'MIA', 'MIL', 'NYK', 'ORL', 'PHI', 'TOR', 'WAS'],
+    'West': ['DAL', 'DEN', 'GSW', 'HOU', 'LAC', 'LAL', 'MEM', 'MIN', 'NOP', 'OKC', 'PHO', 'POR', 'SAC', 'SAS', 'UTA'],
+}
+TEAMS = sorted(CONFERENCES['East'] + CONFERENCES['West'])
+TEAM_POS = {team: i for i, team in enumerate(TEAMS)}
+PLAYOFF_SEEDS = 6
+PLAY_IN_SEEDS = 10
+
+
+# --- 輸入 ---
+def current_standings(df, season):
+    """主資料表 (一列 = 一場，Team_Abbr 為主隊) -> 每隊本季已賽場次與勝場 (依 TEAMS 順序的陣列)"""
+    games = df[df['Season_Year'] == season]
+    home = games['Team_Abbr'].map(TEAM_POS).to_numpy()
+    away = games['Opp_Abbr'].map(TEAM_POS).to_numpy()
+    home_won = games['Win'].to_numpy() == 1
+    wins = (np.bincount(home[home_won], minlength=len(TEAMS))
+            + np.bincount(away[~home_won], minlength=len(TEAMS)))
+    played = np.bincount(home, minlength=len(TEAMS)) + np.bincount(away, minlength=len(TEAMS))
+    return played, wins
+
+
+def remaining_schedule(schedule, played):
+    """依日期排序的賽程 -> (主隊位置, 客隊位置) 陣列；兩隊都還沒打滿 GAMES_PER_SEASON 場的比賽才算例行賽"""
+    counts = played.copy()
+    homes, aways = [], []
+    for home, away in zip(schedule['home'], schedule['away']):
+        h, a = TEAM_POS.get(home), TEAM_POS.get(away)
+        if h is None or a is None or counts[h] >= GAMES_PER_SEASON or counts[a] >= GAMES_PER_SEASON:
+            continue
+        counts[h] += 1
+        counts[a] += 1
+        homes.append(h)
+        aways.append(a)
+    return np.array(homes, dtype=np.intp), np.array(aways, dtype=np.intp)
+
+
+def probability_matrix(team_index, target_date, scaler, model):
+    """30x30 主勝率矩陣 P[主, 客] (沒有數據的球隊 = 0.5，對角線不使用)"""
+    matrix = np.full((len(TEAMS), len(TEAMS)), 0.5)
+    pairings = predict_all_pairings(team_index, target_date, scaler, model)
+    pairings = pairings[pairings['Home'].isin(TEAM_POS) & pairings['Away'].isin(TEAM_POS)]
+    matrix[pairings['Home'].map(TEAM_POS).to_numpy(), pairings['Away'].map(TEAM_POS).to_numpy()] = \
+        pairings['Home_Win_Prob'].to_numpy(dtype=float)
+    return matrix
+
+
+# --- 模擬 ---
+def simulate_batch(task):
+    """
+    一批模擬：回傳 (每隊最終勝場數的次數分布 [30, 83], 每隊分區排名的次數分布 [30, 15])。
+    勝場 = 目前勝場 + 主場勝 @ 主隊 one-hot + 客場勝 @ 客隊 one-hot。
+    """
+    probs, homes, aways, wins, n_sims, seed = task
+    rng = np.random.default_rng(seed)
+    home_onehot = np.zeros((len(homes), len(TEAMS)), dtype=np.float32)
+    home_onehot[np.arange(len(homes)), homes] = 1
+    away_onehot = np.zeros((len(aways), len(TEAMS)), dtype=np.float32)
+    away_onehot[np.arange(len(aways)), aways] = 1
+
+    home_won = (rng.random((n_sims, len(homes)), dtype=np.float32) < probs).astype(np.float32)
+    totals = wins + (home_won @ home_onehot + (1 - home_won) @ away_onehot).astype(np.int64)
+
+    win_counts = np.zeros((len(TEAMS), GAMES_PER_SEASON + 1), dtype=np.int64)
+    for i in range(len(TEAMS)):
+        win_counts[i] = np.bincount(np.minimum(totals[:, i], GAMES_PER_SEASON), minlength=GAMES_PER_SEASON + 1)
+
+    seed_counts = np.zeros((len(TEAMS), len(CONFERENCES['East'])), dtype=np.int64)
+    for teams in CONFERENCES.values():
+        cols = [TEAM_POS[t] for t in teams]
+        # 勝場相同時加上 0~1 的亂數決定排名
+        score = totals[:, cols] + rng.random((n_sims, len(cols)))
+        rank = np.argsort(np.argsort(-score, axis=1), axis=1)
+        for j, col in enumerate(cols):
+            seed_counts[col] = np.bincount(rank[:, j], minlength=len(cols))
+    return win_counts, seed_counts
+
+
+def simulate_season(matrix, homes, aways, wins, n_sims=N_SIMS, workers=None, seed=SEED):
+    """回傳 (勝場分布機率 [30, 83], 分區排名機率 [30, 15])"""
+    workers = workers or min(4, os.cpu_count() or 1)
+    probs = matrix[homes, aways].astype(np.float32)
+    sizes = [min(BATCH_SIMS, n_sims - start) for start in range(0, n_sims, BATCH_SIMS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(probs, homes, aways, wins, size, s) for size, s in zip(sizes, seeds)]
+    if workers == 1 or len(tasks) == 1:
+        results = [simulate_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_batch, tasks))
+    win_counts = sum(r[0] for r in results)
+    seed_counts = sum(r[1] for r in results)
+    return win_counts / n_sims, seed_counts / n_sims
+
+
+def _percentile(dist, q):
+    """勝場機率分布 -> 第 q 百分位的勝場數"""
+    return np.argmax(np.cumsum(dist, axis=1) >= q, axis=1)
+
+
+def summarize(played, wins, remaining, win_dist, seed_dist):
+    conference = {team: conf for conf, teams in CONFERENCES.items() for team in teams}
+    summary = pd.DataFrame({
+        'Team': TEAMS,
+        'Conference': [conference[t] for t in TEAMS],
+        'W': wins,
+        'L': played - wins,
+        'Remaining': remaining,
+        'Proj_W': (win_dist * np.arange(GAMES_PER_SEASON + 1)).sum(axis=1).round(1),
+        'W_P10': _percentile(win_dist, 0.10),
+        'W_P50': _percentile(win_dist, 0.50),
+        'W_P90': _percentile(win_dist, 0.90),
+        'Top_Seed': seed_dist[:, 0].round(4),
+        'Playoff_Odds': seed_dist[:, :PLAYOFF_SEEDS].sum(axis=1).round(4),
+        'Play_In_Odds': seed_dist[:, PLAYOFF_SEEDS:PLAY_IN_SEEDS].sum(axis=1).round(4),
+    })
+    return summary.sort_values(['Conference', 'Proj_W'], ascending=[True, False], kind='stable')
+
+
+def main():
+    n_sims = int(sys.argv[sys.argv.index('--sims') + 1]) if '--sims' in sys.argv else N_SIMS
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+
+    print("--- 賽季蒙地卡羅模擬 ---")
+    if not data_store.exists(master_schema.MASTER_FILE):
+        print(f"錯誤: 找不到 '{master_schema.MASTER_FILE}'")
+        return
+    df = master_schema.read_master(usecols=lambda c: c in MASTER_COLUMNS)
+    df['date_dt'] = pd.to_datetime(df['date'])
+    season = int(df['Season_Year'].max())
+    start_date = df['date_dt'].max() + timedelta(days=1)
+
+    df_train = df.fillna(0)
+    scaler, model = model_registry.load_or_train(df_train[FEATURE_COLUMNS], df_train['Win'], FEATURE_COLUMNS,
+                                                 dates=df_train['date_dt'], keys=df_train['game_id'])
+
+    played, wins = current_standings(df, season)
+    schedule = schedule_store.season_games(season, start_date)
+    homes, aways = remaining_schedule(schedule, played)
+    if len(homes) == 0:
+        print(f"錯誤: 找不到 {start_date.strftime('%Y-%m-%d')} 之後的 {season} 例行賽賽程")
+        return
+    remaining = np.bincount(homes, minlength=len(TEAMS)) + np.bincount(aways, minlength=len(TEAMS))
+    print(f"{season} 賽季：已賽 {int(played.sum()) // 2} 場，剩餘 {len(homes)} 場 "
+          f"({start_date.strftime('%Y-%m-%d')} 起)")
+
+    start = time.perf_counter()
+    team_index = build_team_state_index(df, before_date=start_date)
+    matrix = probability_matrix(team_index, start_date, scaler, model)
+    print(f"30x30 勝率矩陣完成 ({time.perf_counter() - start:.2f}s)")
+
+    start = time.perf_counter()
+    win_dist, seed_dist = simulate_season(matrix, homes, aways, wins, n_sims, workers)
+    print(f"{n_sims} 次模擬完成 ({time.perf_counter() - start:.2f}s)")
+
+    summary = summarize(played, wins, remaining, win_dist, seed_dist)
+    for conf in CONFERENCES:
+        print(f"\n[{conf}]")
+        print(f"{'球隊':<4} | {'戰績':>7} | {'預估勝場':>8} | {'P10-P90':>7} | {'前六':>6} | {'附加賽':>6} | {'第一':>6}")
+        for _, row in summary[summary['Conference'] == conf].iterrows():
+            print(f"{row['Team']:<4} | {row['W']:>3}-{row['L']:<3} | {row['Proj_W']:>8.1f} | "
+                  f"{row['W_P10']:>3}-{row['W_P90']:<3} | {row['Playoff_Odds']:>6.1%} | "
+                  f"{row['Play_In_Odds']:>6.1%} | {row['Top_Seed']:>6.1%}")
+
+    distribution = pd.DataFrame(win_dist.round(5), columns=[f"W_{w}" for w in range(GAMES_PER_SEASON + 1)])
+    distribution.insert(0, 'Team', TEAMS)
+    data_store.write_csv(summary, SUMMARY_FILE, index=False)
+    data_store.write_csv(distribution, DISTRIBUTION_FILE, index=False)
+    print(f"\n結果已儲存至: {SUMMARY_FILE}, {DISTRIBUTION_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+【v900 - 整日賽程批次預測 (Slate Predictor)】
+一次把整天 (或任意多組) 的對戰組合做成特徵矩陣，
+只呼叫一次 scaler.transform + model.predict_proba，
+回傳與 v500 匯出檔相同欄位的 DataFrame。
+也可以一次評估全部 30x29 種假想對戰。
+"""
+import pandas as pd
+from feature_builder import FEATURE_COLUMNS, build_feature_matrix
+
+EXPORT_COLUMNS = [
+    'Date', 'Home', 'Away', 'Home_Win_Prob', 'Confidence',
+    'Diff_NetRtg', 'Diff_Injury', 'Diff_Streak', 'Home_Injuries', 'Away_Injuries'
+]
+
+
+def confidence_label(prob):
+    if prob >= 0.65: return "🟢 High (Home)"
+    if prob <= 0.35: return "🔴 High (Away)"
+    return "Toss-up"
+
+
+def split_playable(team_index, games):
+    """把對戰分成 (可預測, 數據不足) 兩組"""
+    playable, skipped = [], []
+    for home, away in games:
+        if home in team_index.index and away in team_index.index:
+            playable.append((home, away))
+        else:
+            skipped.append((home, away))
+    return playable, skipped
+
+
+def predict_slate(team_index, games, target_date, scaler, model, injuries=None):
+    """
+    games: [(主隊, 客隊), ...] (schedule_store.get_games / next_game_date 的回傳格式)
+    injuries: {球隊: (impact, [傷兵名單])}，沒有的球隊視為 0
+    數據不足的對戰會被略過 (可先用 split_playable 找出來)。
+    """
+    games, _ = split_playable(team_index, games)
+    if not games:
+        return pd.DataFrame(columns=EXPORT_COLUMNS)
+
+    injuries = injuries or {}
+    homes = [h for h, _ in games]
+    aways = [a for _, a in games]
+    h_impact = [injuries.get(t, (0.0, []))[0] for t in homes]
+    a_impact = [injuries.get(t, (0.0, []))[0] for t in aways]
+
+    features = build_feature_matrix(team_index, homes, aways, target_date, h_impact, a_impact)
+    probs = model.predict_proba(scaler.transform(features[FEATURE_COLUMNS]))[:, 1]
+
+    home_state = team_index.loc[homes]
+    away_state = team_index.loc[aways]
+    result = pd.DataFrame({
+        'Date': pd.Timestamp(target_date).strftime('%Y-%m-%d'),
+        'Home': homes,
+        'Away': aways,
+        'Home_Win_Prob': [round(p, 3) for p in probs],
+        'Confidence': [confidence_label(p) for p in probs],
+        'Diff_NetRtg': (home_state['NetRtg'].values - away_state['NetRtg'].values).round(2),
+        'Diff_Injury': features['Diff_Total_Injury_Impact'].round(2).values,
+        'Diff_Streak': home_state['Streak'].values - away_state['Streak'].values,
+        'Home_Injuries': ["; ".join(injuries.get(t, (0.0, []))[1]) for t in homes],
+        'Away_Injuries': ["; ".join(injuries.get(t, (0.0, []))[1]) for t in aways],
+    })
+    return result[EXPORT_COLUMNS]
+
+
+def predict_all_pairings(team_index, target_date, scaler, model, injuries=None):
+    """所有球隊兩兩對戰 (主客各一次，30 隊 = 870 組)"""
+    teams = list(team_index.index)
+    games = [(home, away) for home in teams for away in teams if home != away]
+    return predict_slate(team_index, games, target_date, scaler, model, injuries)
@@ -0,0 +1,229 @@
+"""
+【v900 - v800 策略參數回測 (Strategy Sweep)】
+把 strategy_engine.v800_decisions 的區間邊界、Value 加權與 EV 門檻換成一整組參數網格，
+用歷史資料重播每一種組合，輸出 ROI、命中率與最大回撤：
+1. 重播資料
+   - live：final_analysis_report_v800(_graded).csv 當時的主勝率與賠率
+   - holdout：predictions_2026_full_report.csv 的主勝率 + odds_for_*.csv 的賠率
+   比賽結果優先用結算報告的比分，否則從原始比賽資料查詢。
+2. 評分：一批參數組合以 (組合數 x 場次) 的陣列一次算完 (不產生訊號字串)
+3. 多核心：參數組合分塊後交給 ProcessPoolExecutor (--workers 1 = 在目前行程中依序執行)
+
+用法:
+  python strategy_backtest.py [--workers N] [--min-bets N]
+"""
+import glob
+import itertools
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import data_store
+import strategy_engine
+
+RAW_GAMES = "nba_game_data_raw_v52_PATCHED.csv"
+LIVE_REPORTS = ["final_analysis_report_v800_graded.csv", "final_analysis_report_v800.csv"]
+HOLDOUT_REPORT = "predictions_2026_full_report.csv"
+OUTPUT_FILE = "strategy_sweep_v800.csv"
+
+# 預設參數網格 (未列出的參數沿用 V800_PARAMS)
+DEFAULT_GRID = {
+    'solid_low': [0.60, 0.65, 0.70, 0.75],
+    'solid_high': [0.85, 0.90, 0.95],
+    'sniper_low': [0.10, 0.15, 0.20],
+    'sniper_high': [0.25, 0.30, 0.35],
+    'value_low': [0.45, 0.50, 0.55],
+    'value_high': [0.60, 0.65],
+    'value_boost': [0.0, 0.04, 0.08, 0.12],
+    'lock_ev': [0.0, 0.05, 0.10],
+    'risky_ev': [0.10, 0.15, 0.20, 0.25],
+}
+CHUNK_SIZE = 512
+MIN_BETS = 30
+
+
+# --- 重播資料 ---
+def _game_results(start):
+    """原始比賽資料 -> (日期, 主隊, 客隊) 的主隊是否獲勝"""
+    if not data_store.exists(RAW_GAMES):
+        return pd.DataFrame(columns=['Date', 'Home', 'Away', 'Home_Won'])
+    games = data_store.read_table(RAW_GAMES, columns=['date', 'home_team', 'away_team', 'home_pts', 'away_pts'],
+                                  start=start)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(games['date'].astype(str), format='%Y%m%d').dt.strftime('%Y-%m-%d'),
+        'Home': games['home_team'], 'Away': games['away_team'],
+        'Home_Won': (games['home_pts'] > games['away_pts']).astype(float),
+    })
+
+
+def _attach_results(df):
+    """補上 Home_Won (結算報告有比分時優先使用)；沒有結果的比賽移除"""
+    results = _game_results(df['Date'].min())
+    df = df.merge(results, on=['Date', 'Home', 'Away'], how='left')
+    if 'Home_Score' in df.columns:
+        scored = df['Home_Score'].notna() & df['Away_Score'].notna()
+        df.loc[scored, 'Home_Won'] = (df.loc[scored, 'Home_Score'] > df.loc[scored, 'Away_Score']).astype(float)
+    return df[df['Home_Won'].notna()]
+
+
+def _finish_replay(df):
+    if 'Home_Won' not in df.columns:
+        df = _attach_results(df)
+    df = df[df['Odds_Home'].notna() & df['Odds_Away'].notna()]
+    return df.sort_values(['Date', 'Home'], kind='stable').reset_index(drop=True)[
+        ['Date', 'Home', 'Away', 'Home_Win_Prob', 'Odds_Home', 'Odds_Away', 'Home_Won']]
+
+
+def load_live_replay():
+    """v800 報告中當時的預測與賠率"""
+    for path in LIVE_REPORTS:
+        if data_store.exists(path):
+            df = data_store.read_csv(path)
+            df['Odds_Home'] = strategy_engine.numeric_column(df, 'Odds_Home')
+            df['Odds_Away'] = strategy_engine.numeric_column(df, 'Odds_Away')
+            return _finish_replay(df.drop_duplicates(subset=['Date', 'Home'], keep='first'))
+    return None
+
+
+def load_holdout_replay():
+    """2026 holdout 預測 + 每日賠率檔"""
+    if not data_store.exists(HOLDOUT_REPORT):
+        return None
+    pred = data_store.read_csv(HOLDOUT_REPORT)
+    pred = pred.rename(columns={'date': 'Date', 'Team_Abbr': 'Home', 'Opp_Abbr': 'Away', 'Win_Prob': 'Home_Win_Prob'})
+
+    pattern = re.compile(r"odds_for_(\d{4}-\d{2}-\d{2})\.csv")
+    odds = []
+    for path in sorted(glob.glob("odds_for_*.csv")):
+        match = pattern.match(os.path.basename(path))
+        if match:
+            odds.append(data_store.read_csv(path).assign(Date=match.group(1)))
+    if not odds:
+        return None
+    odds = pd.concat(odds, ignore_index=True).rename(columns={'Home_Abbr': 'Home', 'Away_Abbr': 'Away'})
+    odds['Odds_Home'] = strategy_engine.numeric_column(odds, 'Odds_Home')
+    odds['Odds_Away'] = strategy_engine.numeric_column(odds, 'Odds_Away')
+    odds = odds.drop_duplicates(subset=['Date', 'Home', 'Away'], keep='last')
+
+    df = pred[['Date', 'Home', 'Away', 'Home_Win_Prob', 'Win']].merge(
+        odds[['Date', 'Home', 'Away', 'Odds_Home', 'Odds_Away']], on=['Date', 'Home', 'Away'])
+    # full report 的 Win 就是主隊勝負
+    return _finish_replay(df.rename(columns={'Win': 'Home_Won'}))
+
+
+# --- 參數網格 ---
+def _valid(params):
+    p = dict(strategy_engine.V800_PARAMS, **params)
+    return (p['sniper_low'] < p['sniper_high'] <= p['value_low'] < p['value_high']
+            and p['value_high'] <= p['solid_low'] < p['solid_high'])
+
+
+def build_grid(grid=None):
+    """參數網格 -> 參數組合清單 (排除區間重疊或順序顛倒的組合)"""
+    grid = grid or DEFAULT_GRID
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    return [c for c in combos if _valid(c)]
+
+
+# --- 向量化評分 ---
+def score_params(replay, combos):
+    """
+    一次評分多組參數：回傳每組的下注數、命中數、淨利 (單位)、ROI、命中率與最大回撤。
+    replay 的 Home_Won 為 1/0；每注 1 單位，贏得 (賠率 - 1)，輸掉 -1。
+    """
+    hp = replay['Home_Win_Prob'].to_numpy(dtype=float)
+    odds_home = replay['Odds_Home'].to_numpy(dtype=float)
+    odds_away = replay['Odds_Away'].to_numpy(dtype=float)
+    home_won = replay['Home_Won'].to_numpy(dtype=float) == 1
+    ev_home = hp * odds_home - 1
+    ev_away = (1.0 - hp) * odds_away - 1
+
+    # 每個參數變成 (組合數, 1) 的欄向量，與 (場次,) 的資料廣播成 (組合數, 場次)
+    params = {name: np.array([c[name] for c in combos], dtype=float)[:, None] for name in combos[0]}
+    side = strategy_engine.v800_decisions(hp, ev_home, ev_away, odds_home, params)['side']
+
+    bet = side != 0
+    won = ((side == 1) & home_won) | ((side == -1) & ~home_won)
+    profit = np.where(won, np.where(side == 1, odds_home, odds_away) - 1, np.where(bet, -1.0, 0.0))
+
+    cumulative = np.cumsum(profit, axis=1)
+    peak = np.maximum.accumulate(np.maximum(cumulative, 0.0), axis=1)
+    bets = bet.sum(axis=1)
+    wins = won.sum(axis=1)
+    net = cumulative[:, -1] if cumulative.shape[1] else np.zeros(len(combos))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = pd.DataFrame(combos)
+        result['Bets'] = bets
+        result['Wins'] = wins
+        result['Hit_Rate'] = wins / bets
+        result['Net_Units'] = net
+        result['ROI'] = net / bets
+        result['Max_Drawdown'] = (peak - cumulative).max(axis=1) if cumulative.shape[1] else 0.0
+    return result
+
+
+def sweep(replay, combos, workers=None):
+    """把參數組合分塊評分 (workers > 1 時使用多個行程)"""
+    workers = workers or min(4, os.cpu_count() or 1)
+    chunks = [combos[i:i + CHUNK_SIZE] for i in range(0, len(combos), CHUNK_SIZE)]
+    if workers == 1 or len(chunks) == 1:
+        parts = [score_params(replay, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(score_params, itertools.repeat(replay), chunks))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _print_top(label, results, baseline, min_bets):
+    print(f"\n[{label}] 目前參數 (V800_PARAMS): {int(baseline['Bets'])} 注 | 命中 {baseline['Hit_Rate']:.1%} | "
+          f"淨利 {baseline['Net_Units']:+.2f}u | ROI {baseline['ROI']:+.1%} | 最大回撤 {baseline['Max_Drawdown']:.2f}u")
+    top = results[results['Bets'] >= min_bets].sort_values('ROI', ascending=False).head(10)
+    if top.empty:
+        print(f"  (沒有下注數 >= {min_bets} 的組合)")
+        return
+    param_cols = [c for c in results.columns if c in strategy_engine.V800_PARAMS]
+    print(f"  ROI 前 {len(top)} 名 (下注數 >= {min_bets}):")
+    for _, row in top.iterrows():
+        params = ' '.join(f"{c}={row[c]:g}" for c in param_cols)
+        print(f"  {row['ROI']:+7.1%} | {int(row['Bets']):>4} 注 | 命中 {row['Hit_Rate']:.1%} | "
+              f"回撤 {row['Max_Drawdown']:5.2f}u | {params}")
+
+
+def main():
+    workers = None
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+    min_bets = MIN_BETS
+    if '--min-bets' in sys.argv:
+        min_bets = int(sys.argv[sys.argv.index('--min-bets') + 1])
+
+    print("--- v800 策略參數回測 ---")
+    combos = build_grid()
+    param_names = list(combos[0])
+    baseline = [{name: strategy_engine.V800_PARAMS[name] for name in param_names}]
+
+    outputs = []
+    for label, loader in [('live', load_live_replay), ('holdout', load_holdout_replay)]:
+        replay = loader()
+        if replay is None or replay.empty:
+            print(f"\n[{label}] 沒有可重播的資料 (需要賠率與比賽結果)，略過。")
+            continue
+        start = time.perf_counter()
+        results = sweep(replay, combos, workers)
+        elapsed = time.perf_counter() - start
+        print(f"\n[{label}] {len(replay)} 場 ({replay['Date'].min()} ~ {replay['Date'].max()}) | "
+              f"{len(combos)} 組參數 | {elapsed:.2f}s")
+        _print_top(label, results, score_params(replay, baseline).iloc[0], min_bets)
+        outputs.append(results.assign(Replay=label))
+
+    if outputs:
+        data_store.write_csv(pd.concat(outputs, ignore_index=True), OUTPUT_FILE, index=False)
+        print(f"\n完整結果已儲存至: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+【v900 - 向量化投注策略引擎 (Strategy Engine)】
+v600 / v800 價值分析器共用：
+1. compute_ev()：整欄計算 EV_Home / EV_Away (取代 df.apply(calculate_ev, axis=1))
+2. v600_decisions() / v800_decisions()：用陣列遮罩判斷區間與下注方向，不產生任何字串
+3. render_v600_signals() / render_v800_signals()：只在輸出報表時把決策轉成 Bet_Signal 字串
+   (字串與原本逐列的 get_signal / get_v800_signal 完全相同)
+策略門檻集中在 V600_PARAMS / V800_PARAMS，可以對整季歷史與大量參數組合快速重跑。
+"""
+import numpy as np
+import pandas as pd
+
+# v600：EV > 0 就下注；EV 超過 star_ev 加 ★，主勝率 >= home_conf (或 <= away_conf) 加 🔥
+V600_PARAMS = {'star_ev': 0.10, 'home_conf': 0.65, 'away_conf': 0.35}
+
+# v800.2 (依 v850 校準報告)：各區間的主勝率範圍與 EV 門檻
+V800_PARAMS = {
+    'solid_low': 0.70, 'solid_high': 0.90,    # A. 主勝穩膽區；>= solid_high 為主隊 Lock 區
+    'sniper_low': 0.20, 'sniper_high': 0.30,  # B. 客勝狙擊區；< sniper_low 為客隊 Lock 區
+    'value_low': 0.50, 'value_high': 0.60,    # C. 價值挖掘區 (模型低估主隊)
+    'value_boost': 0.08,                      # C. 主勝率加權後再算 EV
+    'fire_ev': 0.10,                          # A/B. EV 超過此值加 🔥
+    'lock_ev': 0.05,                          # D. 極端區要求的 EV 門檻
+    'risky_ev': 0.15,                         # 其他區間只投高 EV
+}
+
+# v800 區間代碼
+ZONE_NO_ODDS, ZONE_SOLID, ZONE_SNIPER, ZONE_VALUE, ZONE_LOCK_HOME, ZONE_LOCK_AWAY, ZONE_RISKY = range(7)
+
+
+def numeric_column(df, col):
+    """欄位轉成 float 陣列 (不存在或無法轉換的值為 NaN)"""
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+
+
+def home_win_prob(df):
+    """主勝率欄位 (相容 v500 的 Home_Win_Prob 與舊版的 Predicted_Prob_Win (1))"""
+    for col in ('Home_Win_Prob', 'Predicted_Prob_Win (1)'):
+        if col in df.columns:
+            return numeric_column(df, col)
+    return np.full(len(df), 0.5)
+
+
+def compute_ev(df):
+    """回傳 (EV_Home, EV_Away) 陣列；沒有賠率的一方為 NaN"""
+    hp = home_win_prob(df)
+    ev_home = hp * numeric_column(df, 'Odds_Home') - 1
+    ev_away = (1.0 - hp) * numeric_column(df, 'Odds_Away') - 1
+    return ev_home, ev_away
+
+
+def _side(home, away):
+    """下注方向：1=主隊, -1=客隊, 0=不下注 (兩邊都有訊號時以主隊為準，與 v700 結算規則相同)"""
+    return np.where(home, 1, np.where(away, -1, 0)).astype(np.int8)
+
+
+def v600_decisions(hp, ev_home, ev_away, params=None):
+    """v600 決策：兩邊各自 EV > 0 即為訊號"""
+    p = dict(V600_PARAMS, **(params or {}))
+    hp, ev_home, ev_away = (np.asarray(a, dtype=float) for a in (hp, ev_home, ev_away))
+    has_odds = ~(np.isnan(ev_home) | np.isnan(ev_away))
+    home = has_odds & (ev_home > 0)
+    away = has_odds & (ev_away > 0)
+    return {'params': p, 'hp': hp, 'ev_home': ev_home, 'ev_away': ev_away,
+            'has_odds': has_odds, 'home': home, 'away': away, 'side': _side(home, away)}
+
+
+def render_v600_signals(decisions):
+    """把 v600 決策轉成 Bet_Signal 字串"""
+    p = decisions['params']
+    signals = []
+    for hp, eh, ea, has_odds, home, away in zip(decisions['hp'], decisions['ev_home'], decisions['ev_away'],
+                                                 decisions['has_odds'], decisions['home'], decisions['away']):
+        if not has_odds:
+            signals.append("無賠率")
+            continue
+        res = []
+        if home:
+            star = "★" if eh > p['star_ev'] else ""
+            conf = "🔥" if hp >= p['home_conf'] else ""
+            res.append(f"主EV={eh:.2f}{star}{conf}")
+        if away:
+            star = "★" if ea > p['star_ev'] else ""
+            conf = "🔥" if hp <= p['away_conf'] else ""
+            res.append(f"客EV={ea:.2f}{star}{conf}")
+        signals.append(" | ".join(res) if res else "觀望")
+    return np.array(signals, dtype=object)
+
+
+def v800_decisions(hp, ev_home, ev_away, odds_home, params=None):
+    """
+    【v800.2 策略核心 (向量化)】
+    依主勝率分區 (與原本 if/elif 的順序相同，主勝率為 NaN 時落在 Risky 區)，
+    再依各區的 EV 門檻決定主 / 客是否下注。回傳各欄位等長陣列的 dict。
+    """
+    p = dict(V800_PARAMS, **(params or {}))
+    hp, ev_home, ev_away, odds_home = (np.asarray(a, dtype=float) for a in (hp, ev_home, ev_away, odds_home))
+    has_odds = ~(np.isnan(ev_home) | np.isnan(ev_away))
+
+    zone = np.select(
+        [~has_odds,
+         (hp >= p['solid_low']) & (hp < p['solid_high']),
+         (hp >= p['sniper_low']) & (hp < p['sniper_high']),
+         (hp >= p['value_low']) & (hp < p['value_high']),
+         hp >= p['solid_high'],
+         hp < p['sniper_low']],
+        [ZONE_NO_ODDS, ZONE_SOLID, ZONE_SNIPER, ZONE_VALUE, ZONE_LOCK_HOME, ZONE_LOCK_AWAY],
+        default=ZONE_RISKY,
+    ).astype(np.int8)
+
+    # C 區：模型低估主隊，加權後的主隊 EV
+    adj_ev_home = (hp + p['value_boost']) * odds_home - 1
+
+    home = (((zone == ZONE_SOLID) & (ev_home > 0))
+            | ((zone == ZONE_VALUE) & (adj_ev_home > 0))
+            | ((zone == ZONE_LOCK_HOME) & (ev_home > p['lock_ev']))
+            | ((zone == ZONE_RISKY) & (ev_home > p['risky_ev'])))
+    away = (((zone == ZONE_SNIPER) & (ev_away > 0))
+            | ((zone == ZONE_LOCK_AWAY) & (ev_away > p['lock_ev']))
+            | ((zone == ZONE_RISKY) & (ev_away > p['risky_ev'])))
+    return {'params': p, 'hp': hp, 'ev_home': ev_home, 'ev_away': ev_away, 'adj_ev_home': adj_ev_home,
+            'zone': zone, 'home': home, 'away': away, 'side': _side(home, away)}
+
+
+def _render_v800(zone, hp, eh, ea, adj, home, away, fire_ev):
+    if zone == ZONE_NO_ODDS:
+        return "無賠率"
+    if zone == ZONE_SOLID:
+        if home:
+            return f"BET HOME (Solid) EV={eh:.2f}{'🔥' if eh > fire_ev else ''}"
+        return f"HOME (Parlay) Win={hp:.0%}"
+    if zone == ZONE_SNIPER:
+        if away:
+            return f"BET AWAY (Sniper) EV={ea:.2f}{'🔥' if ea > fire_ev else ''}"
+        return f"AWAY (Parlay) Win={1 - hp:.0%}"
+    if zone == ZONE_VALUE:
+        return f"BET HOME (Value) AdjEV={adj:.2f}💎" if home else "觀望"
+    if zone == ZONE_LOCK_HOME:
+        return f"BET HOME (Lock) EV={eh:.2f}" if home else "PASS (Too Low Odds)"
+    if zone == ZONE_LOCK_AWAY:
+        return f"BET AWAY (Lock) EV={ea:.2f}" if away else "PASS (Too Low Odds)"
+    res = []
+    if home: res.append(f"主EV高={eh:.2f} (Risky)")
+    if away: res.append(f"客EV高={ea:.2f} (Risky)")
+    return " | ".join(res) if res else "觀望"
+
+
+def render_v800_signals(decisions):
+    """把 v800 決策轉成 Bet_Signal 字串"""
+    fire_ev = decisions['params']['fire_ev']
+    return np.array([
+        _render_v800(zone, hp, eh, ea, adj, home, away, fire_ev)
+        for zone, hp, eh, ea, adj, home, away in zip(
+            decisions['zone'], decisions['hp'], decisions['ev_home'], decisions['ev_away'],
+            decisions['adj_ev_home'], decisions['home'], decisions['away'])
+    ], dtype=object)
@@ -73,32 +73,12 @@ def main():
     # (檔名確認：v200_gmsc_cumulative.py)
     if not run_script("v200_gmsc_cumulative.py"): return 
     
-    # 4. 計算球隊進階數據 (NetRtg - v53)
-    # 輸入: nba_game_data_raw_v52_PATCHED.csv 
-    # 輸出: v1_adv_stats_v53.csv
-    if not run_script("v1_update_v53.py"): return
-    
-    # 5. 計算最終特徵 & 傷病指標 (v108 part 2)
+    # 4. 計算最終特徵 (v109_FIXED)
     # 輸入: v52_PATCHED + v108_cumulative 
-    # 輸出: FINAL_MASTER_v108_base.csv
-    # (檔名確認：v200data_process9.py)
-    if not run_script("v200data_process9.py"): return
-
-    # ------------------------------------------------------
-    # 階段 3: 最終整合 (Final Merge)
-    # ------------------------------------------------------
-    print("\n--- 階段 3: 最終整合 ---")
-    
-    # 6. 合併所有特徵 (v109)
-    # 輸入: v108_base + v53_adv 
-    # 輸出: FINAL_MASTER_DATASET_v109.csv
-    # (檔名確認：v200_merge_final.py)
-    if not run_script("v200_merge_final.py"): return
-    
-    # 7. 修正欄位名稱 (v109_FIXED)
-    # 輸入: v109 
     # 輸出: FINAL_MASTER_DATASET_v109_FIXED.csv
-    if not run_script("fix_columns.py"): return
+    # (基礎 / 傷病 / 進階數據在同一個腳本內計算，取代原本的 v1_update_v53 -> v200data_process9
+    #  -> v200_merge_final -> fix_columns 四步)
+    if not run_script("v200data_process9.py"): return
 
     print("\n" + "#"*60)
     print(" 恭喜！所有數據已更新完畢。")
@@ -1,28 +1,12 @@
 import pandas as pd
 import numpy as np
-import os
+import data_store
 
-def update_team_advanced_stats_v53():
-    """
-    【v1 (v53版) - 更新球隊進階數據】
-    輸入: nba_game_data_raw_v52_PATCHED.csv
-    輸出: v1_adv_stats_v53.csv
-    """
-    print("--- 開始執行 v200 (第 6a 步)：更新進階數據 (v53) ---")
+ADV_STATS_COLS = ['pace', 'off_rtg', 'def_rtg', 'net_rtg', 'tov_rate', 'orb_pct']
 
-    # 1. 輸入檔案：您剛剛修補好的 PATCHED 檔案
-    input_file = "nba_game_data_raw_v52_PATCHED.csv"
-    output_file = "v1_adv_stats_v53.csv"
-
-    if not os.path.exists(input_file):
-        print(f"錯誤：找不到 '{input_file}'。")
-        return
 
-    print(f"正在讀取 '{input_file}'...")
-    df = pd.read_csv(input_file)
-
-    # 2. 計算單場進階數據 (Pace, Ratings)
-    print("正在計算單場進階數據...")
+def add_game_advanced_stats(df):
+    """單場進階數據 (Pace, Ratings, 四因子組件)，直接加在每場一列的原始資料上"""
     df['home_poss'] = df['home_fga'] + 0.44 * df['home_fta'] - df['home_orb'] + df['home_tov']
     df['away_poss'] = df['away_fga'] + 0.44 * df['away_fta'] - df['away_orb'] + df['away_tov']
     df['pace'] = (df['home_poss'] + df['away_poss']) / 2
@@ -41,10 +25,54 @@ def update_team_advanced_stats_v53():
     df['away_orb_pct'] = df['away_orb'] / (df['away_orb'] + df['home_drb'])
     df['home_orb_pct'] = df['home_orb_pct'].fillna(0)
     df['away_orb_pct'] = df['away_orb_pct'].fillna(0)
+    return df
+
+
+def add_before_game_averages(team_game_df, adv_stats_cols=ADV_STATS_COLS, season_col='season_year'):
+    """
+    每隊每季的賽前累積平均 (Before_Game_Avg_*)，賽季第一場為 0。
+    分組累積和 / 累積場數 = expanding().mean()，所有欄位一次算完
+    (groupby.cumsum 與 expanding 同樣使用 Kahan 補償加總；整段數值都相同時 expanding 直接回傳該值，這裡照做)。
+    """
+    new_col_names = [f'Before_Game_Avg_{col}' for col in adv_stats_cols]
+    stats = team_game_df[adv_stats_cols]
+    group_keys = [team_game_df[season_col], team_game_df['team']]
+    groups = stats.groupby(group_keys)
+    expanding_mean = groups.cumsum() / (stats.notna().groupby(group_keys).cumsum())
+    changed = stats.ne(groups.shift(1))
+    all_same = changed.groupby(group_keys).cumsum() == 1
+    expanding_mean = expanding_mean.mask(all_same, stats)
+    team_game_df[new_col_names] = expanding_mean.groupby(group_keys).shift(1).values
+    team_game_df[new_col_names] = team_game_df[new_col_names].fillna(0)
+    return team_game_df
+
+
+def update_team_advanced_stats_v53():
+    """
+    【v1 (v53版) - 更新球隊進階數據】
+    輸入: nba_game_data_raw_v52_PATCHED.csv
+    輸出: v1_adv_stats_v53.csv
+    """
+    print("--- 開始執行 v200 (第 6a 步)：更新進階數據 (v53) ---")
+
+    # 1. 輸入檔案：您剛剛修補好的 PATCHED 檔案
+    input_file = "nba_game_data_raw_v52_PATCHED.csv"
+    output_file = "v1_adv_stats_v53.csv"
+
+    if not data_store.exists(input_file):
+        print(f"錯誤：找不到 '{input_file}'。")
+        return
+
+    print(f"正在讀取 '{input_file}'...")
+    df = data_store.read_csv(input_file)
+
+    # 2. 計算單場進階數據 (Pace, Ratings)
+    print("正在計算單場進階數據...")
+    add_game_advanced_stats(df)
 
     # 提取賽季
     df['game_date'] = pd.to_datetime(df['date'].astype(str), format='%Y%m%d')
-    df['season_year'] = df['game_date'].apply(lambda x: x.year + 1 if x.month >= 10 else x.year)
+    df['season_year'] = (df['game_date'].dt.year + (df['game_date'].dt.month >= 10)).astype('int64')
 
     # 3. 重塑數據 (Melt)
     print("正在重塑數據...")
@@ -74,23 +102,10 @@ def update_team_advanced_stats_v53():
 
     # 4. 計算賽前累積平均值 (Before_Game)
     print("正在計算賽前累積平均值 (Before_Game)...")
-    adv_stats_cols = ['pace', 'off_rtg', 'def_rtg', 'net_rtg', 'tov_rate', 'orb_pct']
-    new_col_names = [f'Before_Game_Avg_{col}' for col in adv_stats_cols]
-
-    for col in new_col_names:
-        team_game_df[col] = np.nan
-
-    groups = team_game_df.groupby(['season_year', 'team'])
-    for name, group in groups:
-        expanding_mean = group[adv_stats_cols].expanding().mean()
-        before_game_avg = expanding_mean.shift(1)
-        group_indices = group.index
-        team_game_df.loc[group_indices, new_col_names] = before_game_avg.values
-
-    team_game_df[new_col_names] = team_game_df[new_col_names].fillna(0)
+    add_before_game_averages(team_game_df)
 
     # 5. 儲存
-    team_game_df.to_csv(output_file, index=False)
+    data_store.write_csv(team_game_df, output_file, index=False)
     print(f"成功儲存 v53 進階數據到: '{output_file}'")
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-import os
+import data_store
 
 def process_player_cumulative_gmsc_v108():
     input_file = "nba_player_single_game_gmsc_v52.csv"
@@ -8,11 +8,11 @@ def process_player_cumulative_gmsc_v108():
 
     print(f"--- 開始執行 v108 (part 1)：計算球員累積 GmSc ---")
     
-    if not os.path.exists(input_file):
+    if not data_store.exists(input_file):
         print(f"錯誤: 找不到輸入檔案 '{input_file}'。")
         return
 
-    df = pd.read_csv(input_file)
+    df = data_store.read_csv(input_file)
     df['Date'] = pd.to_datetime(df['Date'])
     df['Single_Game_GmSc'] = pd.to_numeric(df['Single_Game_GmSc'], errors='coerce').fillna(0.0)
     df = df.sort_values(by=['Player_ID', 'Date']).reset_index(drop=True)
@@ -28,7 +28,7 @@ def process_player_cumulative_gmsc_v108():
     df = df[df['Date'] >= start_date].copy()
 
     final_columns = ['Player_ID', 'Player_Name', 'Season_Year', 'Date', 'Team_Abbr', 'Before_Game_Player_GmSc']
-    df[final_columns].to_csv(output_file, index=False)
+    data_store.write_csv(df[final_columns], output_file, index=False)
     print(f"成功儲存: {output_file}")
 
 if __name__ == "__main__":
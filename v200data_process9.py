@@ -1,27 +1,21 @@
 import pandas as pd
 import numpy as np
-import os
 import traceback
+import data_store
+from v1_update_v53 import ADV_STATS_COLS, add_game_advanced_stats, add_before_game_averages
 
-def create_final_dataset_v108():
-    raw_games_file = "nba_game_data_raw_v52_PATCHED.csv"
-    player_gmsc_file = "nba_player_cumulative_gmsc_v108.csv"
-    output_file = "FINAL_MASTER_v108_base.csv"
+ADV_AVG_COLS = [f'Before_Game_Avg_{col}' for col in ADV_STATS_COLS]
 
-    print(f"--- 開始執行 v108 (part 2)：計算傷病與基礎特徵 (保留原始數據版) ---")
-    
-    if not os.path.exists(raw_games_file) or not os.path.exists(player_gmsc_file):
-        print(f"錯誤: 找不到輸入檔案。")
-        return
+# 進階數據的最終欄位名稱 (原本 fix_columns 的對照表)
+FIXED_COLUMN_NAMES = {
+    'pace': 'Pace', 'off_rtg': 'OffRtg', 'def_rtg': 'DefRtg',
+    'net_rtg': 'NetRtg', 'tov_rate': 'TOV_Rate', 'orb_pct': 'ORB_Pct',
+}
 
-    try:
-        df_games = pd.read_csv(raw_games_file)
-        df_player = pd.read_csv(player_gmsc_file)
-    except Exception as e:
-        print(f"讀取失敗: {e}")
-        return
 
-    # --- 預處理與計算 (保持不變) ---
+def build_team_games(df_games):
+    """原始比賽 (每場一列) -> 每隊每場一列 (主客隊各一列，含單場進階數據)，尚未排序"""
+    df_games = add_game_advanced_stats(df_games.copy())
     df_games['date'] = df_games['date'].astype(str)
     df_games['game_date'] = pd.to_datetime(df_games['date'], format='%Y%m%d')
     df_games['Season_Year'] = df_games['game_date'].apply(lambda x: x.year + 1 if x.month >= 10 else x.year)
@@ -33,16 +27,94 @@ def create_final_dataset_v108():
     home_df = df_games[['game_id', 'game_date', 'Season_Year', 'home_team', 'away_team', 'home_pts', 'away_pts', 'home_win', 'home_margin', 'home_dnp']].copy()
     home_df.columns = ['game_id', 'date', 'Season_Year', 'team', 'opponent', 'pts', 'opp_pts', 'win', 'margin', 'dnp']
     home_df['location'] = 'Home'
+    home_df[ADV_STATS_COLS] = df_games[[f'home_{col}' if col != 'pace' else col for col in ADV_STATS_COLS]].values
     
     away_df = df_games[['game_id', 'game_date', 'Season_Year', 'away_team', 'home_team', 'away_pts', 'home_pts', 'home_win', 'away_margin', 'away_dnp']].copy()
     away_df['win'] = 1 - away_df['home_win']
     away_df = away_df.drop(columns=['home_win'])
     away_df.columns = ['game_id', 'date', 'Season_Year', 'team', 'opponent', 'pts', 'opp_pts', 'margin', 'dnp', 'win']
     away_df['location'] = 'Away'
+    away_df[ADV_STATS_COLS] = df_games[[f'away_{col}' if col != 'pace' else col for col in ADV_STATS_COLS]].values
+    
+    return pd.concat([home_df, away_df], ignore_index=True)
+
+
+def player_avg_gmsc_by_season(df_player):
+    """(賽季, 球員名) -> 賽前平均 GmSc 的對照表 (Series)，用於計算傷病影響"""
+    df_player = df_player.copy()
+    df_player['Date'] = pd.to_datetime(df_player['Date'])
+    df_player = df_player.sort_values(['Player_ID', 'Date'])
+    df_player['games_played'] = df_player.groupby(['Player_ID', 'Season_Year']).cumcount() + 1
+    df_player['Before_Game_Player_Avg_GmSc'] = df_player['Before_Game_Player_GmSc'] / df_player['games_played'].shift(1).fillna(1)
+    df_player['Before_Game_Player_Avg_GmSc'] = df_player['Before_Game_Player_Avg_GmSc'].fillna(0.0)
     
-    df_team_games = pd.concat([home_df, away_df], ignore_index=True)
+    return df_player.groupby(['Season_Year', 'Player_Name'])['Before_Game_Player_Avg_GmSc'].mean()
+
+
+def calculate_streak(df_team_games):
+    """
+    賽前連勝 (正) / 連敗 (負)，每季第一場為 0；df 需依 (team, date) 排序。
+    以「勝負改變或換季」為切點 cumsum 出每一段連續結果，段內 cumcount 即連勝/連敗場數。
+    """
+    team, season, win = df_team_games['team'].values, df_team_games['Season_Year'].values, df_team_games['win'].values
+    new_group = np.r_[True, (team[1:] != team[:-1]) | (season[1:] != season[:-1])]
+    new_run = new_group | np.r_[True, win[1:] != win[:-1]]
+    run_start = np.flatnonzero(new_run)[np.cumsum(new_run) - 1]
+    run_length = np.arange(len(win)) - run_start + 1
+    after_game = np.where(win == 1, run_length, -run_length)
+    before_game = np.r_[0, after_game[:-1]]
+    return pd.Series(np.where(new_group, 0, before_game).astype(np.int64), index=df_team_games.index)
+
+
+def calculate_injury_impact(df_team_games, avg_gmsc_by_season):
+    """
+    缺陣球員的賽季平均 GmSc 總和 / 80。
+    DNP 字串展開成 (列, 名單順序, 球員) 後與 (賽季, 球員) 平均 GmSc 表合併，
+    再依名單順序逐欄相加 (與原本逐列 for 迴圈的浮點加總順序相同，結果完全一致)。
+    """
+    team_avg_gmsc = 80.0
+    dnp = df_team_games['dnp']
+    valid = (dnp.notna() & (dnp != "")).values
+    lists = dnp[valid].astype(str).astype(object).str.split(',')
+    counts = lists.str.len().values
+    total_missing_gmsc = np.zeros(len(df_team_games))
+    if counts.sum() == 0:
+        return total_missing_gmsc / team_avg_gmsc
+
+    rows = np.repeat(np.flatnonzero(valid), counts)
+    slots = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    players = pd.DataFrame({
+        'Season_Year': np.repeat(df_team_games['Season_Year'].values[valid], counts),
+        'Player_Name': lists.explode().str.strip().values,
+    })
+    table = avg_gmsc_by_season.rename('gmsc').reset_index()
+    gmsc = players.merge(table, on=['Season_Year', 'Player_Name'], how='left')['gmsc'].fillna(0.0).values
+
+    by_slot = np.zeros((len(df_team_games), counts.max()))
+    by_slot[rows, slots] = gmsc
+    for slot in range(by_slot.shape[1]):
+        total_missing_gmsc = total_missing_gmsc + by_slot[:, slot]
+    return total_missing_gmsc / team_avg_gmsc
+
+
+def shifted_rolling_mean(df_team_games, keys, col, window):
+    """
+    組內最近 window 場 (不含本場) 的平均，每組第一場為 NaN；df 需依組內日期排序。
+    shift 與 rolling 都在組內計算，新增比賽不會改變其他球隊 / 對戰組合已算好的值。
+    """
+    groups = [df_team_games[key] for key in keys]
+    shifted = df_team_games.groupby(groups)[col].shift(1)
+    rolled = shifted.groupby(groups, sort=False).rolling(window, min_periods=1).mean()
+    return rolled.reset_index(level=list(range(len(keys))), drop=True)
+
+
+def compute_team_features(df_team_games, avg_gmsc_by_season):
+    """完整重算所有賽前特徵；回傳依 (team, opponent, date) 排序的長表"""
     df_team_games = df_team_games.sort_values(by=['team', 'date']).reset_index(drop=True)
     
+    # 進階數據賽前累積平均 (原本 v1_update_v53 另外重塑一次長表計算)
+    add_before_game_averages(df_team_games, season_col='Season_Year')
+    
     # 計算累積數據
     df_team_games['win_cumsum'] = df_team_games.groupby(['Season_Year', 'team'])['win'].cumsum()
     df_team_games['games_played'] = df_team_games.groupby(['Season_Year', 'team']).cumcount() + 1
@@ -60,26 +132,20 @@ def create_final_dataset_v108():
     df_team_games['win_away'] = np.where(df_team_games['location'] == 'Away', df_team_games['win'], 0)
     df_team_games['games_away'] = np.where(df_team_games['location'] == 'Away', 1, 0)
     
-    df_team_games['Before_Home_Win_Pct'] = df_team_games.groupby(['Season_Year', 'team'])['win_home'].cumsum().shift(1) / df_team_games.groupby(['Season_Year', 'team'])['games_home'].cumsum().shift(1)
-    df_team_games['Before_Away_Win_Pct'] = df_team_games.groupby(['Season_Year', 'team'])['win_away'].cumsum().shift(1) / df_team_games.groupby(['Season_Year', 'team'])['games_away'].cumsum().shift(1)
+    # 累積後也要在組內 shift，否則每組第一場會讀到上一隊 / 上一季的最後一場
+    season_team = [df_team_games['Season_Year'], df_team_games['team']]
+    before = {col: df_team_games.groupby(season_team)[col].cumsum().groupby(season_team).shift(1)
+              for col in ['win_home', 'games_home', 'win_away', 'games_away']}
+    df_team_games['Before_Home_Win_Pct'] = before['win_home'] / before['games_home']
+    df_team_games['Before_Away_Win_Pct'] = before['win_away'] / before['games_away']
     df_team_games['Before_Home_Win_Pct'] = df_team_games['Before_Home_Win_Pct'].fillna(0.0)
     df_team_games['Before_Away_Win_Pct'] = df_team_games['Before_Away_Win_Pct'].fillna(0.0)
     
-    g = df_team_games.groupby(['Season_Year', 'team'])['win']
-    df_team_games['Before_Game_Win_Pct_Last_5'] = g.shift(1).rolling(5, min_periods=1).mean().fillna(0.0)
-    df_team_games['Before_Game_Win_Pct_Last_10'] = g.shift(1).rolling(10, min_periods=1).mean().fillna(0.0)
-    g_margin = df_team_games.groupby(['Season_Year', 'team'])['margin']
-    df_team_games['Before_Game_Avg_Margin_Last_5'] = g_margin.shift(1).rolling(5, min_periods=1).mean().fillna(0.0)
-    
-    def calculate_streak(series):
-        streaks = []
-        current_streak = 0
-        for result in series:
-            streaks.append(current_streak)
-            if result == 1: current_streak = current_streak + 1 if current_streak > 0 else 1
-            else: current_streak = current_streak - 1 if current_streak < 0 else -1
-        return pd.Series(streaks, index=series.index)
-    df_team_games['Before_Game_Streak'] = df_team_games.groupby(['Season_Year', 'team'])['win'].apply(calculate_streak).reset_index(level=[0,1], drop=True)
+    df_team_games['Before_Game_Win_Pct_Last_5'] = shifted_rolling_mean(df_team_games, ['Season_Year', 'team'], 'win', 5).fillna(0.0)
+    df_team_games['Before_Game_Win_Pct_Last_10'] = shifted_rolling_mean(df_team_games, ['Season_Year', 'team'], 'win', 10).fillna(0.0)
+    df_team_games['Before_Game_Avg_Margin_Last_5'] = shifted_rolling_mean(df_team_games, ['Season_Year', 'team'], 'margin', 5).fillna(0.0)
+    
+    df_team_games['Before_Game_Streak'] = calculate_streak(df_team_games)
 
     df_team_games['date'] = pd.to_datetime(df_team_games['date'])
     df_team_games['prev_date'] = df_team_games.groupby(['Season_Year', 'team'])['date'].shift(1)
@@ -89,38 +155,22 @@ def create_final_dataset_v108():
     df_team_games['CS_Avg_Margin_L5'] = df_team_games['Before_Game_Avg_Margin_Last_5']
     
     df_team_games = df_team_games.sort_values(by=['team', 'opponent', 'date'])
-    g_h2h_win = df_team_games.groupby(['team', 'opponent'])['win']
-    df_team_games['Before_Game_H2H_Win_Pct_L5'] = g_h2h_win.shift(1).rolling(5, min_periods=1).mean().fillna(0.5)
-    g_h2h_margin = df_team_games.groupby(['team', 'opponent'])['margin']
-    df_team_games['Before_Game_H2H_Avg_Margin_L5'] = g_h2h_margin.shift(1).rolling(5, min_periods=1).mean().fillna(0.0)
+    df_team_games['Before_Game_H2H_Win_Pct_L5'] = shifted_rolling_mean(df_team_games, ['team', 'opponent'], 'win', 5).fillna(0.5)
+    df_team_games['Before_Game_H2H_Avg_Margin_L5'] = shifted_rolling_mean(df_team_games, ['team', 'opponent'], 'margin', 5).fillna(0.0)
     
     # 計算傷病指標
-    df_player['Date'] = pd.to_datetime(df_player['Date'])
-    df_player = df_player.sort_values(['Player_ID', 'Date'])
-    df_player['games_played'] = df_player.groupby(['Player_ID', 'Season_Year']).cumcount() + 1
-    df_player['Before_Game_Player_Avg_GmSc'] = df_player['Before_Game_Player_GmSc'] / df_player['games_played'].shift(1).fillna(1)
-    df_player['Before_Game_Player_Avg_GmSc'] = df_player['Before_Game_Player_Avg_GmSc'].fillna(0.0)
-    
-    avg_gmsc_by_season = df_player.groupby(['Season_Year', 'Player_Name'])['Before_Game_Player_Avg_GmSc'].mean().to_dict()
-    
-    def calculate_injury_impact_fast(row):
-        dnp_str = row['dnp']
-        if pd.isna(dnp_str) or dnp_str == "": return 0.0
-        team_avg_gmsc = 80.0 
-        dnp_list = [x.strip() for x in str(dnp_str).split(',')]
-        total_missing_gmsc = 0.0
-        season = row['Season_Year']
-        for player_name in dnp_list:
-            key = (season, player_name)
-            if key in avg_gmsc_by_season:
-                total_missing_gmsc += avg_gmsc_by_season[key]
-        return total_missing_gmsc / team_avg_gmsc
+    df_team_games['Total_Injury_Impact'] = calculate_injury_impact(df_team_games, avg_gmsc_by_season)
+    return df_team_games
 
-    df_team_games['Total_Injury_Impact'] = df_team_games.apply(calculate_injury_impact_fast, axis=1)
 
-    # --- 合併主客隊數據 ---
-    df_home = df_team_games[df_team_games['location'] == 'Home'].copy()
-    df_away = df_team_games[df_team_games['location'] == 'Away'].copy()
+def assemble_final_dataset(df_team_games):
+    """
+    每隊每場的長表 -> 每場一列 (主隊 + Opp_ 客隊特徵 + Diff)，
+    欄位順序與名稱和原本 v108 -> v200_merge_final -> fix_columns 產生的 v109_FIXED 相同。
+    """
+    base_cols = [col for col in df_team_games.columns if col not in ADV_STATS_COLS + ADV_AVG_COLS]
+    df_home = df_team_games.loc[df_team_games['location'] == 'Home', base_cols].copy()
+    df_away = df_team_games.loc[df_team_games['location'] == 'Away', base_cols].copy()
     
     # 定義需要保留的原始特徵 (Opp_ 開頭)
     # 【!! 修正 !!】 我們保留所有 Before_Game 特徵
@@ -161,11 +211,59 @@ def create_final_dataset_v108():
 
     df_final['date'] = df_final['date'].dt.strftime('%Y-%m-%d')
 
+    # 重複的 Opp_Abbr (客隊 team) 只保留第一個
+    df_final = df_final.loc[:, ~df_final.columns.duplicated()]
+
+    # 進階數據：主隊、Opp_ 客隊與 Diff
+    adv_home = df_team_games.loc[df_team_games['location'] == 'Home', ['game_id'] + ADV_AVG_COLS]
+    adv_away = df_team_games.loc[df_team_games['location'] == 'Away', ['game_id'] + ADV_AVG_COLS]
+    adv_away = adv_away.rename(columns={col: f"Opp_{col}" for col in ADV_AVG_COLS})
+    df_final = pd.merge(df_final, adv_home, on='game_id', how='inner')
+    df_final = pd.merge(df_final, adv_away, on='game_id', how='inner')
+    for col in ADV_AVG_COLS:
+        df_final[f"Diff_{col}"] = df_final[col] - df_final[f"Opp_{col}"]
+
+    rename_map = {}
+    for prefix in ('', 'Opp_', 'Diff_'):
+        for col, fixed in FIXED_COLUMN_NAMES.items():
+            rename_map[f'{prefix}Before_Game_Avg_{col}'] = f'{prefix}Before_Game_Avg_{fixed}'
+    return df_final.rename(columns=rename_map)
+
+
+def create_final_dataset_v109():
+    """
+    【v109 特徵階段】原始比賽只重塑一次長表，基礎 / 傷病 / 進階特徵在同一份資料上計算，
+    直接輸出最終欄位名稱的 FINAL_MASTER_DATASET_v109_FIXED.csv
+    (取代 v1_update_v53 + v200data_process9 (v108) + v200_merge_final + fix_columns 四個階段)。
+    """
+    raw_games_file = "nba_game_data_raw_v52_PATCHED.csv"
+    player_gmsc_file = "nba_player_cumulative_gmsc_v108.csv"
+    output_file = "FINAL_MASTER_DATASET_v109_FIXED.csv"
+
+    print(f"--- 開始執行 v109：計算基礎、傷病與進階特徵 (保留原始數據版) ---")
+    
+    if not data_store.exists(raw_games_file) or not data_store.exists(player_gmsc_file):
+        print(f"錯誤: 找不到輸入檔案。")
+        return
+
+    try:
+        df_games = data_store.read_csv(raw_games_file)
+        df_player = data_store.read_csv(player_gmsc_file)
+    except Exception as e:
+        print(f"讀取失敗: {e}")
+        return
+
+    avg_gmsc_by_season = player_avg_gmsc_by_season(df_player)
+
+    df_team_games = compute_team_features(build_team_games(df_games), avg_gmsc_by_season)
+
+    df_final = assemble_final_dataset(df_team_games)
+
     # 【!! 修正 !!】 儲存時不篩選欄位，保留所有原始數據
     # 這樣 nba_battle_predictor 才能讀到 Before_Game_...
-    df_final.to_csv(output_file, index=False)
+    data_store.write_csv(df_final, output_file, index=False)
     
-    print(f"成功產生: {output_file} (共 {len(df_final)} 筆，包含原始數據)")
+    print(f"成功產生: {output_file} (共 {len(df_final)} 筆，包含原始與進階數據)")
 
 if __name__ == "__main__":
-    create_final_dataset_v108()
\ No newline at end of file
+    create_final_dataset_v109()
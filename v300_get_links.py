@@ -1,11 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
-import numpy as np
 import traceback
-import os
 from datetime import datetime, timedelta
+import data_store
+import scrape_client
 
 def get_links_for_date(date_obj):
     """
@@ -20,12 +18,11 @@ def get_links_for_date(date_obj):
     url = f"https://www.basketball-reference.com/boxscores/?month={month}&day={day}&year={year}"
     print(f"  ... 正在檢查日期: {date_obj.strftime('%Y-%m-%d')} (來源: {url})")
     
-    headers = { 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36' }
-    
     links = []
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        response = scrape_client.fetch(url, retries=1, delay=0)
+        if response is None:
+            raise RuntimeError("請求失敗")
         soup = BeautifulSoup(response.content, 'lxml')
         
         # 找到所有 "Box Score" 連結
@@ -44,60 +41,63 @@ def get_links_for_date(date_obj):
         return []
 
 # --- 【v300 執行】 ---
-print(f"\n--- 開始執行 v300：增量連結抓取 (Smart Update) ---")
+def run_v300_get_links():
+    print(f"\n--- 開始執行 v300：增量連結抓取 (Smart Update) ---")
 
-# 1. 讀取現有數據，找出最後更新日期
-current_data_file = "nba_game_data_raw_v52_PATCHED.csv"
-if not os.path.exists(current_data_file):
-    print(f"錯誤：找不到 '{current_data_file}'。請先完成 v200 流程。")
-    exit()
+    # 1. 讀取現有數據，找出最後更新日期
+    current_data_file = "nba_game_data_raw_v52_PATCHED.csv"
+    if not data_store.exists(current_data_file):
+        print(f"錯誤：找不到 '{current_data_file}'。請先完成 v200 流程。")
+        return
 
-df_existing = pd.read_csv(current_data_file)
-# 轉換日期格式 (假設是 YYYYMMDD)
-df_existing['date_dt'] = pd.to_datetime(df_existing['date'].astype(str), format='%Y%m%d')
-last_date = df_existing['date_dt'].max()
+    df_existing = data_store.read_csv(current_data_file)
+    # 轉換日期格式 (假設是 YYYYMMDD)
+    df_existing['date_dt'] = pd.to_datetime(df_existing['date'].astype(str), format='%Y%m%d')
+    last_date = df_existing['date_dt'].max()
 
-print(f"目前數據庫最後日期: {last_date.strftime('%Y-%m-%d')}")
+    print(f"目前數據庫最後日期: {last_date.strftime('%Y-%m-%d')}")
 
-# 2. 設定抓取範圍：從 (最後日期 + 1天) 到 (今天)
-today = datetime.now()
-# 如果最後日期是今天，代表已經最新了，但為了保險（可能今天稍早只抓了一半），我們還是檢查今天
-start_date = last_date + timedelta(days=1) 
-end_date = today
+    # 2. 設定抓取範圍：從 (最後日期 + 1天) 到 (今天)
+    today = datetime.now()
+    # 如果最後日期是今天，代表已經最新了，但為了保險（可能今天稍早只抓了一半），我們還是檢查今天
+    start_date = last_date + timedelta(days=1) 
+    end_date = today
 
-if start_date.date() > end_date.date():
-    print("數據已經是最新的！無需更新連結。")
-    # 產生一個空的 CSV 以免後續腳本報錯
-    pd.DataFrame(columns=['box_score_url']).to_csv('new_links_v300.csv', index=False)
-    exit()
+    if start_date.date() > end_date.date():
+        print("數據已經是最新的！無需更新連結。")
+        # 產生一個空的 CSV 以免後續腳本報錯
+        data_store.write_csv(pd.DataFrame(columns=['box_score_url']), 'new_links_v300.csv', index=False)
+        return
 
-print(f"準備更新日期範圍: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
+    print(f"準備更新日期範圍: {start_date.strftime('%Y-%m-%d')} 到 {end_date.strftime('%Y-%m-%d')}")
 
-# 3. 循環日期抓取連結
-all_new_links = []
-current_date = start_date
-while current_date.date() <= end_date.date():
-    links = get_links_for_date(current_date)
-    if links:
-        all_new_links.extend(links)
-    
-    # 禮貌性延遲
-    time.sleep(np.random.uniform(2.0, 4.0))
-    current_date += timedelta(days=1)
+    # 3. 循環日期抓取連結
+    all_new_links = []
+    current_date = start_date
+    while current_date.date() <= end_date.date():
+        links = get_links_for_date(current_date)
+        if links:
+            all_new_links.extend(links)
 
-# 4. 儲存新連結
-output_filename = 'new_links_v300.csv'
-if all_new_links:
-    # 去除重複
-    unique_links = sorted(list(set(all_new_links)))
-    links_df = pd.DataFrame(unique_links, columns=['box_score_url'])
-    links_df.to_csv(output_filename, index=False)
-    
-    print(f"\n--- v300 連結抓取完畢 ---")
-    print(f"成功找到 {len(unique_links)} 個【全新】比賽連結。")
-    print(f"已儲存至: '{output_filename}'")
-else:
-    print(f"\n--- v300 連結抓取完畢 ---")
-    print("這段期間沒有任何新比賽 (可能是休賽日或尚未開打)。")
-    # 產生空檔案
-    pd.DataFrame(columns=['box_score_url']).to_csv(output_filename, index=False)
\ No newline at end of file
+        # 禮貌性延遲由 scrape_client 的全域限速處理 (快取命中時不需等待)
+        current_date += timedelta(days=1)
+
+    # 4. 儲存新連結
+    output_filename = 'new_links_v300.csv'
+    if all_new_links:
+        # 去除重複
+        unique_links = sorted(list(set(all_new_links)))
+        links_df = pd.DataFrame(unique_links, columns=['box_score_url'])
+        data_store.write_csv(links_df, output_filename, index=False)
+
+        print(f"\n--- v300 連結抓取完畢 ---")
+        print(f"成功找到 {len(unique_links)} 個【全新】比賽連結。")
+        print(f"已儲存至: '{output_filename}'")
+    else:
+        print(f"\n--- v300 連結抓取完畢 ---")
+        print("這段期間沒有任何新比賽 (可能是休賽日或尚未開打)。")
+        # 產生空檔案
+        data_store.write_csv(pd.DataFrame(columns=['box_score_url']), output_filename, index=False)
+
+if __name__ == "__main__":
+    run_v300_get_links()
\ No newline at end of file
@@ -1,21 +1,19 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import os
 import datetime
 import re
+import data_store
+import scrape_client
 
 def get_current_injuries():
     print("--- v400: 正在抓取即時傷病名單 (Current Injuries) ---")
     url = "https://www.basketball-reference.com/friv/injuries.fcgi"
     
-    headers = { 
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        response = scrape_client.fetch(url, retries=1, delay=0)
+        if response is None:
+            raise RuntimeError("請求失敗")
         soup = BeautifulSoup(response.content, 'lxml')
         
         table = soup.find('table', {'id': 'injuries'})
@@ -73,7 +71,7 @@ def get_current_injuries():
         
         # 儲存
         df = pd.DataFrame(injuries)
-        df.to_csv("current_injuries.csv", index=False)
+        data_store.write_csv(df, "current_injuries.csv", index=False)
         print("已儲存至 'current_injuries.csv'")
         
         # 展示前 5 筆
@@ -1,4 +1,3 @@
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import numpy as np
@@ -7,6 +6,8 @@ import datetime
 import os
 import glob
 import re
+import data_store
+import scrape_client
 
 # --- 1. 隊名對照表 (完整版) ---
 TEAM_MAP = {
@@ -50,12 +51,12 @@ def get_playsport_odds_robust(target_date_str):
     url = f"https://www.playsport.cc/gamesData/result?allianceid=3&gametime={target_date_str}"
     print(f"正在抓取 PlaySport 頁面: {target_date_str} ...")
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        # PlaySport 不是 BBR，不佔用 BBR 的限速額度
+        response = scrape_client.fetch(url, retries=1, delay=0, rate_limited=False)
+        if response is None:
+            print("錯誤: 無法連線到 PlaySport")
+            return []
         soup = BeautifulSoup(response.content, 'lxml')
         
         # 1. 找到所有帶有 gameid 的行
@@ -192,7 +193,7 @@ def main():
         output_file = f"odds_for_{date_str}.csv"
         
         df = pd.DataFrame(odds_data)
-        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        data_store.write_csv(df, output_file, index=False, encoding='utf-8-sig')
         
         print(f"\n成功！抓取到 {len(df)} 場比賽的賠率。")
         print(f"已儲存至: {output_file}")
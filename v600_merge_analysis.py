@@ -3,6 +3,8 @@ import numpy as np  # <--- 補上了這一行關鍵的引用
 import os
 import glob
 import re
+import data_store
+import strategy_engine
 
 def find_latest_files():
     """
@@ -22,43 +24,12 @@ def find_latest_files():
     date_str = pattern.match(os.path.basename(latest_pred)).group(1)
     odds_file = f"odds_for_{date_str}.csv"
     
-    if not os.path.exists(odds_file):
+    if not data_store.exists(odds_file):
         print(f"警告: 找不到對應賠率檔 '{odds_file}' (將只顯示預測)")
         return latest_pred, None
         
     return latest_pred, odds_file
 
-def calculate_ev(row):
-    """計算 EV"""
-    # 欄位名稱兼容
-    hp = row.get('Home_Win_Prob', row.get('Predicted_Prob_Win (1)', 0.5))
-    ap = 1.0 - hp
-    
-    # 處理賠率可能的空值或錯誤格式
-    try:
-        ho = float(row.get('Odds_Home', np.nan))
-    except:
-        ho = np.nan
-        
-    try:
-        ao = float(row.get('Odds_Away', np.nan))
-    except:
-        ao = np.nan
-    
-    # 計算主隊 EV
-    if pd.notna(ho):
-        ev_home = (hp * ho) - 1
-    else:
-        ev_home = np.nan # 這裡需要用到 np
-        
-    # 計算客隊 EV
-    if pd.notna(ao):
-        ev_away = (ap * ao) - 1
-    else:
-        ev_away = np.nan # 這裡需要用到 np
-        
-    return ev_home, ev_away
-
 def main():
     print("\n" + "="*60)
     print(" 💰 NBA 價值分析器 (v600 - 追加版)")
@@ -72,11 +43,11 @@ def main():
         return
 
     print(f"讀取預測: {pred_file}")
-    df_pred = pd.read_csv(pred_file)
+    df_pred = data_store.read_csv(pred_file)
     
     if odds_file:
         print(f"讀取賠率: {odds_file}")
-        df_odds = pd.read_csv(odds_file)
+        df_odds = data_store.read_csv(odds_file)
         
         # 合併
         if 'Home' in df_pred.columns:
@@ -92,32 +63,12 @@ def main():
             how='left'
         )
         
-        # 計算 EV
-        ev_results = df_final.apply(calculate_ev, axis=1, result_type='expand')
-        df_final['EV_Home'] = ev_results[0]
-        df_final['EV_Away'] = ev_results[1]
-        
-        # 產生訊號
-        def get_signal(row):
-            hp = row.get('Home_Win_Prob', row.get('Predicted_Prob_Win (1)'))
-            eh = row['EV_Home']
-            ea = row['EV_Away']
-            
-            if pd.isna(eh) or pd.isna(ea): return "無賠率"
-            
-            res = []
-            if eh > 0:
-                star = "★" if eh > 0.1 else ""
-                conf = "🔥" if hp >= 0.65 else ""
-                res.append(f"主EV={eh:.2f}{star}{conf}")
-            if ea > 0:
-                star = "★" if ea > 0.1 else ""
-                conf = "🔥" if hp <= 0.35 else ""
-                res.append(f"客EV={ea:.2f}{star}{conf}")
-            
-            return " | ".join(res) if res else "觀望"
-
-        df_final['Bet_Signal'] = df_final.apply(get_signal, axis=1)
+        # 計算 EV 與訊號 (整欄運算，字串只在最後產生)
+        ev_home, ev_away = strategy_engine.compute_ev(df_final)
+        df_final['EV_Home'] = ev_home
+        df_final['EV_Away'] = ev_away
+        decisions = strategy_engine.v600_decisions(strategy_engine.home_win_prob(df_final), ev_home, ev_away)
+        df_final['Bet_Signal'] = strategy_engine.render_v600_signals(decisions)
         
         # 清理多餘欄位
         cols_to_drop = ['Home_Abbr', 'Away_Abbr'] 
@@ -134,10 +85,10 @@ def main():
     # --- 核心修改：追加邏輯 ---
     output_file = "final_analysis_report.csv"
     
-    if os.path.exists(output_file):
+    if data_store.exists(output_file):
         print(f"\n正在讀取現有報告 '{output_file}' 以便追加...")
         try:
-            df_history = pd.read_csv(output_file)
+            df_history = data_store.read_csv(output_file)
             
             # 為了去重，我們需要一個唯一鍵
             home_col = 'Home' if 'Home' in df_final.columns else 'Team_Abbr'
@@ -191,7 +142,7 @@ def main():
         print(f"{prefix}{row['Date']:<12} | {home}v{away:<4} | {prob:.1%}    | {odds:<10} | {row['Bet_Signal']}")
 
     # 存檔 (包含所有歷史)
-    df_combined.to_csv(output_file, index=False, encoding='utf-8-sig')
+    data_store.write_csv(df_combined, output_file, index=False, encoding='utf-8-sig')
     print("\n" + "="*60)
     print(f" 已將 {len(df_final)} 筆新記錄追加至: {output_file}")
     print(f" 目前總記錄數: {len(df_combined)}")
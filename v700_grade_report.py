@@ -1,11 +1,10 @@
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
-import os
 import re
-import time
 import warnings
 import numpy as np
+import data_store
+import scrape_client
 
 # 忽略 Pandas 的 SettingWithCopyWarning
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -21,10 +20,9 @@ def get_scores_from_bbr(date_str):
         url = f"https://www.basketball-reference.com/boxscores/?month={dt.month}&day={dt.day}&year={dt.year}"
         print(f"  正在查詢比分: {date_str} ...")
         
-        headers = { 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36' }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = scrape_client.fetch(url, retries=1, delay=0)
         
-        if response.status_code != 200:
+        if response is None:
             print("    無法連線到 BBR。")
             return {}
 
@@ -82,11 +80,11 @@ def get_scores_from_bbr(date_str):
 def process_report(input_file, output_file, version_name):
     print(f"\n--- 正在處理報表: {version_name} ({input_file}) ---")
     
-    if not os.path.exists(input_file):
+    if not data_store.exists(input_file):
         print(f"跳過: 找不到檔案 '{input_file}'")
         return
 
-    df = pd.read_csv(input_file)
+    df = data_store.read_csv(input_file)
     
     # 確保欄位存在
     if 'Home_Score' not in df.columns: df['Home_Score'] = np.nan
@@ -156,8 +154,7 @@ def process_report(input_file, output_file, version_name):
                 
                 if outcome != "-":
                     print(f"  [結算] {home} vs {away}: {h_score}-{a_score} | 訊號: {signal[:15]}... | 結果: {outcome}")
-        
-        time.sleep(1)
+
 
     # 計算統計
     graded = df[df['Outcome'].isin(["✅ WIN", "❌ LOSS"])]
@@ -191,7 +188,7 @@ def process_report(input_file, output_file, version_name):
     except:
         pass # 賠率欄位可能有問題，跳過 ROI 計算
 
-    df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    data_store.write_csv(df, output_file, index=False, encoding='utf-8-sig')
     
     print(f"  -> [{version_name}] 總場次: {wins + losses} | 勝率: {win_rate:.1%} | 淨利: {net_profit:.2f}u | ROI: {roi:.1f}%")
     print(f"  -> 檔案更新: {output_file}")
@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 import os
 from sklearn.calibration import calibration_curve
 import warnings
+import data_store
 
 # 忽略 FutureWarning
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -19,7 +20,7 @@ def analyze_calibration():
         print("請先執行 'v500_export_predictions.py' 或重新跑一次模型驗證來產生此檔案。")
         return
 
-    df = pd.read_csv(input_file)
+    df = data_store.read_csv(input_file)
     print(f"成功讀取 {len(df)} 場比賽數據。")
     
     if 'Win_Prob' not in df.columns or 'Win' not in df.columns:
@@ -0,0 +1,131 @@
+"""
+【v900 - 滾動回測引擎 (Walk-Forward)】
+模擬 v500 每天重新訓練的實際情況，取代「訓練一次、整季一次預測」的單一切分：
+1. 測試期依 interval 切成多個 fold (daily = 每個比賽日, weekly = 每 7 天, 整數 = 每 N 天)
+2. 每個 fold 只用「fold 第一天之前」的所有比賽訓練，預測 fold 內的比賽
+3. fold 之間互相獨立，交給 ProcessPoolExecutor 平行執行 (workers=1 = 在目前行程中依序執行)
+4. 每個 fold 的結果依訓練資料指紋快取在 .walk_forward_cache/ (資料沒變時重跑幾乎不花時間)
+   (快取的是 fold 的預測機率而不是模型本身：一個 RandomForest 約 40MB，每日 fold 會有上百個)
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.preprocessing import StandardScaler
+import model_registry
+
+CACHE_DIR = ".walk_forward_cache"
+INTERVAL_DAYS = {'daily': None, 'weekly': 7}
+
+
+def fold_starts(dates, interval='weekly'):
+    """
+    測試期的比賽日 -> 每個 fold 的第一天 (排序後的 Timestamp 清單)。
+    daily：每個比賽日都重新訓練；weekly / 整數 N：從第一個比賽日起每 N 天一個 fold。
+    """
+    days = pd.DatetimeIndex(sorted(pd.to_datetime(pd.Series(dates)).unique()))
+    if len(days) == 0:
+        return []
+    step = INTERVAL_DAYS[interval] if interval in INTERVAL_DAYS else int(interval)
+    if step is None:
+        return list(days)
+    bucket = (days - days[0]).days // step
+    return list(pd.Series(days).groupby(bucket).min())
+
+
+def _fold_key(X_train, y_train, X_test, feature_columns, params):
+    h = hashlib.sha1()
+    h.update(model_registry.training_fingerprint(X_train, y_train, feature_columns, params).encode('utf-8'))
+    h.update(np.ascontiguousarray(np.asarray(X_test, dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.joblib")
+
+
+def _load_fold(key):
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception:
+        return None
+
+
+def _train_fold(X_train, y_train, X_test, engine, params):
+    """與 model_registry.load_or_train 相同的 StandardScaler + 模型"""
+    scaler = StandardScaler()
+    model = model_registry.make_model(engine, params)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    X_test_scaled = scaler.transform(X_test)
+    return {'proba': model.predict_proba(X_test_scaled)[:, 1], 'pred': model.predict(X_test_scaled)}
+
+
+def _run_fold(task):
+    """子行程執行的單一 fold：訓練、預測並寫入快取"""
+    key, X_train, y_train, X_test, engine, params = task
+    result = _train_fold(X_train, y_train, X_test, engine, params)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{_cache_path(key)}.{os.getpid()}.tmp"
+    joblib.dump(result, tmp)
+    os.replace(tmp, _cache_path(key))
+    return result
+
+
+def run_walk_forward(df, feature_columns, test_mask, interval='weekly', engine=None, params=None, workers=None):
+    """
+    df 需要 'date' 與 'Win' 欄位；test_mask 標記要預測的列 (通常是最新賽季)。
+    engine / params 沒指定時與 v500 相同 (model_config.json)。
+    回傳 test 列的 DataFrame (index 與 df 相同)：Win_Prob、Predicted_Win 與 Fold (fold 第一天)。
+    """
+    engine, params = model_registry.resolve_model_config(engine, params)
+    workers = workers or min(4, os.cpu_count() or 1)
+    dates = pd.to_datetime(df['date'])
+    test_mask = np.asarray(test_mask, dtype=bool)
+    starts = fold_starts(dates[test_mask], interval)
+
+    folds = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else None
+        in_fold = test_mask & (dates >= start).values
+        if end is not None:
+            in_fold &= (dates < end).values
+        train = (dates < start).values
+        X_train, y_train = df.loc[train, feature_columns], df.loc[train, 'Win']
+        X_test = df.loc[in_fold, feature_columns]
+        folds.append((start, in_fold, _fold_key(X_train, y_train, X_test, feature_columns,
+                                                 model_registry.fingerprint_params(engine, params)),
+                      X_train, y_train, X_test))
+
+    results = {}
+    tasks = []
+    for start, _, key, X_train, y_train, X_test in folds:
+        cached = _load_fold(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            tasks.append((key, X_train, y_train, X_test, engine, params))
+    print(f"  [Walk-Forward] {len(folds)} 個 fold ({interval})：快取命中 {len(folds) - len(tasks)}，需要訓練 {len(tasks)}")
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            results[task[0]] = _run_fold(task)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for task, result in zip(tasks, pool.map(_run_fold, tasks)):
+                results[task[0]] = result
+
+    if not folds:
+        return pd.DataFrame(columns=['Win_Prob', 'Predicted_Win', 'Fold'])
+    parts = []
+    for start, in_fold, key, _, _, _ in folds:
+        parts.append(pd.DataFrame({
+            'Win_Prob': results[key]['proba'],
+            'Predicted_Win': results[key]['pred'],
+            'Fold': start.strftime('%Y-%m-%d'),
+        }, index=df.index[in_fold]))
+    return pd.concat(parts).loc[df.index[test_mask]]